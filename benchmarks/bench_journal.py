@@ -0,0 +1,70 @@
+"""
+Benchmark for the task journal: write throughput with group commit and
+startup replay time from journal-only and snapshot+tail states.
+
+Usage: python benchmarks/bench_journal.py [--tasks 100000] [--burst 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_journal import TaskJournal
+from task_manager import TaskManager
+
+
+def fill(manager: TaskManager, count: int, burst: int):
+    """Add tasks in bursts, flushing once per burst like a group commit window would"""
+    deadline = (date.today() + timedelta(days=30)).strftime('%Y-%m-%d')
+    for i in range(count):
+        manager.add_task(f"Benchmark task {i}", deadline, 1000 + i % 500, f"user{i % 500}", 42)
+        if burst and (i + 1) % burst == 0:
+            manager.journal.flush()
+    manager.journal.flush()
+
+
+def timed_replay(data_dir: str) -> float:
+    start = time.perf_counter()
+    manager = TaskManager(journal=TaskJournal(data_dir, snapshot_every=10 ** 9))
+    elapsed = time.perf_counter() - start
+    manager.close()
+    return elapsed
+
+
+def run(tasks: int, burst: int):
+    print(f"📊 Journal benchmark: {tasks} tasks, burst size {burst}")
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        # Write path: journal only, no snapshots
+        journal = TaskJournal(data_dir, commit_delay=0, snapshot_every=10 ** 9)
+        manager = TaskManager(journal=journal)
+        start = time.perf_counter()
+        fill(manager, tasks, burst)
+        elapsed = time.perf_counter() - start
+        fsyncs = journal.fsync_count
+        manager.close()
+        print(f"  write:   {tasks / elapsed:,.0f} tasks/s ({elapsed:.2f}s, {fsyncs} fsyncs)")
+
+        print(f"  replay (journal only):   {timed_replay(data_dir):.2f}s")
+
+        # Snapshot the state, then add a 10% tail on top of it
+        manager = TaskManager(journal=TaskJournal(data_dir, snapshot_every=10 ** 9))
+        start = time.perf_counter()
+        manager.journal.write_snapshot(manager.next_task_id, manager.storage.all()).join()
+        print(f"  snapshot write:          {time.perf_counter() - start:.2f}s")
+        fill(manager, tasks // 10, burst)
+        manager.close()
+
+        print(f"  replay (snapshot + tail): {timed_replay(data_dir):.2f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--burst', type=int, default=50, help="appends per fsync")
+    args = parser.parse_args()
+    run(args.tasks, args.burst)
@@ -0,0 +1,88 @@
+"""
+Memory benchmark comparing the original 8-key task dict layout with the
+compact TaskRecord layout used by TaskManager.
+
+Usage: python benchmarks/bench_memory.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime, date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_record import TaskRecord
+
+USERS = 500
+CHANNELS = 20
+
+
+def _inputs(i: int):
+    """Fresh objects per task, the way discord.py hands them to a command handler"""
+    user = i % USERS
+    return (
+        f"Task {i}: refresh the onboarding docs",
+        date.today() + timedelta(days=i % 365),
+        int(str(180000000000000000 + user)),
+        ''.join(['user', str(user)]),
+        int(str(190000000000000000 + i % CHANNELS)),
+    )
+
+
+def build_dicts(count: int) -> dict:
+    tasks = {}
+    for i in range(1, count + 1):
+        description, deadline, creator_id, creator_name, channel_id = _inputs(i)
+        tasks[i] = {
+            'id': i,
+            'description': description,
+            'deadline': deadline,
+            'creator_id': creator_id,
+            'creator_name': creator_name,
+            'channel_id': channel_id,
+            'created_at': datetime.now(),
+            'completed': False
+        }
+    return tasks
+
+
+def build_records(count: int) -> dict:
+    tasks = {}
+    for i in range(1, count + 1):
+        description, deadline, creator_id, creator_name, channel_id = _inputs(i)
+        tasks[i] = TaskRecord(
+            i, description, deadline.toordinal(), creator_id, creator_name,
+            channel_id, int(datetime.now().timestamp())
+        )
+    return tasks
+
+
+def measure(builder, count: int) -> int:
+    """Bytes still allocated after building `count` tasks"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = builder(count)
+    gc.collect()
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del tasks
+    return allocated
+
+
+def run(sizes):
+    print(f"{'tasks':>10} {'dict B/task':>12} {'record B/task':>14} {'saved':>8}")
+    for count in sizes:
+        dict_bytes = measure(build_dicts, count)
+        record_bytes = measure(build_records, count)
+        print(f"{count:>10,} {dict_bytes / count:>12.0f} {record_bytes / count:>14.0f} "
+              f"{1 - record_bytes / dict_bytes:>8.0%}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+    run(args.sizes)
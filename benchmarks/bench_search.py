@@ -0,0 +1,83 @@
+"""
+Benchmark for the description search index: build time and query latency
+(whole-word, prefix and multi-term queries) compared with a substring scan.
+
+Usage: python benchmarks/bench_search.py [--tasks 100000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex
+
+VERBS = ['fix', 'review', 'deploy', 'update', 'write', 'refactor', 'test', 'document', 'plan', 'migrate']
+NOUNS = ['login', 'dashboard', 'invoice', 'pipeline', 'staging', 'release', 'onboarding', 'database',
+         'metrics', 'alerts', 'payments', 'search', 'exports', 'reminders', 'billing', 'backups']
+
+
+def descriptions(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    # A long tail of rare words (ticket codes, names) like real task boards have
+    rare = [f"ticket{n}" for n in range(count // 4)]
+    for i in range(count):
+        yield (f"{rng.choice(VERBS)} {rng.choice(NOUNS)} {rng.choice(NOUNS)} "
+               f"for {rng.choice(rare)} task {i}")
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def time_queries(label: str, search, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"   {label:<28} p50 {statistics.median(samples):8.3f} ms   p99 {percentile(samples, 0.99):8.3f} ms")
+
+
+def run(tasks: int, queries: int):
+    print(f"📊 Search benchmark: {tasks} tasks, {queries} queries per kind")
+    texts = list(descriptions(tasks))
+    rng = random.Random(11)
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    for task_id, text in enumerate(texts, 1):
+        index.add(task_id, text)
+    build = time.perf_counter() - start
+    print(f"   build: {build:.2f}s ({tasks / build:,.0f} tasks/s), {len(index.vocabulary):,} distinct tokens")
+
+    rare = [f"ticket{rng.randrange(tasks // 4)}" for _ in range(queries)]
+    prefix = [f"ticket{rng.randrange(tasks // 4)}"[:-1] for _ in range(queries)]
+    multi = [f"{rng.choice(VERBS)} {rng.choice(NOUNS)[:4]} ticket{rng.randrange(tasks // 4)}" for _ in range(queries)]
+    common = [f"{rng.choice(VERBS)} {rng.choice(NOUNS)}" for _ in range(queries)]
+
+    time_queries("rare word", index.search, rare)
+    time_queries("prefix of rare word", index.search, prefix)
+    time_queries("three terms incl. prefix", index.search, multi)
+    time_queries("two common words (top 50)", index.search, common)
+
+    folded = [text.casefold() for text in texts]
+    time_queries("substring scan (baseline)",
+                 lambda query: [i for i, text in enumerate(folded) if query in text], rare[:20])
+
+    start = time.perf_counter()
+    for task_id in range(1, tasks + 1, 2):
+        index.remove(task_id)
+    print(f"   remove half: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+    run(args.tasks, args.queries)
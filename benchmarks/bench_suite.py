@@ -0,0 +1,277 @@
+"""
+Benchmark suite for TaskManager and ReminderScheduler on synthetic task
+populations, with JSON results and regression checks against a baseline.
+
+Each case runs against populations of several sizes and deadline
+distributions; the reminder cases run send_daily_reminders end to end (one
+shared channel digest, or a DM digest per user) against the in-process fake
+bot in fake_discord.py, so no network is used.
+
+Usage:
+    python benchmarks/bench_suite.py -o results.json
+    python benchmarks/bench_suite.py --sizes 1000 100000 --baseline results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_discord import FakeBot, FakeChannel, FakeGuild
+from guild_store import PartitionSettings, TaskStore
+from reminder_scheduler import ReminderScheduler
+from task_manager import TaskManager
+from task_storage import SQLiteTaskStorage
+from task_views import paginate_tasks
+
+GUILD_ID = 1000
+CHANNEL_ID = 2000
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thresholds.json')
+
+# Deadline offsets in days from today for each distribution
+DISTRIBUTIONS = {
+    'uniform': lambda rng: rng.randint(0, 365),         # Spread over the next year
+    'near': lambda rng: rng.randint(-3, 3),             # Everything due around now (heavy reminders)
+    'overdue': lambda rng: rng.randint(-90, 30),        # Neglected board, lots to clean up
+}
+
+
+def population(size: int, distribution: str, users: int, seed: int = 1):
+    """Bulk-insert entries for a synthetic population: (description, deadline_day, creator, name, channel)"""
+    rng = random.Random(seed)
+    offset = DISTRIBUTIONS[distribution]
+    today = date.today().toordinal()
+    entries = []
+    for i in range(size):
+        user = rng.randrange(users)
+        entries.append((f"Synthetic task {i} for project {rng.randrange(50)}", today + offset(rng),
+                        10 ** 17 + user, f"user{user}", CHANNEL_ID + rng.randrange(5)))
+    return entries
+
+
+# Storage backend under test and scratch space for its files; set in main()
+BACKEND = 'memory'
+WORK_DIR = None
+
+
+def new_manager() -> TaskManager:
+    if BACKEND == 'sqlite':
+        path = os.path.join(tempfile.mkdtemp(dir=WORK_DIR), 'tasks.sqlite3')
+        return TaskManager(storage=SQLiteTaskStorage(path))
+    return TaskManager()
+
+
+def populated_manager(entries) -> TaskManager:
+    manager = new_manager()
+    manager.add_tasks_bulk(entries)
+    return manager
+
+
+def timed(prepare, repeat: int) -> float:
+    """Median wall time of `repeat` runs; prepare() does the untimed setup and returns the callable to time"""
+    samples = []
+    for _ in range(repeat):
+        run = prepare()
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+# ----------------------------------------------------------------- cases
+
+def case_add(entries, repeat):
+    deadline = (date.today() + timedelta(days=30)).strftime('%Y-%m-%d')
+    count = min(len(entries), 10000)
+
+    def prepare():
+        manager = new_manager()
+        return lambda: [manager.add_task(entries[i][0], deadline, entries[i][2], entries[i][3], entries[i][4])
+                        for i in range(count)]
+    return timed(prepare, repeat), count
+
+
+def case_bulk_add(entries, repeat):
+    def prepare():
+        manager = new_manager()
+        return lambda: manager.add_tasks_bulk(entries)
+    return timed(prepare, repeat), len(entries)
+
+
+def case_complete(entries, repeat):
+    count = min(len(entries), 5000)
+
+    def prepare():
+        manager = populated_manager(entries)
+        picks = random.Random(3).sample(manager.storage.all(), count)
+        return lambda: [manager.complete_task(task.id, task.creator_id) for task in picks]
+    return timed(prepare, repeat), count
+
+
+def case_list(entries, repeat):
+    manager = populated_manager(entries)
+    today = date.today()
+    return timed(lambda: lambda: paginate_tasks(manager.get_all_tasks().values(), today), repeat), len(entries)
+
+
+def case_reminder_select(entries, repeat):
+    manager = populated_manager(entries)
+    today = date.today()
+    return timed(lambda: lambda: manager.get_tasks_for_reminder(today), repeat), 1
+
+
+def case_cleanup(entries, repeat):
+    def prepare():
+        manager = populated_manager(entries)
+        return lambda: manager.cleanup_overdue_tasks(30)
+    return timed(prepare, repeat), 1
+
+
+def case_reminders_e2e(entries, repeat, delivery='channel'):
+    def prepare():
+        bot = FakeBot()
+        guild = FakeGuild(GUILD_ID)
+        bot.add_channel(FakeChannel(CHANNEL_ID, guild, name='reminders'))
+        data_dir = tempfile.mkdtemp(dir=WORK_DIR) if BACKEND == 'sqlite' else ''
+        store = TaskStore(data_dir=data_dir, backend=BACKEND)
+        partition = store.get(GUILD_ID)
+        partition.settings = PartitionSettings(reminder_channel_id=CHANNEL_ID, reminder_delivery=delivery)
+        partition.tasks.add_tasks_bulk(entries)
+        scheduler = ReminderScheduler(bot, store)
+
+        def send():
+            # The scheduler logs every run; keep the benchmark output readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                asyncio.run(scheduler.send_daily_reminders())
+        return send
+    return timed(prepare, repeat), 1
+
+
+def case_reminders_dm(entries, repeat):
+    # One DM digest per task creator, fanned out by the scheduler's workers
+    return case_reminders_e2e(entries, repeat, delivery='dm')
+
+
+CASES = {
+    'add': case_add,
+    'bulk_add': case_bulk_add,
+    'complete': case_complete,
+    'list': case_list,
+    'reminder_select': case_reminder_select,
+    'cleanup': case_cleanup,
+    'reminders_e2e': case_reminders_e2e,
+    'reminders_dm': case_reminders_dm,
+}
+
+
+# ------------------------------------------------------------- reporting
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(THRESHOLDS_PATH)).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(sizes, distributions, users, repeat, cases):
+    results = {}
+    for size in sizes:
+        for distribution in distributions:
+            entries = population(size, distribution, users)
+            for name in cases:
+                seconds, ops = CASES[name](entries, repeat)
+                key = f"{name}/{size}/{distribution}"
+                results[key] = {'seconds': seconds, 'ops': ops, 'us_per_op': seconds / ops * 1e6}
+                print(f"   {key:<36} {seconds * 1000:10.2f} ms  ({seconds / ops * 1e6:9.2f} µs/op)")
+    return results
+
+
+def compare(results: dict, baseline: dict, thresholds: dict) -> list:
+    """Cases slower than the baseline by more than their allowed ratio (ignoring tiny absolute changes)"""
+    regressions = []
+    floor = thresholds.get('min_seconds', 0.002)
+    for key, result in results.items():
+        old = baseline.get('results', {}).get(key)
+        if old is None:
+            continue
+        allowed = thresholds.get('default', 0.25)
+        for pattern, value in thresholds.get('cases', {}).items():
+            if fnmatch.fnmatch(key, pattern):
+                allowed = value
+        new_seconds, old_seconds = result['seconds'], old['seconds']
+        if new_seconds > old_seconds * (1 + allowed) and new_seconds - old_seconds > floor:
+            regressions.append((key, old_seconds, new_seconds, allowed))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--distributions', nargs='+', choices=sorted(DISTRIBUTIONS), default=sorted(DISTRIBUTIONS))
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--backend', choices=('memory', 'sqlite'), default='memory')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('-o', '--output', help="Write results as JSON")
+    parser.add_argument('--baseline', help="Results JSON to compare against; exits 1 on regression")
+    parser.add_argument('--thresholds', default=THRESHOLDS_PATH, help="Allowed slowdown per case (JSON)")
+    args = parser.parse_args(argv)
+
+    global BACKEND, WORK_DIR
+    BACKEND = args.backend
+    print(f"📊 Benchmark suite ({args.backend}): sizes {args.sizes}, {args.users} users, median of {args.repeat}")
+    with tempfile.TemporaryDirectory(prefix='taskpilot-bench-') as WORK_DIR:
+        results = run(args.sizes, args.distributions, args.users, args.repeat, args.cases)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': int(time.time()),
+            'backend': args.backend,
+            'users': args.users,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"💾 Results written to {args.output}")
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    thresholds = {}
+    if os.path.exists(args.thresholds):
+        with open(args.thresholds, 'r', encoding='utf-8') as f:
+            thresholds = json.load(f)
+
+    regressions = compare(results, baseline, thresholds)
+    if not regressions:
+        print(f"✅ No regressions against {baseline['meta'].get('commit') or args.baseline}")
+        return 0
+    for key, old_seconds, new_seconds, allowed in regressions:
+        print(f"❌ {key}: {old_seconds * 1000:.2f} ms -> {new_seconds * 1000:.2f} ms "
+              f"(+{new_seconds / old_seconds - 1:.0%}, allowed +{allowed:.0%})")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
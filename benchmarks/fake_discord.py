@@ -0,0 +1,84 @@
+"""
+In-process stand-ins for the few discord.py objects the reminder path uses.
+
+FakeChannel records every send instead of talking to Discord, so reminder
+runs can be timed end to end without a network or a bot token.
+"""
+import asyncio
+from typing import Dict, List, Optional
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+
+
+class FakeMessage:
+    def __init__(self, channel: 'FakeChannel', content: Optional[str], kwargs: dict):
+        self.channel = channel
+        self.content = content
+        self.embed = kwargs.get('embed')
+        self.kwargs = kwargs
+
+
+class FakeChannel:
+    """Text channel that records sends; `send_delay` simulates API round trips"""
+
+    def __init__(self, channel_id: int, guild: Optional[FakeGuild] = None, name: str = 'general',
+                 send_delay: float = 0.0):
+        self.id = channel_id
+        self.guild = guild
+        self.name = name
+        self.send_delay = send_delay
+        self.sent: List[FakeMessage] = []
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        message = FakeMessage(self, content, kwargs)
+        self.sent.append(message)
+        return message
+
+
+class FakeUser:
+    """User that accepts DMs like a channel does"""
+
+    def __init__(self, user_id: int, send_delay: float = 0.0):
+        self.id = user_id
+        self.mention = f"<@{user_id}>"
+        self.dm = FakeChannel(user_id, name=f'dm-{user_id}', send_delay=send_delay)
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        return await self.dm.send(content, **kwargs)
+
+
+class FakeBot:
+    """Just enough of commands.Bot for ReminderScheduler"""
+
+    def __init__(self):
+        self.channels: Dict[int, FakeChannel] = {}
+        self.users: Dict[int, FakeUser] = {}
+        self.latency = 0.05
+
+    def add_channel(self, channel: FakeChannel) -> FakeChannel:
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.channels.get(channel_id)
+
+    def get_user(self, user_id: int) -> Optional[FakeUser]:
+        return self.users.get(user_id)
+
+    async def fetch_user(self, user_id: int) -> FakeUser:
+        user = self.users.get(user_id)
+        if user is None:
+            user = self.users[user_id] = FakeUser(user_id)
+        return user
+
+    @property
+    def sent(self) -> List[FakeMessage]:
+        """Every message sent to any channel or user, in no particular order"""
+        messages = [message for channel in self.channels.values() for message in channel.sent]
+        messages.extend(message for user in self.users.values() for message in user.dm.sent)
+        return messages
@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+from typing import Optional
+from discord import app_commands
+
+
+def tree_fingerprint(tree: app_commands.CommandTree) -> str:
+    """Hash of the global command payload that tree.sync() would upload"""
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands()),
+                     key=lambda command: (command.get('type', 1), command['name']))
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class CommandSyncer:
+    """
+    Syncs global slash commands only when they changed.
+
+    Discord rate-limits the bulk overwrite behind tree.sync(), and on_ready
+    fires again after every reconnect. The fingerprint of the last successful
+    sync is remembered per application, in memory and (when a state path is
+    given) on disk, so restarts with unchanged commands skip the call too.
+    Delete the state file to force a sync.
+    """
+
+    def __init__(self, tree: app_commands.CommandTree, state_path: str = ''):
+        self.tree = tree
+        self.state_path = state_path
+        self._synced: Optional[str] = self._load()
+
+    def _load(self) -> Optional[str]:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def _save(self, state: str):
+        self._synced = state
+        if not self.state_path:
+            return
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(state)
+        os.replace(tmp_path, self.state_path)
+
+    async def sync(self, application_id: Optional[int]) -> Optional[int]:
+        """
+        Sync if the tree differs from the last sync for this application
+        Returns: number of commands synced, or None when the sync was skipped
+        """
+        state = f"{application_id}:{tree_fingerprint(self.tree)}"
+        if state == self._synced:
+            return None
+        synced = await self.tree.sync()
+        self._save(state)
+        return len(synced)
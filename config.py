@@ -1,4 +1,5 @@
 import os
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 class Config:
     """Configuration settings for the Discord Task Bot"""
@@ -9,13 +10,60 @@ class Config:
     # Reminder settings
     REMINDER_HOUR = int(os.getenv('REMINDER_HOUR', '9'))  # 9 AM by default
     REMINDER_MINUTE = int(os.getenv('REMINDER_MINUTE', '0'))  # 0 minutes by default
+    REMINDER_TIMEZONE = os.getenv('REMINDER_TIMEZONE', 'UTC')  # IANA name, e.g. Europe/Berlin
     
-    # Default reminder channel ID (can be overridden with !setchannel command)
+    # Default reminder channel ID (each guild can override it with !setchannel)
     REMINDER_CHANNEL_ID = int(os.getenv('REMINDER_CHANNEL_ID', '0'))
     
+    # Reminder delivery: 'channel' (one shared digest) or 'dm' (one digest per user, channel as fallback)
+    REMINDER_DELIVERY = os.getenv('REMINDER_DELIVERY', 'channel').lower()
+    REMINDER_DM_CONCURRENCY = int(os.getenv('REMINDER_DM_CONCURRENCY', '50'))  # Digests in flight at once
+    
     # Task cleanup settings
     OVERDUE_CLEANUP_DAYS = int(os.getenv('OVERDUE_CLEANUP_DAYS', '30'))  # Remove tasks overdue by 30+ days
     
+    # Persistence settings (leave TASKPILOT_DATA_DIR unset to keep tasks in memory only)
+    DATA_DIR = os.getenv('TASKPILOT_DATA_DIR', '')
+    JOURNAL_COMMIT_DELAY_MS = int(os.getenv('JOURNAL_COMMIT_DELAY_MS', '20'))  # Group commit window
+    SNAPSHOT_EVERY = int(os.getenv('SNAPSHOT_EVERY', '5000'))  # Journal records between snapshots
+    
+    # Storage backend: 'memory' (dict + journal) or 'sqlite' (one WAL database per partition, needs TASKPILOT_DATA_DIR)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'memory').lower()
+    STORAGE_WORKERS = int(os.getenv('STORAGE_WORKERS', '4'))  # Threads running blocking storage calls
+    
+    # Partitioning settings (tasks are always split per guild; optionally per channel too)
+    PARTITION_BY_CHANNEL = os.getenv('PARTITION_BY_CHANNEL', 'false').lower() == 'true'
+    
+    # Sharding settings (SHARD_COUNT=0 runs one unsharded process)
+    SHARD_COUNT = int(os.getenv('SHARD_COUNT', '0'))  # Total shards across all processes
+    SHARD_IDS = os.getenv('SHARD_IDS', '')  # Shards run by this process, e.g. "0-3" (default: all)
+    SHARD_LEASE_TTL = float(os.getenv('SHARD_LEASE_TTL', '30'))  # Seconds a shard lease lasts without renewal
+    COORDINATOR_PATH = os.getenv('COORDINATOR_PATH', '')  # Shared SQLite file for leases and IDs (default: in TASKPILOT_DATA_DIR)
+    
+    # Outbound message settings (Discord allows roughly 5 messages per 5 seconds per channel)
+    OUTBOUND_CONCURRENCY = int(os.getenv('OUTBOUND_CONCURRENCY', '8'))  # Parallel sends across channels
+    OUTBOUND_ROUTE_RATE = float(os.getenv('OUTBOUND_ROUTE_RATE', '1.0'))  # Messages per second per channel
+    OUTBOUND_ROUTE_BURST = float(os.getenv('OUTBOUND_ROUTE_BURST', '5'))  # Burst allowance per channel
+    
+    # Command tracing settings (spans are always recorded; profiling is sampled)
+    TRACE_SLOW_MS = float(os.getenv('TRACE_SLOW_MS', '1000'))  # Log commands slower than this
+    TRACE_PROFILE_RATE = float(os.getenv('TRACE_PROFILE_RATE', '0'))  # Share of commands run under cProfile (0-1)
+    TRACE_TRACEMALLOC_RATE = float(os.getenv('TRACE_TRACEMALLOC_RATE', '0'))  # Share of commands run under tracemalloc (0-1)
+    TRACE_PROFILE_DIR = os.getenv('TRACE_PROFILE_DIR', '')  # Where slow sampled profiles go (default: profiles dir in TASKPILOT_DATA_DIR or the temp dir)
+    TRACE_PROFILE_KEEP = int(os.getenv('TRACE_PROFILE_KEEP', '50'))  # Newest profile files to keep
+    
+    # Deferred slash commands (lists, imports, exports, stats, test reminders) run on a bounded pool
+    DEFERRED_WORKERS = int(os.getenv('DEFERRED_WORKERS', '4'))  # Heavy commands running at once
+    DEFERRED_QUEUE = int(os.getenv('DEFERRED_QUEUE', '32'))  # Heavy commands waiting; more are told to retry
+    DEFERRED_TIMEOUT = float(os.getenv('DEFERRED_TIMEOUT', '600'))  # Seconds before a heavy command gives up (Discord allows 15 minutes)
+    
+    # Bulk import settings
+    IMPORT_MAX_BYTES = int(os.getenv('IMPORT_MAX_BYTES', str(10 * 1024 * 1024)))  # Largest accepted upload
+    
+    # Health/metrics web server settings
+    PORT = int(os.getenv('PORT', '8080'))  # Render and most hosts pass the port to bind in PORT
+    HEALTH_MAX_LOOP_LAG = float(os.getenv('HEALTH_MAX_LOOP_LAG', '5'))  # Seconds of event loop lag before /health fails
+    
     # Bot settings
     COMMAND_PREFIX = '!'
     
@@ -31,4 +79,54 @@ class Config:
         if cls.REMINDER_MINUTE < 0 or cls.REMINDER_MINUTE > 59:
             raise ValueError("REMINDER_MINUTE must be between 0 and 59")
         
+        try:
+            ZoneInfo(cls.REMINDER_TIMEZONE)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"REMINDER_TIMEZONE '{cls.REMINDER_TIMEZONE}' is not a known timezone")
+        
+        if cls.REMINDER_DELIVERY not in ('channel', 'dm'):
+            raise ValueError("REMINDER_DELIVERY must be 'channel' or 'dm'")
+        
+        if cls.REMINDER_DM_CONCURRENCY < 1:
+            raise ValueError("REMINDER_DM_CONCURRENCY must be at least 1")
+        
+        if cls.OUTBOUND_CONCURRENCY < 1:
+            raise ValueError("OUTBOUND_CONCURRENCY must be at least 1")
+        
+        if cls.OUTBOUND_ROUTE_RATE <= 0 or cls.OUTBOUND_ROUTE_BURST < 1:
+            raise ValueError("OUTBOUND_ROUTE_RATE must be positive and OUTBOUND_ROUTE_BURST at least 1")
+        
+        if not (0 <= cls.TRACE_PROFILE_RATE <= 1 and 0 <= cls.TRACE_TRACEMALLOC_RATE <= 1):
+            raise ValueError("TRACE_PROFILE_RATE and TRACE_TRACEMALLOC_RATE must be between 0 and 1")
+        
+        if cls.TRACE_SLOW_MS < 0 or cls.TRACE_PROFILE_KEEP < 1:
+            raise ValueError("TRACE_SLOW_MS cannot be negative and TRACE_PROFILE_KEEP must be at least 1")
+        
+        if cls.DEFERRED_WORKERS < 1 or cls.DEFERRED_QUEUE < 0:
+            raise ValueError("DEFERRED_WORKERS must be at least 1 and DEFERRED_QUEUE cannot be negative")
+        
+        if not 0 < cls.DEFERRED_TIMEOUT < 900:
+            raise ValueError("DEFERRED_TIMEOUT must be between 0 and 900 seconds (Discord's followup window)")
+        
+        if cls.JOURNAL_COMMIT_DELAY_MS < 0:
+            raise ValueError("JOURNAL_COMMIT_DELAY_MS cannot be negative")
+        
+        if cls.STORAGE_BACKEND not in ('memory', 'sqlite'):
+            raise ValueError("STORAGE_BACKEND must be 'memory' or 'sqlite'")
+        
+        if cls.STORAGE_BACKEND == 'sqlite' and not cls.DATA_DIR:
+            raise ValueError("STORAGE_BACKEND=sqlite needs TASKPILOT_DATA_DIR for the database files")
+        
+        if cls.STORAGE_WORKERS < 1:
+            raise ValueError("STORAGE_WORKERS must be at least 1")
+        
+        if cls.SHARD_COUNT < 0:
+            raise ValueError("SHARD_COUNT cannot be negative")
+        
+        if cls.SHARD_COUNT and cls.SHARD_LEASE_TTL < 3:
+            raise ValueError("SHARD_LEASE_TTL must be at least 3 seconds")
+        
+        if cls.SNAPSHOT_EVERY < 1:
+            raise ValueError("SNAPSHOT_EVERY must be at least 1")
+        
         return True
@@ -0,0 +1,59 @@
+import bisect
+from datetime import date
+from typing import Dict, Iterator, List
+
+
+class DeadlineIndex:
+    """
+    Deadline-ordered index of task IDs.
+
+    Tasks are grouped into per-day buckets keyed by the deadline's ordinal, and
+    the populated days are kept in a sorted list. Range queries bisect the day
+    list once and then walk only the matching buckets, so they cost
+    O(log n + matches) no matter how many long-horizon tasks are stored.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[int, Dict[int, None]] = {}
+        self._days: List[int] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, task_id: int, day: int):
+        """Index a task under its deadline day ordinal"""
+        bucket = self._buckets.get(day)
+        if bucket is None:
+            bucket = self._buckets[day] = {}
+            bisect.insort(self._days, day)
+        if task_id not in bucket:
+            bucket[task_id] = None
+            self._size += 1
+
+    def remove(self, task_id: int, day: int):
+        """Drop a task from the index (no-op if it is not indexed)"""
+        bucket = self._buckets.get(day)
+        if bucket is None or task_id not in bucket:
+            return
+        del bucket[task_id]
+        self._size -= 1
+        if not bucket:
+            del self._buckets[day]
+            del self._days[bisect.bisect_left(self._days, day)]
+
+    def due_on_or_before(self, day: date) -> Iterator[int]:
+        """Yield IDs of tasks with deadline <= day, earliest first"""
+        return self._up_to(bisect.bisect_right(self._days, day.toordinal()))
+
+    def due_before(self, day: date) -> Iterator[int]:
+        """Yield IDs of tasks with deadline < day, earliest first"""
+        return self._up_to(bisect.bisect_left(self._days, day.toordinal()))
+
+    def due_on(self, day: date) -> Iterator[int]:
+        """Yield IDs of tasks due exactly on day"""
+        return iter(self._buckets.get(day.toordinal(), ()))
+
+    def _up_to(self, end: int) -> Iterator[int]:
+        for day in self._days[:end]:
+            yield from self._buckets[day]
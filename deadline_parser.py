@@ -0,0 +1,155 @@
+import re
+from datetime import date
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+FORMAT_HELP = ("Use YYYY-MM-DD (optionally with a time, e.g. 2025-07-30 17:00), or something like "
+               "'tomorrow 5pm', 'friday', 'next monday 09:30', 'in 3 days' or '+2w'.")
+
+# ISO dates and date-times ("2025-07-30", "2025-07-30 17:00", "2025-07-30T17:00:00") skip the general parser
+_ISO = re.compile(r'(\d{4})-(\d{2})-(\d{2})(?:[Tt ](\d{1,2}):(\d{2})(?::\d{2})?)?')
+
+_WEEKDAYS = {
+    'monday': 0, 'mon': 0, 'tuesday': 1, 'tue': 1, 'tues': 1, 'wednesday': 2, 'wed': 2,
+    'thursday': 3, 'thu': 3, 'thur': 3, 'thurs': 3, 'friday': 4, 'fri': 4,
+    'saturday': 5, 'sat': 5, 'sunday': 6, 'sun': 6,
+}
+_RELATIVE_DAYS = {'today': 0, 'tonight': 0, 'tomorrow': 1, 'tmrw': 1, 'tmr': 1}
+_UNIT_DAYS = {'d': 1, 'day': 1, 'days': 1, 'w': 7, 'week': 7, 'weeks': 7}
+
+_OFFSET = re.compile(r'(?:\+|in\s+)(\d{1,4})\s*(d|days?|w|weeks?)')
+_WEEKDAY = re.compile(r'(next\s+)?([a-z]+)')
+_TIME = re.compile(r'(?:at\s+)?(?:(noon|midnight)|(\d{1,2})(?::(\d{2}))?\s*(am|pm)?)')
+
+
+class ParsedDeadline(NamedTuple):
+    """A deadline as a day ordinal plus an optional time of day (minutes after midnight, local time)"""
+    day: int
+    minute: Optional[int] = None
+
+    def format(self) -> str:
+        return format_deadline(self.day, self.minute)
+
+
+def format_deadline(day: int, minute: Optional[int] = None) -> str:
+    """Canonical text for a deadline, which parse_deadline reads back on its fast path"""
+    text = date.fromordinal(day).isoformat()
+    if minute is not None:
+        text += ' ' + format_time(minute)
+    return text
+
+
+def format_time(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def parse_deadline(text: str, today: date) -> ParsedDeadline:
+    """
+    Parse a deadline relative to `today` (the user's local date).
+
+    Accepts ISO dates and date-times, "today"/"tomorrow", weekday names
+    ("friday" is the coming Friday, today included; "next friday" is always
+    after today), offsets ("+3d", "in 2 weeks"), each optionally followed by
+    a time ("17:00", "5pm", "5:30pm", "noon"), or a time alone for today.
+    Raises ValueError for anything else.
+    """
+    return _parse(' '.join(text.lower().split()), today.toordinal())
+
+
+@lru_cache(maxsize=4096)
+def _parse(text: str, today: int) -> ParsedDeadline:
+    # `today` is part of the cache key, so relative expressions never go stale across midnight
+    match = _ISO.fullmatch(text)
+    if match:
+        year, month, day_of_month, hour, minute = match.groups()
+        try:
+            day = date(int(year), int(month), int(day_of_month)).toordinal()
+        except ValueError:
+            raise ValueError(f"'{text}' is not a valid date.") from None
+        if hour is None:
+            return ParsedDeadline(day)
+        try:
+            return ParsedDeadline(day, _minute_of_day(int(hour), int(minute)))
+        except ValueError:
+            raise ValueError(f"'{text}' has an invalid time.") from None
+
+    day_part, time_part = _split(text)
+    day = _parse_day(day_part, today) if day_part else today
+    if day is None:
+        raise ValueError(f"Could not understand the deadline '{text}'. {FORMAT_HELP}")
+    if time_part is None:
+        return ParsedDeadline(day, 20 * 60 if day_part == 'tonight' else None)
+    return ParsedDeadline(day, _parse_time(time_part, text))
+
+
+def _split(text: str):
+    """Split into (day expression, time expression); a time may come first or last"""
+    if _TIME.fullmatch(text):
+        # A bare number is more likely a typo than an hour
+        return (text, None) if text.isdigit() else ('', text)
+    for separator in (' at ', ' '):
+        head, _, tail = text.rpartition(separator)
+        if head and _TIME.fullmatch(tail) and not _TIME.fullmatch(head):
+            return head, tail
+        head, _, tail = text.partition(separator)
+        if tail and _TIME.fullmatch(head) and not _TIME.fullmatch(tail):
+            return tail, head
+    return text, None
+
+
+def _parse_day(text: str, today: int) -> Optional[int]:
+    if text in _RELATIVE_DAYS:
+        return today + _RELATIVE_DAYS[text]
+
+    match = _ISO.fullmatch(text)
+    if match and match.group(4) is None:
+        try:
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3))).toordinal()
+        except ValueError:
+            return None
+
+    match = _OFFSET.fullmatch(text)
+    if match:
+        return today + int(match.group(1)) * _UNIT_DAYS[match.group(2)]
+
+    match = _WEEKDAY.fullmatch(text)
+    if match and match.group(2) in _WEEKDAYS:
+        # date.fromordinal(1) is a Monday, so (ordinal - 1) % 7 is the weekday
+        ahead = (_WEEKDAYS[match.group(2)] - (today - 1) % 7) % 7
+        if match.group(1) and ahead == 0:
+            ahead = 7
+        return today + ahead
+    return None
+
+
+def _parse_time(text: str, original: str) -> int:
+    match = _TIME.fullmatch(text)
+    named, hour, minute, meridiem = match.groups()
+    if named:
+        return 12 * 60 if named == 'noon' else 0
+    hour, minute = int(hour), int(minute or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"'{original}' has an invalid time.")
+        hour = hour % 12 + (12 if meridiem == 'pm' else 0)
+    try:
+        return _minute_of_day(hour, minute)
+    except ValueError:
+        raise ValueError(f"'{original}' has an invalid time.") from None
+
+
+def _minute_of_day(hour: int, minute: int) -> int:
+    if hour > 23 or minute > 59:
+        raise ValueError("Invalid time of day")
+    return hour * 60 + minute
+
+
+def is_past(deadline: ParsedDeadline, today: date, now_minute: int) -> bool:
+    """True if the deadline is before today, or earlier today than now_minute"""
+    if deadline.day != today.toordinal():
+        return deadline.day < today.toordinal()
+    return deadline.minute is not None and deadline.minute < now_minute
+
+
+def cache_info():
+    return _parse.cache_info()
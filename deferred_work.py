@@ -0,0 +1,123 @@
+import asyncio
+from typing import Awaitable, Callable, Optional, Set
+import discord
+from config import Config
+from outbound import OutboundDispatcher
+import metrics
+import tracing
+
+BUSY_MESSAGE = "⏳ The bot is busy right now. Please try again in a few seconds."
+
+# What a job returns: keyword arguments for the followup (content, embed, view, file, ...)
+Work = Callable[[], Awaitable[dict]]
+
+
+class DeferredWorkPool:
+    """
+    Runs the heavy part of slash commands after deferring the interaction.
+
+    Discord drops an interaction that is not answered within 3 seconds, so
+    submit() defers it right away (the user sees "thinking...") and runs the
+    work once one of `workers` slots is free; the result goes out as a
+    followup, which Discord accepts for 15 minutes. At most
+    `workers + queue_size` jobs are admitted at a time. Beyond that submit()
+    answers with a busy message instead of deferring, so a burst turns into
+    quick refusals rather than a backlog of interactions that would expire
+    before their turn.
+    """
+
+    def __init__(self, outbound: OutboundDispatcher, workers: int = 4, queue_size: int = 32,
+                 timeout: float = 600.0, on_finish: Optional[Callable[[discord.Interaction, str], None]] = None):
+        self.outbound = outbound
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.on_finish = on_finish
+        self.pending = 0   # Admitted jobs, running or waiting for a slot
+        self.running = 0
+        self.rejected = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._jobs: Set[asyncio.Task] = set()
+
+    @classmethod
+    def from_config(cls, outbound: OutboundDispatcher, on_finish=None) -> 'DeferredWorkPool':
+        return cls(
+            outbound,
+            workers=Config.DEFERRED_WORKERS,
+            queue_size=Config.DEFERRED_QUEUE,
+            timeout=Config.DEFERRED_TIMEOUT,
+            on_finish=on_finish
+        )
+
+    @property
+    def saturated(self) -> bool:
+        return self.pending >= self.workers + self.queue_size
+
+    async def submit(self, interaction: discord.Interaction, work: Work, *, ephemeral: bool = False,
+                     error_message: str = "Something went wrong") -> bool:
+        """
+        Defer the interaction and run `work` in the background; its result is sent as a followup.
+        Returns: False if the pool was full and the user was asked to retry
+        """
+        command = interaction.command.qualified_name if interaction.command is not None else 'unknown'
+        if self.saturated:
+            self.rejected += 1
+            metrics.DEFERRED_REJECTED.inc(command)
+            await self.outbound.respond(interaction, BUSY_MESSAGE, ephemeral=True)
+            return False
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        self.pending += 1
+        try:
+            await self.outbound.defer(interaction, ephemeral=ephemeral)
+        except BaseException:
+            self.pending -= 1
+            raise
+        # The command's trace stays open until the job is done (see main.observe_app_command)
+        interaction.extras['deferred'] = True
+
+        # The job task copies this context, so its spans land in the command's trace
+        job = asyncio.create_task(self._run(interaction, work, error_message), name=f'deferred-{command}')
+        self._jobs.add(job)
+        job.add_done_callback(self._jobs.discard)
+        return True
+
+    async def _run(self, interaction: discord.Interaction, work: Work, error_message: str):
+        status = 'ok'
+        try:
+            with tracing.span('queue'):
+                await self._slots.acquire()
+            self.running += 1
+            try:
+                result = await asyncio.wait_for(work(), self.timeout)
+            finally:
+                self.running -= 1
+                self._slots.release()
+            await self.outbound.respond(interaction, **result)
+        except Exception as e:
+            status = 'error'
+            if isinstance(e, asyncio.TimeoutError):
+                message = f"❌ {error_message}: this took longer than {self.timeout:.0f} seconds."
+            else:
+                message = f"❌ {error_message}: {str(e)}"
+            try:
+                await self.outbound.respond(interaction, message, ephemeral=True)
+            except Exception as send_error:
+                print(f"❌ Could not report a failed deferred command: {send_error}")
+        finally:
+            self.pending -= 1
+            if self.on_finish is not None:
+                self.on_finish(interaction, status)
+
+    def stats(self) -> dict:
+        return {
+            'running': self.running,
+            'queued': self.pending - self.running,
+            'rejected': self.rejected,
+        }
+
+    async def close(self):
+        """Wait for admitted jobs so their followups are not lost on shutdown"""
+        if self._jobs:
+            await asyncio.gather(*self._jobs, return_exceptions=True)
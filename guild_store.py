@@ -0,0 +1,306 @@
+import asyncio
+import functools
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from task_manager import TaskManager
+from task_archive import TaskArchive
+from task_journal import TaskJournal
+from task_storage import MemoryTaskStorage, SQLiteTaskStorage
+from shard_coordinator import IdBlockAllocator, ShardCoordinator, shard_for_guild
+from config import Config
+import tracing
+
+PartitionKey = Tuple[int, int]
+
+_PARTITION_DIR = re.compile(r'^guild-(\d+)(?:-channel-(\d+))?$')
+
+
+class PartitionSettings:
+    """Per-partition settings that used to live on Config as globals"""
+
+    def __init__(self, reminder_channel_id: int = 0, reminder_hour: Optional[int] = None,
+                 reminder_minute: Optional[int] = None, timezone: Optional[str] = None,
+                 user_timezones: Optional[Dict[int, str]] = None, reminder_delivery: Optional[str] = None):
+        self.reminder_channel_id = reminder_channel_id
+        self.reminder_hour = reminder_hour
+        self.reminder_minute = reminder_minute
+        self.timezone = timezone
+        self.user_timezones = user_timezones or {}
+        self.reminder_delivery = reminder_delivery
+
+    def to_dict(self) -> dict:
+        return {
+            'reminder_channel_id': self.reminder_channel_id,
+            'reminder_hour': self.reminder_hour,
+            'reminder_minute': self.reminder_minute,
+            'timezone': self.timezone,
+            'user_timezones': {str(user_id): tz_name for user_id, tz_name in self.user_timezones.items()},
+            'reminder_delivery': self.reminder_delivery
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PartitionSettings':
+        return cls(
+            reminder_channel_id=data.get('reminder_channel_id', 0),
+            reminder_hour=data.get('reminder_hour'),
+            reminder_minute=data.get('reminder_minute'),
+            timezone=data.get('timezone'),
+            user_timezones={int(user_id): tz_name for user_id, tz_name in data.get('user_timezones', {}).items()},
+            reminder_delivery=data.get('reminder_delivery')
+        )
+
+    @classmethod
+    def load(cls, partition_dir: str) -> 'PartitionSettings':
+        """Settings saved in a partition directory, or the defaults"""
+        settings_path = os.path.join(partition_dir, 'settings.json') if partition_dir else ''
+        if not settings_path or not os.path.exists(settings_path):
+            return cls()
+        with open(settings_path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+# Shared by every partition whose storage backend blocks on disk I/O
+_storage_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _storage_executor
+    if _storage_executor is None:
+        _storage_executor = ThreadPoolExecutor(max_workers=Config.STORAGE_WORKERS, thread_name_prefix='storage')
+    return _storage_executor
+
+
+class TaskPartition:
+    """One guild's (or one guild channel's) tasks, settings and lock"""
+
+    def __init__(self, key: PartitionKey, settings: PartitionSettings, data_dir: str = '',
+                 commit_delay: float = 0.02, snapshot_every: int = 5000, backend: str = 'memory',
+                 coordinator: Optional[ShardCoordinator] = None, read_only: bool = False):
+        self.key = key
+        self.guild_id, self.channel_id = key
+        self.settings = settings
+        self.lock = asyncio.Lock()
+        self.data_dir = data_dir
+        self._commit_delay = commit_delay
+        self._snapshot_every = snapshot_every
+        self.backend = backend
+        self.coordinator = coordinator
+        self.read_only = read_only
+        self._tasks: Optional[TaskManager] = None
+
+    @property
+    def tasks(self) -> TaskManager:
+        """The partition's TaskManager, opened (or replayed from disk) on first use"""
+        if self._tasks is None:
+            # A read-only partition keeps its stats in memory so it never checkpoints the bot's archive
+            archive = TaskArchive('' if self.read_only else self.data_dir)
+            if self.backend == 'sqlite' and self.data_dir:
+                self._tasks = TaskManager(storage=SQLiteTaskStorage(os.path.join(self.data_dir, 'tasks.sqlite3')),
+                                          archive=archive, local_timezone=self._timezone)
+            else:
+                journal = None
+                if self.data_dir:
+                    journal = TaskJournal(
+                        self.data_dir,
+                        commit_delay=self._commit_delay,
+                        snapshot_every=self._snapshot_every,
+                        read_only=self.read_only
+                    )
+                id_source = None
+                if self.coordinator is not None:
+                    # SQLite allocates IDs in its own transactions; the in-memory backend asks the coordinator
+                    id_source = IdBlockAllocator(self.coordinator, f'guild-{self.guild_id}-channel-{self.channel_id}')
+                self._tasks = TaskManager(journal=journal, storage=MemoryTaskStorage(id_source=id_source),
+                                          archive=archive, local_timezone=self._timezone)
+        return self._tasks
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """
+        Call a TaskManager operation, on the storage thread pool when the backend
+        does blocking I/O so the event loop stays responsive
+        """
+        with tracing.span('store:' + getattr(func, '__name__', 'call')):
+            if not self.tasks.storage.blocking:
+                return func(*args, **kwargs)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_executor(), functools.partial(func, *args, **kwargs))
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._tasks is not None
+
+    @property
+    def reminder_channel_id(self) -> int:
+        """Configured reminder channel, falling back to the partition's own channel or the global default"""
+        return self.settings.reminder_channel_id or self.channel_id or Config.REMINDER_CHANNEL_ID
+
+    @property
+    def reminder_time(self) -> Tuple[int, int, str]:
+        """(hour, minute, timezone) of the daily reminder, falling back to Config defaults"""
+        hour = self.settings.reminder_hour
+        minute = self.settings.reminder_minute
+        return (
+            Config.REMINDER_HOUR if hour is None else hour,
+            Config.REMINDER_MINUTE if minute is None else minute,
+            self.settings.timezone or Config.REMINDER_TIMEZONE
+        )
+
+    def _timezone(self) -> str:
+        return self.reminder_time[2]
+
+    @property
+    def reminder_delivery(self) -> str:
+        """'channel' for one shared digest or 'dm' for a digest per user, falling back to Config"""
+        return self.settings.reminder_delivery or Config.REMINDER_DELIVERY
+
+    def timezone_for(self, user_id: int) -> str:
+        """Timezone deadlines from this user are read in: their own setting, else the partition's"""
+        return self.settings.user_timezones.get(user_id) or self.reminder_time[2]
+
+    def save_settings(self):
+        """Persist settings next to the partition's journal (no-op when running in memory or read-only)"""
+        if not self.data_dir or self.read_only:
+            return
+        os.makedirs(self.data_dir, exist_ok=True)
+        path = os.path.join(self.data_dir, 'settings.json')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.settings.to_dict(), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    async def unload(self):
+        """
+        Drop the loaded tasks and re-read the settings, so the next use replays
+        the partition from disk. Used when another process may have written to
+        it (a shard lease was lost); nothing is checkpointed on the way out.
+        """
+        async with self.lock:
+            if self._tasks is not None:
+                tasks, self._tasks = self._tasks, None
+                await asyncio.to_thread(tasks.close, checkpoint=False)
+            self.settings = PartitionSettings.load(self.data_dir)
+
+    def close(self):
+        if self._tasks is not None:
+            self._tasks.close()
+
+
+class TaskStore:
+    """
+    Task storage partitioned by guild (and optionally by channel).
+
+    Every partition has its own TaskManager, ID space, settings and lock, so a
+    query for one guild only touches that guild's data. Partitions found on disk
+    are registered at startup, but their tasks are only replayed on first use.
+    A `read_only` store replays journals without writing to them, so it can read
+    the data directory while the bot is running.
+    """
+
+    def __init__(self, data_dir: str = '', partition_by_channel: bool = False,
+                 commit_delay: float = 0.02, snapshot_every: int = 5000, backend: str = 'memory',
+                 coordinator: Optional[ShardCoordinator] = None, read_only: bool = False):
+        self.data_dir = data_dir
+        self.partition_by_channel = partition_by_channel
+        self.commit_delay = commit_delay
+        self.snapshot_every = snapshot_every
+        self.backend = backend
+        self.coordinator = coordinator
+        self.read_only = read_only
+        # Set in sharded mode: whether this process currently owns a guild's shard
+        self.owner_check: Optional[Callable[[Optional[int]], bool]] = None
+        self._partitions: Dict[PartitionKey, TaskPartition] = {}
+        self.on_partition_created: Optional[Callable[[TaskPartition], None]] = None
+
+        if data_dir:
+            self._discover()
+
+    @classmethod
+    def from_config(cls, coordinator: Optional[ShardCoordinator] = None, read_only: bool = False) -> 'TaskStore':
+        return cls(
+            data_dir=Config.DATA_DIR,
+            partition_by_channel=Config.PARTITION_BY_CHANNEL,
+            commit_delay=Config.JOURNAL_COMMIT_DELAY_MS / 1000,
+            snapshot_every=Config.SNAPSHOT_EVERY,
+            backend=Config.STORAGE_BACKEND,
+            coordinator=coordinator,
+            read_only=read_only
+        )
+
+    def _discover(self):
+        """Register partitions that already have a directory under data_dir"""
+        for key in self._keys_on_disk():
+            self._partitions[key] = self._create(key)
+        if self._partitions:
+            print(f"📂 Found {len(self._partitions)} task partition(s) in {self.data_dir}")
+
+    def _keys_on_disk(self) -> List[PartitionKey]:
+        if not self.data_dir or not os.path.isdir(self.data_dir):
+            return []
+        keys = []
+        for name in os.listdir(self.data_dir):
+            match = _PARTITION_DIR.match(name)
+            if match:
+                keys.append((int(match.group(1)), int(match.group(2) or 0)))
+        return keys
+
+    def _create(self, key: PartitionKey) -> TaskPartition:
+        partition_dir = ''
+        if self.data_dir:
+            guild_id, channel_id = key
+            name = f'guild-{guild_id}' + (f'-channel-{channel_id}' if channel_id else '')
+            partition_dir = os.path.join(self.data_dir, name)
+        return TaskPartition(key, PartitionSettings.load(partition_dir), partition_dir, self.commit_delay, self.snapshot_every,
+                             self.backend, self.coordinator, self.read_only)
+
+    def key_for(self, guild_id: Optional[int], channel_id: Optional[int]) -> PartitionKey:
+        """Map a command's guild/channel to its partition key (DMs share guild 0)"""
+        if self.partition_by_channel:
+            return (guild_id or 0, channel_id or 0)
+        return (guild_id or 0, 0)
+
+    def get(self, guild_id: Optional[int], channel_id: Optional[int] = None) -> TaskPartition:
+        """Get (creating if needed) the partition for a guild/channel"""
+        key = self.key_for(guild_id, channel_id)
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._partitions[key] = self._create(key)
+            if self.on_partition_created is not None:
+                self.on_partition_created(partition)
+        return partition
+
+    def owns(self, guild_id: Optional[int]) -> bool:
+        """Whether this process is responsible for a guild (always true when not sharded)"""
+        return self.owner_check is None or self.owner_check(guild_id)
+
+    def partitions(self) -> Iterator[TaskPartition]:
+        return iter(list(self._partitions.values()))
+
+    def partitions_for_guild(self, guild_id: int) -> List[TaskPartition]:
+        return [p for p in self._partitions.values() if p.guild_id == guild_id]
+
+    async def reload_shard(self, shard_id: int, shard_count: int):
+        """
+        Forget what this process has loaded for one shard's guilds and pick up
+        partitions another process created for them meanwhile. Called by
+        ShardLeases when the shard's lease is lost and again before it is used
+        after being re-acquired, so stale tasks are never written back.
+        """
+        for partition in self.partitions():
+            if shard_for_guild(partition.guild_id, shard_count) == shard_id:
+                await partition.unload()
+                if self.on_partition_created is not None:
+                    self.on_partition_created(partition)
+        for key in self._keys_on_disk():
+            if key not in self._partitions and shard_for_guild(key[0], shard_count) == shard_id:
+                partition = self._partitions[key] = self._create(key)
+                if self.on_partition_created is not None:
+                    self.on_partition_created(partition)
+
+    def close(self):
+        for partition in self._partitions.values():
+            partition.close()
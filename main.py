@@ -1,286 +1,947 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import aiohttp
 import asyncio
+import math
 import os
-from task_manager import TaskManager
+import tempfile
+import time
+from typing import Literal
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from guild_store import TaskStore, TaskPartition
+from task_views import TaskListCache, open_task_list, stats_embed
+from outbound import OutboundDispatcher
+from task_io import MAX_LINE_BYTES, TaskImporter, detect_format, iter_export
+from task_selector import complete_selection
+from search_index import MAX_PREFIX_EXPANSION
 from reminder_scheduler import ReminderScheduler
 from config import Config
-from keep_alive import keep_alive
+from web_server import HealthServer
+from command_sync import CommandSyncer
+from deferred_work import DeferredWorkPool
+from shard_coordinator import MemoryCoordinator, SQLiteCoordinator, ShardLeases, parse_shard_ids
+from tracing import CommandTracer
+import metrics
+import tracing
 
 # Bot setup with intents
 intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
-task_manager = TaskManager()
+tracer = CommandTracer.from_config()
+
+SHARD_MOVED_MESSAGE = "⏳ This server's tasks are being handed over to another bot process. Please try again in a moment."
+
+class ShardMoved(commands.CheckFailure):
+    """A prefix command arrived for a guild whose shard lease this process no longer holds"""
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """Command tree that stamps each slash command invocation for latency metrics and tracing"""
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # After losing its shard lease this process must not touch the guild's tasks
+        if not task_store.owns(interaction.guild_id):
+            if interaction.type is discord.InteractionType.application_command:
+                await outbound.respond(interaction, SHARD_MOVED_MESSAGE, ephemeral=True)
+            return False
+        interaction.extras['started_at'] = time.perf_counter()
+        # Autocomplete requests pass through here too but never complete like a command
+        if interaction.type is discord.InteractionType.application_command and interaction.command is not None:
+            interaction.extras['trace'] = tracer.start(interaction.command.qualified_name, 'slash')
+        mark_first_command()
+        return True
+
+class TracedInvokeMixin:
+    """Opens the command trace before prefix command arguments are parsed, so parsing is part of it"""
+    
+    async def invoke(self, ctx):
+        if ctx.command is not None:
+            ctx.trace = tracer.start(ctx.command.qualified_name, 'prefix')
+        await super().invoke(ctx)
+
+class TaskBot(TracedInvokeMixin, commands.Bot):
+    pass
+
+class ShardedTaskBot(TracedInvokeMixin, commands.AutoShardedBot):
+    pass
+
+shard_leases = None
+if Config.SHARD_COUNT:
+    # Sharded mode: this process runs a range of shards and only serves the guilds on them
+    shard_ids = parse_shard_ids(Config.SHARD_IDS, Config.SHARD_COUNT)
+    coordinator_path = Config.COORDINATOR_PATH or (
+        os.path.join(Config.DATA_DIR, 'coordinator.sqlite3') if Config.DATA_DIR else '')
+    coordinator = SQLiteCoordinator(coordinator_path) if coordinator_path else MemoryCoordinator()
+    shard_leases = ShardLeases(coordinator, shard_ids, Config.SHARD_COUNT, ttl=Config.SHARD_LEASE_TTL)
+    bot = ShardedTaskBot(command_prefix='!', intents=intents, tree_cls=InstrumentedCommandTree,
+                         shard_count=Config.SHARD_COUNT, shard_ids=shard_ids)
+    task_store = TaskStore.from_config(coordinator)
+    task_store.owner_check = shard_leases.owns_guild
+else:
+    bot = TaskBot(command_prefix='!', intents=intents, tree_cls=InstrumentedCommandTree)
+    task_store = TaskStore.from_config()
+task_list_cache = TaskListCache()
+
+async def reload_shard(shard_id: int):
+    """Drop a shard's loaded tasks, and every cached list page, after its lease changed hands"""
+    await task_store.reload_shard(shard_id, Config.SHARD_COUNT)
+    task_list_cache.clear()
+
+if shard_leases is not None:
+    shard_leases.on_reload = reload_shard
+outbound = OutboundDispatcher.from_config()
+health_server = HealthServer(bot, port=Config.PORT, max_loop_lag=Config.HEALTH_MAX_LOOP_LAG)
+command_syncer = CommandSyncer(bot.tree, os.path.join(Config.DATA_DIR, 'command_tree.sha256') if Config.DATA_DIR else '')
 reminder_scheduler = None
 
+def finish_deferred(interaction: discord.Interaction, status: str):
+    """Close the trace of a deferred command once its followup went out"""
+    trace = interaction.extras.get('trace')
+    if trace is not None:
+        tracer.finish(trace, status)
+
+# Heavy slash commands answer with "thinking..." at once and finish on this pool
+deferred = DeferredWorkPool.from_config(outbound, on_finish=finish_deferred)
+
+def mark_first_command():
+    """Report time-to-first-command once per process"""
+    if metrics.mark_startup('first_command'):
+        print(f"⚡ First command received {metrics.uptime():.1f}s after start")
+
+def get_partition(source) -> TaskPartition:
+    """Resolve the task partition for a prefix command context or slash command interaction"""
+    if isinstance(source, discord.Interaction):
+        return task_store.get(source.guild_id, source.channel_id)
+    return task_store.get(source.guild.id if source.guild else None, source.channel.id)
+
+def sample_metrics():
+    """Refresh gauges from live state (runs on the event loop via metrics.run_sampler)"""
+    metrics.TASKS_ACTIVE.set(sum(p.tasks.get_task_count() for p in task_store.partitions() if p.is_loaded))
+    metrics.PARTITIONS.set(sum(1 for _ in task_store.partitions()))
+    if math.isfinite(bot.latency):
+        metrics.GATEWAY_LATENCY.set(bot.latency)
+    stats = outbound.stats()
+    for lane in ('interaction', 'command', 'bulk'):
+        metrics.OUTBOUND_QUEUED.set(stats[f'queued_{lane}'], lane)
+    metrics.OUTBOUND_IN_FLIGHT.set(stats['in_flight'])
+    deferred_stats = deferred.stats()
+    metrics.DEFERRED_JOBS.set(deferred_stats['running'], 'running')
+    metrics.DEFERRED_JOBS.set(deferred_stats['queued'], 'queued')
+
+metrics.REGISTRY.add_sampler(sample_metrics)
+
+@bot.check
+async def owns_guild(ctx) -> bool:
+    """Refuse prefix commands for guilds whose shard lease this process lost"""
+    if not task_store.owns(ctx.guild.id if ctx.guild else None):
+        raise ShardMoved(SHARD_MOVED_MESSAGE)
+    return True
+
+@bot.event
+async def setup_hook():
+    """One-time setup before connecting to Discord"""
+    asyncio.create_task(metrics.run_sampler())
+
+@bot.before_invoke
+async def before_command(ctx):
+    ctx.started_at = time.perf_counter()
+    # Arguments are parsed (and checks run) between invoke() and this hook
+    trace = getattr(ctx, 'trace', None)
+    if trace is not None:
+        trace.add_span('parse', ctx.started_at - trace.started_at)
+    mark_first_command()
+
+@bot.after_invoke
+async def after_command(ctx):
+    started_at = getattr(ctx, 'started_at', None)
+    status = 'error' if ctx.command_failed else 'ok'
+    if started_at is not None:
+        metrics.COMMAND_LATENCY.observe(time.perf_counter() - started_at, ctx.command.qualified_name, 'prefix', status)
+    finish_prefix_trace(ctx, status)
+
+def finish_prefix_trace(ctx, status: str):
+    trace = getattr(ctx, 'trace', None)
+    if trace is not None:
+        tracer.finish(trace, status)
+
+def observe_app_command(interaction: discord.Interaction, status: str):
+    started_at = interaction.extras.get('started_at')
+    if started_at is not None and interaction.command is not None:
+        metrics.COMMAND_LATENCY.observe(time.perf_counter() - started_at, interaction.command.qualified_name, 'slash', status)
+    trace = interaction.extras.get('trace')
+    # A deferred command is still working when its handler returns; the pool finishes the trace
+    if trace is not None and not (status == 'ok' and interaction.extras.get('deferred')):
+        tracer.finish(trace, status)
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    observe_app_command(interaction, 'ok')
+
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+    observe_app_command(interaction, 'error')
+    print(f"App command error: {error}")
+
 @bot.event
 async def on_ready():
-    """Event triggered when bot is ready"""
-    print(f'{bot.user} has connected to Discord!')
-    
-    # Sync slash commands
-    try:
-        synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} command(s)")
-    except Exception as e:
-        print(f"Failed to sync commands: {e}")
+    """Event triggered when bot is ready - again after every reconnect that starts a new session"""
+    metrics.GATEWAY_READY.inc()
+    if not metrics.mark_startup('ready'):
+        print(f'{bot.user} reconnected to Discord')
+        return
     
-    # Start the reminder scheduler
+    print(f'{bot.user} has connected to Discord! (ready {metrics.uptime():.1f}s after start)')
+    # Commands are answered from here on; the rest of startup runs in the background
+    asyncio.create_task(finish_startup())
+
+async def finish_startup():
+    """One-time startup work that commands do not need to wait for"""
+    # Start the reminder scheduler (exactly one per process)
     global reminder_scheduler
-    reminder_scheduler = ReminderScheduler(bot, task_manager)
-    asyncio.create_task(reminder_scheduler.start_daily_reminders())
+    if reminder_scheduler is None:
+        reminder_scheduler = ReminderScheduler(bot, task_store, outbound)
+        asyncio.create_task(reminder_scheduler.start_daily_reminders())
+    
+    # Sync slash commands when they changed (commands are global, so one process of a sharded deployment is enough)
+    if shard_leases is None or 0 in shard_leases.shard_ids:
+        try:
+            synced = await command_syncer.sync(bot.application_id)
+            if synced is None:
+                print("Slash commands unchanged since the last sync")
+            else:
+                print(f"Synced {synced} command(s)")
+        except Exception as e:
+            print(f"Failed to sync commands: {e}")
 
 @bot.tree.command(name="addtask", description="Add a new task with deadline")
 @app_commands.describe(
     task_name="The name/description of the task",
-    deadline="The deadline date in YYYY-MM-DD format (e.g., 2025-07-30)"
+    deadline="YYYY-MM-DD, optionally with a time (2025-07-30 17:00), or e.g. 'tomorrow 5pm', 'next friday', '+3d'",
+    repeat="Optional: daily, weekdays, weekly, monthly, every 2 weeks, cron 0 9 * * 1-5 (deadline is the first occurrence)"
 )
-async def add_task_slash(interaction: discord.Interaction, task_name: str, deadline: str):
+async def add_task_slash(interaction: discord.Interaction, task_name: str, deadline: str, repeat: str = None):
     """Add a new task with deadline using slash command"""
     try:
+        partition = get_partition(interaction)
+        task_manager = partition.tasks
         if not task_name.strip():
-            await interaction.response.send_message("❌ Task name cannot be empty.", ephemeral=True)
+            await outbound.respond(interaction, "❌ Task name cannot be empty.", ephemeral=True)
             return
         
-        success, message = task_manager.add_task(
+        success, message = await partition.run(
+            task_manager.add_task,
             task_name.strip(), 
             deadline.strip(), 
             interaction.user.id, 
             interaction.user.display_name,
-            interaction.channel_id
+            interaction.channel_id,
+            partition.timezone_for(interaction.user.id),
+            repeat
         )
         
         if success:
-            await interaction.response.send_message(f"✅ {message}")
+            await task_manager.wait_durable()
+            await outbound.respond(interaction, f"✅ {message}")
         else:
-            await interaction.response.send_message(f"❌ {message}", ephemeral=True)
+            await outbound.respond(interaction, f"❌ {message}", ephemeral=True)
             
     except Exception as e:
-        await interaction.response.send_message(f"❌ Error adding task: {str(e)}", ephemeral=True)
+        await outbound.respond(interaction, f"❌ Error adding task: {str(e)}", ephemeral=True)
 
 # Keep the old prefix command for backwards compatibility
 @bot.command(name='addtask')
 async def add_task(ctx, *, task_info):
     """
     Add a new task with deadline
-    Usage: !addtask Task description | YYYY-MM-DD
+    Usage: !addtask Task description | YYYY-MM-DD [HH:MM] (or e.g. tomorrow 5pm, next friday, +3d) [| repeat rule]
     """
     try:
+        partition = get_partition(ctx)
+        task_manager = partition.tasks
         if '|' not in task_info:
-            await ctx.send("❌ Invalid format. Use: `!addtask Task description | YYYY-MM-DD` or use the slash command `/addtask`")
+            await outbound.send(ctx, "❌ Invalid format. Use: `!addtask Task description | YYYY-MM-DD` (or e.g. `tomorrow 5pm`) or use the slash command `/addtask`")
             return
         
-        task_description, deadline_str = task_info.split('|', 1)
+        task_description, deadline_str, *repeat = task_info.split('|', 2)
         task_description = task_description.strip()
         deadline_str = deadline_str.strip()
         
         if not task_description:
-            await ctx.send("❌ Task description cannot be empty.")
+            await outbound.send(ctx, "❌ Task description cannot be empty.")
             return
         
-        success, message = task_manager.add_task(
+        success, message = await partition.run(
+            task_manager.add_task,
             task_description, 
             deadline_str, 
             ctx.author.id, 
             ctx.author.display_name,
-            ctx.channel.id
+            ctx.channel.id,
+            partition.timezone_for(ctx.author.id),
+            repeat[0] if repeat else None
         )
         
         if success:
-            await ctx.send(f"✅ {message}")
+            await task_manager.wait_durable()
+            await outbound.send(ctx, f"✅ {message}")
         else:
-            await ctx.send(f"❌ {message}")
+            await outbound.send(ctx, f"❌ {message}")
             
     except Exception as e:
-        await ctx.send(f"❌ Error adding task: {str(e)}")
+        await outbound.send(ctx, f"❌ Error adding task: {str(e)}")
+
+def task_list_fetcher(partition: TaskPartition, scope: str = 'all', scope_id=0):
+    """
+    Build a fetch function returning a rendered (and cached) task list
+    scope: 'all', 'creator' (tasks created by scope_id), 'channel' (tasks created in scope_id)
+           or 'search' (tasks matching the query text in scope_id)
+    """
+    task_manager = partition.tasks
+    
+    def read():
+        if scope == 'creator':
+            return list(task_manager.get_tasks_for_creator(scope_id).values())
+        if scope == 'channel':
+            return list(task_manager.get_tasks_for_channel(scope_id).values())
+        if scope == 'search':
+            return task_manager.search_tasks(scope_id)
+        return task_manager.get_all_tasks().values()
+    
+    async def load():
+        return await partition.run(read)
+    
+    async def fetch():
+        return await task_list_cache.get(
+            (partition.key, scope, scope_id),
+            task_manager.version,
+            task_manager.get_current_date(),
+            load
+        )
+    return fetch
+
+async def with_search_notice(partition: TaskPartition, query: str, message: dict) -> dict:
+    """Add a note to a search reply when a word was too short to follow every word it starts"""
+    broad = await partition.run(partition.tasks.broad_search_terms, query)
+    if not broad:
+        return message
+    terms = ', '.join(f"'{term}'" for term in broad)
+    note = (f"⚠️ {terms} starts too many different words; only the first {MAX_PREFIX_EXPANSION} "
+            f"were searched, so some matches may be missing. Type more of the word to narrow it down.")
+    content = message.get('content')
+    return {**message, 'content': f"{content}\n{note}" if content else note}
 
 @bot.tree.command(name="listtasks", description="List all active tasks")
-async def list_tasks_slash(interaction: discord.Interaction):
+@app_commands.describe(scope="Show every task (default) or only tasks created in this channel")
+async def list_tasks_slash(interaction: discord.Interaction, scope: Literal['all', 'channel'] = 'all'):
     """List all active tasks using slash command"""
     try:
-        tasks = task_manager.get_all_tasks()
+        partition = get_partition(interaction)
+        if scope == 'channel':
+            fetch = task_list_fetcher(partition, 'channel', interaction.channel_id)
+            title = "📋 Tasks in this channel"
+        else:
+            fetch = task_list_fetcher(partition)
+            title = "📋 Active Tasks"
+        
+        async def work():
+            message = await open_task_list(fetch, title)
+            return message or {'content': "📝 No active tasks found."}
         
-        if not tasks:
-            await interaction.response.send_message("📝 No active tasks found.", ephemeral=True)
+        await deferred.submit(interaction, work, error_message="Error listing tasks")
+        
+    except Exception as e:
+        await outbound.respond(interaction, f"❌ Error listing tasks: {str(e)}", ephemeral=True)
+
+@bot.command(name='listtasks')
+async def list_tasks(ctx, scope: str = 'all'):
+    """
+    List all active tasks
+    Usage: !listtasks [channel]
+    """
+    try:
+        partition = get_partition(ctx)
+        if scope.lower() == 'channel':
+            fetch = task_list_fetcher(partition, 'channel', ctx.channel.id)
+            title = "📋 Tasks in this channel"
+        else:
+            fetch = task_list_fetcher(partition)
+            title = "📋 Active Tasks"
+        message = await open_task_list(fetch, title)
+        
+        if message is None:
+            await outbound.send(ctx, "📝 No active tasks found.")
             return
         
-        embed = discord.Embed(title="📋 Active Tasks", color=0x3498db)
+        await outbound.send(ctx, **message)
         
-        for task_id, task in tasks.items():
-            creator = task['creator_name']
-            description = task['description']
-            deadline = task['deadline'].strftime('%Y-%m-%d')
-            days_left = (task['deadline'] - task_manager.get_current_date()).days
-            
-            if days_left < 0:
-                status = f"⚠️ Overdue by {abs(days_left)} days"
-            elif days_left == 0:
-                status = "🔥 Due today!"
-            elif days_left <= 3:
-                status = f"⏰ {days_left} days left"
-            else:
-                status = f"📅 {days_left} days left"
-            
-            embed.add_field(
-                name=f"Task #{task_id}: {description}",
-                value=f"Created by: {creator}\nDeadline: {deadline}\nStatus: {status}",
-                inline=False
-            )
+    except Exception as e:
+        await outbound.send(ctx, f"❌ Error listing tasks: {str(e)}")
+
+@bot.tree.command(name="mytasks", description="List the active tasks you created")
+async def my_tasks_slash(interaction: discord.Interaction):
+    """List the caller's own tasks using slash command"""
+    try:
+        fetch = task_list_fetcher(get_partition(interaction), 'creator', interaction.user.id)
+        
+        async def work():
+            message = await open_task_list(fetch, f"📋 Tasks for {interaction.user.display_name}")
+            return message or {'content': "📝 You have no active tasks."}
         
-        await interaction.response.send_message(embed=embed)
+        await deferred.submit(interaction, work, ephemeral=True, error_message="Error listing your tasks")
         
     except Exception as e:
-        await interaction.response.send_message(f"❌ Error listing tasks: {str(e)}", ephemeral=True)
+        await outbound.respond(interaction, f"❌ Error listing your tasks: {str(e)}", ephemeral=True)
 
-@bot.command(name='listtasks')
-async def list_tasks(ctx):
-    """List all active tasks"""
+@bot.command(name='mytasks')
+async def my_tasks(ctx):
+    """List the active tasks you created"""
     try:
-        tasks = task_manager.get_all_tasks()
+        fetch = task_list_fetcher(get_partition(ctx), 'creator', ctx.author.id)
+        message = await open_task_list(fetch, f"📋 Tasks for {ctx.author.display_name}")
         
-        if not tasks:
-            await ctx.send("📝 No active tasks found.")
+        if message is None:
+            await outbound.send(ctx, "📝 You have no active tasks.")
             return
         
-        embed = discord.Embed(title="📋 Active Tasks", color=0x3498db)
+        await outbound.send(ctx, **message)
         
-        for task_id, task in tasks.items():
-            creator = task['creator_name']
-            description = task['description']
-            deadline = task['deadline'].strftime('%Y-%m-%d')
-            days_left = (task['deadline'] - task_manager.get_current_date()).days
-            
-            if days_left < 0:
-                status = f"⚠️ Overdue by {abs(days_left)} days"
-            elif days_left == 0:
-                status = "🔥 Due today!"
-            elif days_left <= 3:
-                status = f"⏰ {days_left} days left"
-            else:
-                status = f"📅 {days_left} days left"
-            
-            embed.add_field(
-                name=f"Task #{task_id}: {description}",
-                value=f"Created by: {creator}\nDeadline: {deadline}\nStatus: {status}",
-                inline=False
-            )
+    except Exception as e:
+        await outbound.send(ctx, f"❌ Error listing your tasks: {str(e)}")
+
+@bot.tree.command(name="stats", description="Completion stats: totals, on-time rate and lateness")
+@app_commands.describe(user="Show this member's stats alongside the server's (defaults to you)")
+async def stats_slash(interaction: discord.Interaction, user: discord.Member = None):
+    """Show task completion stats using slash command"""
+    try:
+        partition = get_partition(interaction)
+        member = user or interaction.user
         
-        await ctx.send(embed=embed)
+        async def work():
+            report = await partition.run(partition.tasks.get_stats, member.id)
+            return {'embed': stats_embed(report, "📊 Task Stats", f"👤 {member.display_name}")}
         
+        await deferred.submit(interaction, work, error_message="Error loading stats")
     except Exception as e:
-        await ctx.send(f"❌ Error listing tasks: {str(e)}")
+        await outbound.respond(interaction, f"❌ Error loading stats: {str(e)}", ephemeral=True)
 
-@bot.tree.command(name="complete", description="Mark a task as completed")
-@app_commands.describe(task_id="The ID number of the task to mark as complete")
-async def complete_task_slash(interaction: discord.Interaction, task_id: int):
-    """Mark a task as completed using slash command"""
+@bot.command(name='stats')
+async def stats(ctx, user: discord.Member = None):
+    """
+    Show task completion stats
+    Usage: !stats [@user]
+    """
     try:
-        success, message = task_manager.complete_task(task_id, interaction.user.id)
+        partition = get_partition(ctx)
+        member = user or ctx.author
+        report = await partition.run(partition.tasks.get_stats, member.id)
+        embed = stats_embed(report, "📊 Task Stats", f"👤 {member.display_name}")
+        await outbound.send(ctx, embed=embed)
+    except Exception as e:
+        await outbound.send(ctx, f"❌ Error loading stats: {str(e)}")
+
+@bot.tree.command(name="searchtasks", description="Search active tasks by description")
+@app_commands.describe(query="Words to look for; partial words match too (e.g. 'deplo stag')")
+async def search_tasks_slash(interaction: discord.Interaction, query: str):
+    """Search active tasks using slash command"""
+    try:
+        query = ' '.join(query.casefold().split())
+        if not query:
+            await outbound.respond(interaction, "❌ Search text cannot be empty.", ephemeral=True)
+            return
         
-        if success:
-            await interaction.response.send_message(f"✅ {message}")
-        else:
-            await interaction.response.send_message(f"❌ {message}", ephemeral=True)
+        partition = get_partition(interaction)
+        fetch = task_list_fetcher(partition, 'search', query)
+        
+        async def work():
+            message = await open_task_list(fetch, f"🔍 Tasks matching '{query}'")
+            message = message or {'content': f"📝 No active tasks match '{query}'."}
+            return await with_search_notice(partition, query, message)
+        
+        await deferred.submit(interaction, work, error_message="Error searching tasks")
+        
+    except Exception as e:
+        await outbound.respond(interaction, f"❌ Error searching tasks: {str(e)}", ephemeral=True)
+
+@bot.command(name='searchtasks')
+async def search_tasks(ctx, *, query: str):
+    """
+    Search active tasks by description
+    Usage: !searchtasks words to find
+    """
+    try:
+        query = ' '.join(query.casefold().split())
+        partition = get_partition(ctx)
+        fetch = task_list_fetcher(partition, 'search', query)
+        message = await open_task_list(fetch, f"🔍 Tasks matching '{query}'")
+        message = message or {'content': f"📝 No active tasks match '{query}'."}
+        
+        await outbound.send(ctx, **await with_search_notice(partition, query, message))
+        
+    except Exception as e:
+        await outbound.send(ctx, f"❌ Error searching tasks: {str(e)}")
+
+@bot.tree.command(name="complete", description="Mark one or more tasks as completed")
+@app_commands.describe(tasks="Task ID(s): 5, a list/range like 3, 7-9, or 'mine before 2025-08-01'")
+async def complete_task_slash(interaction: discord.Interaction, tasks: str):
+    """Mark one or more tasks as completed using slash command"""
+    try:
+        partition = get_partition(interaction)
+        task_manager = partition.tasks
+        
+        # A filter like 'mine before 2025-08-01' can select thousands of tasks
+        async def work():
+            success, message = await partition.run(complete_selection, task_manager, tasks, interaction.user.id)
+            if success:
+                await task_manager.wait_durable()
+                return {'content': f"✅ {message}"}
+            return {'content': f"❌ {message}"}
+        
+        await deferred.submit(interaction, work, error_message="Error completing task")
             
     except Exception as e:
-        await interaction.response.send_message(f"❌ Error completing task: {str(e)}", ephemeral=True)
+        await outbound.respond(interaction, f"❌ Error completing task: {str(e)}", ephemeral=True)
 
 @bot.command(name='complete')
-async def complete_task(ctx, task_id: int):
+async def complete_task(ctx, *, selection: str):
     """
-    Mark a task as completed
-    Usage: !complete <task_id>
+    Mark one or more tasks as completed
+    Usage: !complete <task_id> | !complete 3, 7-9 | !complete mine before YYYY-MM-DD
     """
     try:
-        success, message = task_manager.complete_task(task_id, ctx.author.id)
+        partition = get_partition(ctx)
+        task_manager = partition.tasks
+        success, message = await partition.run(complete_selection, task_manager, selection, ctx.author.id)
         
         if success:
-            await ctx.send(f"✅ {message}")
+            await task_manager.wait_durable()
+            await outbound.send(ctx, f"✅ {message}")
         else:
-            await ctx.send(f"❌ {message}")
+            await outbound.send(ctx, f"❌ {message}")
             
-    except ValueError:
-        await ctx.send("❌ Invalid task ID. Please provide a valid number.")
     except Exception as e:
-        await ctx.send(f"❌ Error completing task: {str(e)}")
+        await outbound.send(ctx, f"❌ Error completing task: {str(e)}")
+
+async def stream_attachment_lines(attachment: discord.Attachment, batch_size: int = 500):
+    """
+    Download an attachment and yield its decoded lines in batches. Lines are
+    split here rather than by aiohttp's readline, which fails the whole
+    download on a long line; a line over MAX_LINE_BYTES is yielded as None
+    so the importer reports it as a bad row.
+    """
+    async with aiohttp.ClientSession() as session:
+        async with session.get(attachment.url) as response:
+            response.raise_for_status()
+            batch = []
+            tail = b''
+            skipping = False  # Inside a line already reported as too long
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                raw_lines = (tail + chunk).split(b'\n')
+                tail = raw_lines.pop()
+                for raw_line in raw_lines:
+                    if skipping:
+                        skipping = False
+                    elif len(raw_line) >= MAX_LINE_BYTES:
+                        batch.append(None)
+                    else:
+                        batch.append(raw_line.decode('utf-8', errors='replace') + '\n')
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                if len(tail) >= MAX_LINE_BYTES:
+                    if not skipping:
+                        batch.append(None)
+                        skipping = True
+                    tail = b''
+            if tail and not skipping:
+                batch.append(tail.decode('utf-8', errors='replace'))
+            if batch:
+                yield batch
+
+async def import_attachment(partition: TaskPartition, attachment: discord.Attachment, user, channel_id: int):
+    """
+    Stream-import tasks from an uploaded CSV/JSONL file
+    Returns: (success, message)
+    """
+    fmt = detect_format(attachment.filename)
+    if fmt is None:
+        return False, "Unsupported file type. Upload a .csv or .jsonl file."
+    
+    if attachment.size > Config.IMPORT_MAX_BYTES:
+        return False, f"File is too large ({attachment.size // 1024} KB). The limit is {Config.IMPORT_MAX_BYTES // 1024} KB."
+    
+    importer = TaskImporter(partition.tasks, fmt, user.id, user.display_name, channel_id,
+                            tz_name=partition.timezone_for(user.id))
+    async for lines in stream_attachment_lines(attachment):
+        await partition.run(importer.feed, lines)
+        # Let other commands run between chunks
+        await asyncio.sleep(0)
+    
+    report = await partition.run(importer.finish)
+    await partition.tasks.wait_durable()
+    return report.imported > 0, report.summary()
+
+def write_export(tasks, fmt: str):
+    """Stream an export into a spooled temp file (spills to disk past 1 MB)"""
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode='w+b')
+    for chunk in iter_export(tasks, fmt):
+        spool.write(chunk.encode('utf-8'))
+    spool.seek(0)
+    return spool
+
+async def export_tasks_file(partition: TaskPartition, fmt: str) -> discord.File:
+    """Export a partition's active tasks as a Discord file attachment"""
+    # A snapshot is not changed by later writes, so the worker thread sees one consistent version
+    tasks = (await partition.run(partition.tasks.get_all_tasks)).values()
+    with tracing.span('render'):
+        spool = await asyncio.get_running_loop().run_in_executor(None, write_export, tasks, fmt)
+    return discord.File(spool, filename=f"tasks-{partition.guild_id}.{fmt}")
+
+@bot.tree.command(name="importtasks", description="Import tasks from a CSV or JSONL file")
+@app_commands.describe(file="CSV with description,deadline columns, or JSONL objects with description and deadline")
+async def import_tasks_slash(interaction: discord.Interaction, file: discord.Attachment):
+    """Bulk import tasks from an attachment using slash command"""
+    try:
+        partition = get_partition(interaction)
+        
+        async def work():
+            success, message = await import_attachment(partition, file, interaction.user, interaction.channel_id)
+            return {'content': f"{'✅' if success else '❌'} {message}"}
+        
+        await deferred.submit(interaction, work, error_message="Error importing tasks")
+    except Exception as e:
+        await outbound.respond(interaction, f"❌ Error importing tasks: {str(e)}", ephemeral=True)
+
+@bot.command(name='importtasks')
+async def import_tasks(ctx):
+    """
+    Bulk import tasks from an attached CSV or JSONL file
+    Usage: !importtasks (with the file attached)
+    """
+    try:
+        if not ctx.message.attachments:
+            await outbound.send(ctx, "❌ Attach a .csv or .jsonl file to import. CSV needs description and deadline columns.")
+            return
+        
+        success, message = await import_attachment(get_partition(ctx), ctx.message.attachments[0], ctx.author, ctx.channel.id)
+        await outbound.send(ctx, f"{'✅' if success else '❌'} {message}")
+    except Exception as e:
+        await outbound.send(ctx, f"❌ Error importing tasks: {str(e)}")
+
+@bot.tree.command(name="exporttasks", description="Export all active tasks as a CSV or JSONL file")
+@app_commands.describe(format="File format (default: csv)")
+async def export_tasks_slash(interaction: discord.Interaction, format: Literal['csv', 'jsonl'] = 'csv'):
+    """Export all active tasks using slash command"""
+    try:
+        partition = get_partition(interaction)
+        
+        async def work():
+            return {'content': "📤 Here are your tasks:", 'file': await export_tasks_file(partition, format)}
+        
+        await deferred.submit(interaction, work, error_message="Error exporting tasks")
+    except Exception as e:
+        await outbound.respond(interaction, f"❌ Error exporting tasks: {str(e)}", ephemeral=True)
+
+@bot.command(name='exporttasks')
+async def export_tasks(ctx, fmt: str = 'csv'):
+    """
+    Export all active tasks
+    Usage: !exporttasks [csv|jsonl]
+    """
+    try:
+        fmt = fmt.lower()
+        if fmt not in ('csv', 'jsonl'):
+            await outbound.send(ctx, "❌ Format must be csv or jsonl.")
+            return
+        
+        file = await export_tasks_file(get_partition(ctx), fmt)
+        await outbound.send(ctx, "📤 Here are your tasks:", file=file)
+    except Exception as e:
+        await outbound.send(ctx, f"❌ Error exporting tasks: {str(e)}")
 
 @bot.tree.command(name="setchannel", description="Set the current channel as the reminder channel")
 async def set_reminder_channel_slash(interaction: discord.Interaction):
     """Set the current channel as the reminder channel using slash command"""
     try:
-        Config.REMINDER_CHANNEL_ID = interaction.channel_id
-        await interaction.response.send_message(f"✅ Reminder channel set to <#{interaction.channel_id}>")
+        partition = get_partition(interaction)
+        async with partition.lock:
+            partition.settings.reminder_channel_id = interaction.channel_id
+            partition.save_settings()
+        await outbound.respond(interaction, f"✅ Reminder channel set to <#{interaction.channel_id}>")
     except Exception as e:
-        await interaction.response.send_message(f"❌ Error setting reminder channel: {str(e)}", ephemeral=True)
+        await outbound.respond(interaction, f"❌ Error setting reminder channel: {str(e)}", ephemeral=True)
 
 @bot.command(name='setchannel')
 async def set_reminder_channel(ctx):
     """Set the current channel as the reminder channel"""
     try:
-        Config.REMINDER_CHANNEL_ID = ctx.channel.id
-        await ctx.send(f"✅ Reminder channel set to {ctx.channel.mention}")
+        partition = get_partition(ctx)
+        async with partition.lock:
+            partition.settings.reminder_channel_id = ctx.channel.id
+            partition.save_settings()
+        await outbound.send(ctx, f"✅ Reminder channel set to {ctx.channel.mention}")
     except Exception as e:
-        await ctx.send(f"❌ Error setting reminder channel: {str(e)}")
+        await outbound.send(ctx, f"❌ Error setting reminder channel: {str(e)}")
+
+async def update_reminder_time(partition: TaskPartition, time_str: str, tz_name: str = None):
+    """
+    Change a partition's daily reminder time (HH:MM, optionally in an IANA timezone)
+    Returns: (success, message)
+    """
+    try:
+        hour, minute = (int(part) for part in time_str.strip().split(':'))
+        if not (0 <= hour <= 23 and 0 <= minute <= 59):
+            raise ValueError
+    except ValueError:
+        return False, "Invalid time. Please use HH:MM format (e.g., 09:30)."
+    
+    if tz_name:
+        try:
+            ZoneInfo(tz_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            return False, f"Unknown timezone '{tz_name}'. Use a name like Europe/Berlin or America/New_York."
+    
+    async with partition.lock:
+        partition.settings.reminder_hour = hour
+        partition.settings.reminder_minute = minute
+        if tz_name:
+            partition.settings.timezone = tz_name
+        partition.save_settings()
+    
+    _, _, effective_tz = partition.reminder_time
+    message = f"Daily reminders set to {hour:02d}:{minute:02d} ({effective_tz})"
+    if reminder_scheduler is not None:
+        next_fire = reminder_scheduler.schedule_partition(partition)
+        local_next = next_fire.astimezone(ZoneInfo(effective_tz))
+        message += f". Next reminder: {local_next.strftime('%Y-%m-%d %H:%M')}"
+    return True, message
+
+@bot.tree.command(name="setremindertime", description="Set the daily reminder time for this server")
+@app_commands.describe(
+    time="Time of day in HH:MM (24-hour) format, e.g. 09:30",
+    timezone="Optional IANA timezone, e.g. Europe/Berlin (defaults to the current setting)"
+)
+async def set_reminder_time_slash(interaction: discord.Interaction, time: str, timezone: str = None):
+    """Set the daily reminder time using slash command"""
+    try:
+        success, message = await update_reminder_time(get_partition(interaction), time, timezone)
+        
+        if success:
+            await outbound.respond(interaction, f"✅ {message}")
+        else:
+            await outbound.respond(interaction, f"❌ {message}", ephemeral=True)
+    except Exception as e:
+        await outbound.respond(interaction, f"❌ Error setting reminder time: {str(e)}", ephemeral=True)
+
+@bot.command(name='setremindertime')
+async def set_reminder_time(ctx, time_str: str, tz_name: str = None):
+    """
+    Set the daily reminder time
+    Usage: !setremindertime HH:MM [timezone]
+    """
+    try:
+        success, message = await update_reminder_time(get_partition(ctx), time_str, tz_name)
+        
+        if success:
+            await outbound.send(ctx, f"✅ {message}")
+        else:
+            await outbound.send(ctx, f"❌ {message}")
+    except Exception as e:
+        await outbound.send(ctx, f"❌ Error setting reminder time: {str(e)}")
+
+async def update_reminder_delivery(partition: TaskPartition, mode: str):
+    """
+    Choose how a partition's daily reminders are delivered: 'channel' or 'dm'
+    Returns: (success, message)
+    """
+    mode = (mode or '').strip().lower()
+    if mode not in ('channel', 'dm'):
+        return False, "Delivery must be 'channel' (one shared digest) or 'dm' (a digest for each user)."
+    
+    async with partition.lock:
+        partition.settings.reminder_delivery = mode
+        partition.save_settings()
+    
+    if mode == 'dm':
+        return True, ("Daily reminders will be sent to each task creator by DM. "
+                      "Users with DMs turned off get theirs in the reminder channel.")
+    return True, "Daily reminders will be posted as one digest in the reminder channel."
+
+@bot.tree.command(name="setreminderdelivery", description="Post daily reminders in the channel or DM each user their own")
+@app_commands.describe(mode="'channel' for one shared digest, 'dm' for a digest per user")
+async def set_reminder_delivery_slash(interaction: discord.Interaction, mode: str):
+    """Set the reminder delivery mode using slash command"""
+    try:
+        success, message = await update_reminder_delivery(get_partition(interaction), mode)
+        
+        if success:
+            await outbound.respond(interaction, f"✅ {message}")
+        else:
+            await outbound.respond(interaction, f"❌ {message}", ephemeral=True)
+    except Exception as e:
+        await outbound.respond(interaction, f"❌ Error setting reminder delivery: {str(e)}", ephemeral=True)
+
+@bot.command(name='setreminderdelivery')
+async def set_reminder_delivery(ctx, mode: str):
+    """
+    Set how daily reminders are delivered
+    Usage: !setreminderdelivery channel|dm
+    """
+    try:
+        success, message = await update_reminder_delivery(get_partition(ctx), mode)
+        
+        if success:
+            await outbound.send(ctx, f"✅ {message}")
+        else:
+            await outbound.send(ctx, f"❌ {message}")
+    except Exception as e:
+        await outbound.send(ctx, f"❌ Error setting reminder delivery: {str(e)}")
+
+@bot.tree.command(name="stoprepeat", description="Stop a recurring task from repeating (its current occurrence stays)")
+@app_commands.describe(task_id="The ID of the recurring task")
+async def stop_repeat_slash(interaction: discord.Interaction, task_id: int):
+    """Stop a recurring task using slash command"""
+    try:
+        partition = get_partition(interaction)
+        success, message = await partition.run(partition.tasks.stop_recurring, task_id, interaction.user.id)
+        
+        if success:
+            await partition.tasks.wait_durable()
+            await outbound.respond(interaction, f"✅ {message}")
+        else:
+            await outbound.respond(interaction, f"❌ {message}", ephemeral=True)
+    except Exception as e:
+        await outbound.respond(interaction, f"❌ Error updating task: {str(e)}", ephemeral=True)
+
+@bot.command(name='stoprepeat')
+async def stop_repeat(ctx, task_id: int):
+    """
+    Stop a recurring task from repeating
+    Usage: !stoprepeat <task_id>
+    """
+    try:
+        partition = get_partition(ctx)
+        success, message = await partition.run(partition.tasks.stop_recurring, task_id, ctx.author.id)
+        
+        if success:
+            await partition.tasks.wait_durable()
+            await outbound.send(ctx, f"✅ {message}")
+        else:
+            await outbound.send(ctx, f"❌ {message}")
+    except Exception as e:
+        await outbound.send(ctx, f"❌ Error updating task: {str(e)}")
+
+async def update_user_timezone(partition: TaskPartition, user_id: int, tz_name: str = None):
+    """
+    Set (or clear, when tz_name is empty) the timezone a user's deadlines are read in
+    Returns: (success, message)
+    """
+    tz_name = (tz_name or '').strip()
+    if tz_name:
+        try:
+            ZoneInfo(tz_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            return False, f"Unknown timezone '{tz_name}'. Use a name like Europe/Berlin or America/New_York."
+    
+    async with partition.lock:
+        if tz_name:
+            partition.settings.user_timezones[user_id] = tz_name
+        else:
+            partition.settings.user_timezones.pop(user_id, None)
+        partition.save_settings()
+    
+    if tz_name:
+        return True, f"Your deadlines will be read in {tz_name}"
+    return True, f"Your timezone was cleared; deadlines will be read in the server's timezone ({partition.timezone_for(user_id)})"
+
+@bot.tree.command(name="settimezone", description="Set the timezone your deadlines (e.g. 'tomorrow 5pm') are read in")
+@app_commands.describe(timezone="IANA timezone, e.g. Europe/Berlin; leave empty to use the server's timezone")
+async def set_timezone_slash(interaction: discord.Interaction, timezone: str = None):
+    """Set the user's timezone using slash command"""
+    try:
+        success, message = await update_user_timezone(get_partition(interaction), interaction.user.id, timezone)
+        await outbound.respond(interaction, f"{'✅' if success else '❌'} {message}", ephemeral=True)
+    except Exception as e:
+        await outbound.respond(interaction, f"❌ Error setting timezone: {str(e)}", ephemeral=True)
+
+@bot.command(name='settimezone')
+async def set_timezone(ctx, tz_name: str = None):
+    """
+    Set the timezone your deadlines are read in
+    Usage: !settimezone [timezone]
+    """
+    try:
+        success, message = await update_user_timezone(get_partition(ctx), ctx.author.id, tz_name)
+        await outbound.send(ctx, f"{'✅' if success else '❌'} {message}")
+    except Exception as e:
+        await outbound.send(ctx, f"❌ Error setting timezone: {str(e)}")
 
 @bot.tree.command(name="testping", description="Create a test task due today to test ping functionality")
 async def test_ping_slash(interaction: discord.Interaction):
     """Create a test task due today to test the ping system"""
-    from datetime import date
     try:
-        today = date.today().strftime('%Y-%m-%d')
+        partition = get_partition(interaction)
+        task_manager = partition.tasks
         
-        success, message = task_manager.add_task(
+        success, message = await partition.run(
+            task_manager.add_task,
             "Test ping task", 
-            today, 
+            "today", 
             interaction.user.id, 
             interaction.user.display_name,
-            interaction.channel_id
+            interaction.channel_id,
+            partition.timezone_for(interaction.user.id)
         )
         
         if success:
-            await interaction.response.send_message(
+            await outbound.respond(
+                interaction,
                 f"✅ {message}\n\n"
                 f"🔔 **Test Setup Complete!**\n"
                 f"• This task is due today and will trigger a ping\n"
                 f"• Use `/testreminder` to manually trigger a reminder now\n"
-                f"• Or wait until 9:00 AM for the automatic daily reminder"
+                f"• Or wait for the automatic daily reminder"
             )
         else:
-            await interaction.response.send_message(f"❌ {message}", ephemeral=True)
+            await outbound.respond(interaction, f"❌ {message}", ephemeral=True)
             
     except Exception as e:
-        await interaction.response.send_message(f"❌ Error creating test task: {str(e)}", ephemeral=True)
+        await outbound.respond(interaction, f"❌ Error creating test task: {str(e)}", ephemeral=True)
 
 @bot.tree.command(name="testreminder", description="Manually send a reminder now (for testing)")
 async def test_reminder_slash(interaction: discord.Interaction):
     """Manually trigger a reminder to test the ping system"""
     try:
+        partition = get_partition(interaction)
+        reminder_channel_id = partition.reminder_channel_id
+        
         # Check if this channel is set as reminder channel
-        if Config.REMINDER_CHANNEL_ID == 0:
-            await interaction.response.send_message(
+        if reminder_channel_id == 0:
+            await outbound.respond(
+                interaction,
                 "❌ No reminder channel set! Use `/setchannel` first.", 
                 ephemeral=True
             )
             return
         
-        if interaction.channel_id != Config.REMINDER_CHANNEL_ID:
-            await interaction.response.send_message(
-                f"❌ Reminders are sent to <#{Config.REMINDER_CHANNEL_ID}>. Use `/setchannel` here to change it.", 
+        if interaction.channel_id != reminder_channel_id:
+            await outbound.respond(
+                interaction,
+                f"❌ Reminders are sent to <#{reminder_channel_id}>. Use `/setchannel` here to change it.", 
                 ephemeral=True
             )
             return
         
-        await interaction.response.send_message("🔔 Sending test reminder now...")
+        # Manually trigger the reminder; on a big board this takes longer than an interaction may wait
+        async def work():
+            await reminder_scheduler.send_partition_reminders(partition)
+            return {'content': "🔔 Test reminder sent."}
         
-        # Manually trigger the reminder
-        await reminder_scheduler.send_daily_reminders()
+        await deferred.submit(interaction, work, error_message="Error sending test reminder")
         
     except Exception as e:
-        await interaction.response.send_message(f"❌ Error sending test reminder: {str(e)}", ephemeral=True)
+        await outbound.respond(interaction, f"❌ Error sending test reminder: {str(e)}", ephemeral=True)
 
 @bot.tree.command(name="help", description="Show help for task management commands")
 async def help_tasks_slash(interaction: discord.Interaction):
@@ -290,9 +951,17 @@ async def help_tasks_slash(interaction: discord.Interaction):
         name="Slash Commands (Recommended)",
         value="📌 **Main Commands:**\n"
               "• `/addtask` - Add a new task (with separate fields for name and deadline)\n"
-              "• `/listtasks` - List all active tasks\n"
-              "• `/complete` - Mark a task as completed\n"
+              "• `/listtasks` - List all active tasks (or only this channel's)\n"
+              "• `/mytasks` - List the tasks you created\n"
+              "• `/searchtasks` - Find tasks by words in their description\n"
+              "• `/complete` - Mark tasks as completed (`5`, `3, 7-9` or `mine before 2025-08-01`)\n"
+              "• `/stoprepeat` - Stop a recurring task from repeating\n"
+              "• `/stats` - Completion counts, on-time rate and lateness\n"
               "• `/setchannel` - Set current channel for daily reminders\n"
+              "• `/setremindertime` - Set the daily reminder time and timezone\n"
+              "• `/setreminderdelivery` - Post reminders in the channel or DM each user\n"
+              "• `/settimezone` - Set the timezone your deadlines are read in\n"
+              "• `/importtasks` / `/exporttasks` - Bulk import or export tasks (CSV/JSONL)\n"
               "• `/help` - Show this help message",
         inline=False
     )
@@ -306,19 +975,26 @@ async def help_tasks_slash(interaction: discord.Interaction):
     embed.add_field(
         name="Legacy Commands (Still Available)",
         value="📝 **Alternative Format:**\n"
-              "• `!addtask Task description | 2025-07-30`\n"
-              "• `!listtasks`\n"
-              "• `!complete 1`\n"
-              "• `!setchannel`",
+              "• `!addtask Task description | 2025-07-30` or `| tomorrow 5pm`\n"
+              "• `!addtask Standup | monday 09:30 | weekdays` (recurring)\n"
+              "• `!listtasks` / `!listtasks channel` / `!mytasks`\n"
+              "• `!searchtasks deploy staging`\n"
+              "• `!complete 1` or `!complete 1-4, 9`\n"
+              "• `!setchannel`\n"
+              "• `!setremindertime 09:30 Europe/Berlin`\n"
+              "• `!setreminderdelivery dm`\n"
+              "• `!settimezone America/New_York`\n"
+              "• `!stats` or `!stats @user`\n"
+              "• `!importtasks` (attach a file) / `!exporttasks csv`",
         inline=False
     )
     embed.add_field(
         name="🔔 Daily Reminders",
-        value="The bot automatically sends daily reminders at 9:00 AM in your set channel, pinging users with upcoming or overdue tasks.",
+        value="The bot automatically sends daily reminders (9:00 AM by default, see `/setremindertime`) in your set channel, pinging users with upcoming or overdue tasks.",
         inline=False
     )
     
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    await outbound.respond(interaction, embed=embed, ephemeral=True)
 
 @bot.command(name='help_tasks')
 async def help_tasks(ctx):
@@ -328,74 +1004,109 @@ async def help_tasks(ctx):
         name="Slash Commands (Recommended)",
         value="📌 **Main Commands:**\n"
               "• `/addtask` - Add a new task (with separate fields for name and deadline)\n"
-              "• `/listtasks` - List all active tasks\n"
-              "• `/complete` - Mark a task as completed\n"
+              "• `/listtasks` - List all active tasks (or only this channel's)\n"
+              "• `/mytasks` - List the tasks you created\n"
+              "• `/searchtasks` - Find tasks by words in their description\n"
+              "• `/complete` - Mark tasks as completed (`5`, `3, 7-9` or `mine before 2025-08-01`)\n"
+              "• `/stoprepeat` - Stop a recurring task from repeating\n"
+              "• `/stats` - Completion counts, on-time rate and lateness\n"
               "• `/setchannel` - Set current channel for daily reminders\n"
+              "• `/setremindertime` - Set the daily reminder time and timezone\n"
+              "• `/setreminderdelivery` - Post reminders in the channel or DM each user\n"
+              "• `/settimezone` - Set the timezone your deadlines are read in\n"
+              "• `/importtasks` / `/exporttasks` - Bulk import or export tasks (CSV/JSONL)\n"
               "• `/help` - Show this help message",
         inline=False
     )
     embed.add_field(
         name="Legacy Commands",
         value="📝 **Alternative Format:**\n"
-              "• `!addtask Task description | 2025-07-30`\n"
-              "• `!listtasks`\n"
-              "• `!complete 1`\n"
-              "• `!setchannel`",
+              "• `!addtask Task description | 2025-07-30` or `| tomorrow 5pm`\n"
+              "• `!addtask Standup | monday 09:30 | weekdays` (recurring)\n"
+              "• `!listtasks` / `!listtasks channel` / `!mytasks`\n"
+              "• `!searchtasks deploy staging`\n"
+              "• `!complete 1` or `!complete 1-4, 9`\n"
+              "• `!setchannel`\n"
+              "• `!setremindertime 09:30 Europe/Berlin`\n"
+              "• `!setreminderdelivery dm`\n"
+              "• `!settimezone America/New_York`\n"
+              "• `!stats` or `!stats @user`\n"
+              "• `!importtasks` (attach a file) / `!exporttasks csv`",
         inline=False
     )
     embed.add_field(
         name="🔔 Daily Reminders",
-        value="The bot automatically sends daily reminders at 9:00 AM in your set channel, pinging users with upcoming or overdue tasks.",
+        value="The bot automatically sends daily reminders (9:00 AM by default, see `/setremindertime`) in your set channel, pinging users with upcoming or overdue tasks.",
         inline=False
     )
     
-    await ctx.send(embed=embed)
+    await outbound.send(ctx, embed=embed)
 
 @bot.event
 async def on_command_error(ctx, error):
     """Handle command errors"""
+    # Argument and check failures happen before after_invoke would close the trace
+    finish_prefix_trace(ctx, 'error')
     if isinstance(error, commands.CommandNotFound):
         return  # Ignore unknown commands
     elif isinstance(error, commands.MissingRequiredArgument):
-        await ctx.send("❌ Missing required arguments. Use `!help_tasks` for command usage.")
+        await outbound.send(ctx, "❌ Missing required arguments. Use `!help_tasks` for command usage.")
     elif isinstance(error, commands.BadArgument):
-        await ctx.send("❌ Invalid argument provided. Use `!help_tasks` for command usage.")
+        await outbound.send(ctx, "❌ Invalid argument provided. Use `!help_tasks` for command usage.")
+    elif isinstance(error, ShardMoved):
+        await outbound.send(ctx, SHARD_MOVED_MESSAGE)
     else:
-        await ctx.send(f"❌ An error occurred: {str(error)}")
+        await outbound.send(ctx, f"❌ An error occurred: {str(error)}")
         print(f"Command error: {error}")
 
-# Run the bot
-if __name__ == "__main__":
-    token = os.getenv('DISCORD_BOT_TOKEN')
-    if not token:
-        print("❌ DISCORD_BOT_TOKEN environment variable not found!")
-        print("Please set your Discord bot token in the environment variables.")
-        exit(1)
-    
-    # For Replit development - start keep-alive server
-    keep_alive()
-    
-    # Give Flask server time to start
-    import time
-    time.sleep(2)
-    
-    try:
-        bot.run(token)
-    except discord.LoginFailure:
-        print("❌ Invalid Discord bot token!")
-    except Exception as e:
-        print(f"❌ Error running bot: {str(e)}")
+async def run_bot(token: str):
+    """Run the bot and the health/metrics server on one event loop until shutdown"""
+    async with bot:
+        # Bind the port first so the host sees the service as up while the gateway connects
+        await health_server.start()
+        try:
+            if shard_leases is not None:
+                # Never run a shard another process is still serving
+                await shard_leases.start()
+            await bot.start(token)
+        finally:
+            if reminder_scheduler is not None:
+                reminder_scheduler.stop()
+            if shard_leases is not None:
+                await shard_leases.stop()
+            await health_server.stop()
+            # Let admitted heavy commands deliver their followups before the dispatcher stops
+            await deferred.close()
+            await outbound.close()
+            task_store.close()
 
-def setup_and_run_bot():
-    """Setup and run the Discord bot - called from app.py for Render deployment"""
-    token = os.getenv('DISCORD_BOT_TOKEN')
-    if not token:
-        print("❌ DISCORD_BOT_TOKEN environment variable not found!")
-        return
+def setup_and_run_bot() -> bool:
+    """
+    Setup and run the Discord bot - the single entry point for worker and web deployments
+    Returns: False if the bot could not start
+    """
+    try:
+        Config.validate_config()
+    except ValueError as e:
+        print(f"❌ Invalid configuration: {e}")
+        print("Please fix the environment variables and restart.")
+        return False
     
+    token = Config.BOT_TOKEN
+    discord.utils.setup_logging()
     try:
-        bot.run(token)
+        asyncio.run(run_bot(token))
+    except KeyboardInterrupt:
+        print("🛑 Shutting down")
     except discord.LoginFailure:
         print("❌ Invalid Discord bot token!")
+        return False
     except Exception as e:
         print(f"❌ Error running bot: {str(e)}")
+        return False
+    return True
+
+# Run the bot
+if __name__ == "__main__":
+    if not setup_and_run_bot():
+        exit(1)
@@ -0,0 +1,199 @@
+"""
+Minimal Prometheus-style metrics.
+
+Every update happens on the bot's event loop thread (commands, reminders and
+the sampler all run there), so counters and histograms are plain number
+updates with no locks. The web server only reads those numbers when it
+renders /metrics; a scrape can at worst see one observation half-applied.
+"""
+import asyncio
+import bisect
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing count, optionally split by labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+                for key, value in list(self.values.items())]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, *label_values):
+        self.values[label_values] = value
+
+
+class Histogram:
+    """Cumulative bucket counts plus sum and count, per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (+Inf last), sum]
+        self.series: Dict[Tuple, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in list(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), list(counts)):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Holds metrics and the samplers that refresh gauges from live state"""
+
+    def __init__(self):
+        self.metrics: List = []
+        self.samplers: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_sampler(self, sampler: Callable[[], None]):
+        """Register a callable run on the event loop each sampling interval (e.g. to set gauges)"""
+        self.samplers.append(sampler)
+
+    def sample(self):
+        for sampler in self.samplers:
+            try:
+                sampler()
+            except Exception as e:
+                print(f"❌ Metrics sampler failed: {e}")
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+COMMAND_LATENCY = REGISTRY.register(Histogram(
+    'taskpilot_command_duration_seconds', 'Command handler latency', ('command', 'kind', 'status')))
+COMMAND_SPANS = REGISTRY.register(Histogram(
+    'taskpilot_command_span_seconds', 'Time spent in each span (parse, store:<operation>, render, send) of a command',
+    ('command', 'span')))
+SLOW_COMMANDS = REGISTRY.register(Counter(
+    'taskpilot_slow_commands_total', 'Commands slower than TRACE_SLOW_MS', ('command', 'kind')))
+REMINDER_RUN_DURATION = REGISTRY.register(Histogram(
+    'taskpilot_reminder_run_duration_seconds', 'Time to build and send one partition\'s reminders',
+    buckets=DURATION_BUCKETS))
+REMINDER_MESSAGES = REGISTRY.register(Counter(
+    'taskpilot_reminder_messages_total', 'Reminder messages sent'))
+REMINDER_TASKS = REGISTRY.register(Counter(
+    'taskpilot_reminder_tasks_total', 'Tasks included in reminder digests'))
+REMINDER_DIGESTS = REGISTRY.register(Counter(
+    'taskpilot_reminder_digests_total', 'Per-user reminder digests by how they were delivered (dm, channel, failed)',
+    ('delivery',)))
+TASKS_ACTIVE = REGISTRY.register(Gauge(
+    'taskpilot_tasks_active', 'Active tasks across loaded partitions'))
+PARTITIONS = REGISTRY.register(Gauge(
+    'taskpilot_partitions', 'Task partitions (guilds or channels) known to the store'))
+GATEWAY_LATENCY = REGISTRY.register(Gauge(
+    'taskpilot_gateway_latency_seconds', 'Discord gateway heartbeat latency'))
+LOOP_LAG = REGISTRY.register(Gauge(
+    'taskpilot_event_loop_lag_seconds', 'How late the last sampler wake-up was'))
+LOOP_LAG_MAX = REGISTRY.register(Gauge(
+    'taskpilot_event_loop_lag_max_seconds', 'Worst event loop lag seen since start'))
+OUTBOUND_QUEUED = REGISTRY.register(Gauge(
+    'taskpilot_outbound_queued', 'Messages waiting in the outbound queue', ('lane',)))
+OUTBOUND_IN_FLIGHT = REGISTRY.register(Gauge(
+    'taskpilot_outbound_in_flight', 'Messages currently being sent'))
+DEFERRED_JOBS = REGISTRY.register(Gauge(
+    'taskpilot_deferred_jobs', 'Deferred slash commands by state (running, queued)', ('state',)))
+DEFERRED_REJECTED = REGISTRY.register(Counter(
+    'taskpilot_deferred_rejected_total', 'Slash commands turned away because the deferred pool was full', ('command',)))
+UPTIME = REGISTRY.register(Gauge(
+    'taskpilot_uptime_seconds', 'Seconds since the process started'))
+STARTUP = REGISTRY.register(Gauge(
+    'taskpilot_startup_seconds', 'Seconds from process start to a startup milestone (ready, first_command)', ('phase',)))
+GATEWAY_READY = REGISTRY.register(Counter(
+    'taskpilot_gateway_ready_total', 'Gateway ready events, including ones after reconnects'))
+
+STARTED_AT = time.monotonic()
+
+
+def uptime() -> float:
+    return time.monotonic() - STARTED_AT
+
+
+def mark_startup(phase: str) -> bool:
+    """Record the first time a startup milestone is reached; False if it was already recorded"""
+    if (phase,) in STARTUP.values:
+        return False
+    STARTUP.set(uptime(), phase)
+    return True
+
+
+async def run_sampler(interval: float = 1.0, registry: Optional[Registry] = None):
+    """Refresh sampled gauges and measure event loop lag as the sleep overshoot"""
+    registry = registry or REGISTRY
+    while True:
+        expected = time.monotonic() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.monotonic() - expected)
+        LOOP_LAG.set(lag)
+        LOOP_LAG_MAX.set(max(LOOP_LAG_MAX.values.get((), 0.0), lag))
+        UPTIME.set(uptime())
+        registry.sample()
@@ -0,0 +1,331 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Dict, Hashable, List, Optional
+import discord
+from config import Config
+import tracing
+
+# Priority lanes: lower numbers go first
+PRIORITY_INTERACTION = 0  # Interaction responses must land within Discord's 3 second window
+PRIORITY_COMMAND = 1      # Replies to prefix commands
+PRIORITY_BULK = 2         # Reminder digests and other background posts
+
+MAX_MESSAGE_LENGTH = 2000
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `capacity` banked"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def is_full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+    def take(self):
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def drain(self, seconds: float):
+        """Push the bucket into debt, e.g. after the server reported a 429"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class _Job:
+    __slots__ = ('priority', 'seq', 'kind', 'target', 'content', 'kwargs', 'coalesce',
+                 'futures', 'enqueued_at', 'retried')
+
+    def __init__(self, priority: int, seq: int, kind: str, target: Any, content: Optional[str],
+                 kwargs: Dict[str, Any], coalesce: bool):
+        self.priority = priority
+        self.seq = seq
+        self.kind = kind
+        self.target = target
+        self.content = content
+        self.kwargs = kwargs
+        self.coalesce = coalesce and content is not None and not kwargs
+        self.futures: List[asyncio.Future] = []
+        self.enqueued_at = time.monotonic()
+        self.retried = False
+
+    def __lt__(self, other: '_Job') -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _Route:
+    """Pending jobs for one Discord route (a channel, or a single interaction)"""
+
+    __slots__ = ('key', 'bucket', 'pending', 'queued')
+
+    def __init__(self, key: Hashable, bucket: Optional[TokenBucket]):
+        self.key = key
+        self.bucket = bucket
+        self.pending: List[_Job] = []
+        self.queued = False
+
+
+class OutboundDispatcher:
+    """
+    Single outbound path for every message the bot sends.
+
+    Jobs are queued per route (channel or interaction) and each route has its
+    own token bucket, so a big reminder run spaces out its posts instead of
+    tripping Discord's per-channel limits and stalling behind 429 retries.
+    A fixed pool of workers bounds concurrency across routes, and routes are
+    served in priority order so interaction replies overtake bulk posts. While
+    a route is backed up, queued plain-text messages that opted in with
+    `coalesce=True` and go to the same target are merged into one. Command
+    replies never are: each goes through its own context and resolves to its
+    own message.
+    """
+
+    def __init__(self, concurrency: int = 8, route_rate: float = 1.0, route_burst: float = 5):
+        self.concurrency = concurrency
+        self.route_rate = route_rate
+        self.route_burst = route_burst
+
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.in_flight = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+        self._routes: Dict[Hashable, _Route] = {}
+        self._ready: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._seq = itertools.count()
+        self._depth = [0, 0, 0]
+        self._closed = False
+
+    @classmethod
+    def from_config(cls) -> 'OutboundDispatcher':
+        return cls(
+            concurrency=Config.OUTBOUND_CONCURRENCY,
+            route_rate=Config.OUTBOUND_ROUTE_RATE,
+            route_burst=Config.OUTBOUND_ROUTE_BURST
+        )
+
+    # ------------------------------------------------------------- public API
+
+    async def send(self, target, content: Optional[str] = None, *, priority: int = PRIORITY_COMMAND,
+                   coalesce: bool = False, **kwargs):
+        """Queue `target.send(...)` (a channel, user or command context) and wait for the result"""
+        channel = getattr(target, 'channel', None) or target
+        route_key = ('channel', getattr(channel, 'id', id(channel)))
+        with tracing.span('send'):
+            return await self._submit(route_key, 'send', target, content, kwargs, priority, coalesce, True)
+
+    async def respond(self, interaction: discord.Interaction, content: Optional[str] = None, **kwargs):
+        """Queue an interaction response (or a followup if it was already answered)"""
+        route_key = ('interaction', interaction.id)
+        with tracing.span('send'):
+            return await self._submit(route_key, 'respond', interaction, content, kwargs,
+                                      PRIORITY_INTERACTION, False, False)
+
+    async def defer(self, interaction: discord.Interaction, *, ephemeral: bool = False):
+        """Queue a deferred ("thinking...") interaction response; the answer follows through respond()"""
+        route_key = ('interaction', interaction.id)
+        with tracing.span('send'):
+            return await self._submit(route_key, 'defer', interaction, None, {'ephemeral': ephemeral},
+                                      PRIORITY_INTERACTION, False, False)
+
+    def stats(self) -> dict:
+        """Queue depth per lane, in-flight sends and delivery latency"""
+        return {
+            'queued': sum(self._depth),
+            'queued_interaction': self._depth[PRIORITY_INTERACTION],
+            'queued_command': self._depth[PRIORITY_COMMAND],
+            'queued_bulk': self._depth[PRIORITY_BULK],
+            'in_flight': self.in_flight,
+            'sent': self.sent,
+            'failed': self.failed,
+            'coalesced': self.coalesced,
+            'routes': len(self._routes),
+            'latency_avg': self.latency_total / self.sent if self.sent else 0.0,
+            'latency_max': self.latency_max,
+        }
+
+    async def close(self):
+        """Stop the workers and fail every queued or in-flight send, so no caller waits forever"""
+        self._closed = True
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        routes, self._routes = self._routes, {}
+        for route in routes.values():
+            for job in route.pending:
+                self._abandon(job)
+            route.pending = []
+        self._depth = [0, 0, 0]
+
+    # -------------------------------------------------------------- internals
+
+    async def _submit(self, route_key: Hashable, kind: str, target, content, kwargs,
+                      priority: int, coalesce: bool, rate_limited: bool):
+        if self._closed:
+            raise RuntimeError("Outbound dispatcher is closed")
+        self._ensure_workers()
+        loop = asyncio.get_running_loop()
+
+        job = _Job(priority, next(self._seq), kind, target, content, kwargs, coalesce)
+        future = loop.create_future()
+        job.futures.append(future)
+
+        route = self._routes.get(route_key)
+        if route is None:
+            bucket = TokenBucket(self.route_rate, self.route_burst) if rate_limited else None
+            route = self._routes[route_key] = _Route(route_key, bucket)
+        heapq.heappush(route.pending, job)
+        self._depth[priority] += 1
+        self._schedule(route)
+
+        return await future
+
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        self._ready = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f'outbound-{i}')
+            for i in range(self.concurrency)
+        ]
+
+    def _schedule(self, route: _Route):
+        """Put a route with pending work on the ready queue (at most once)"""
+        if route.queued or not route.pending:
+            return
+        route.queued = True
+        head = route.pending[0]
+        self._ready.put_nowait((head.priority, head.seq, route.key))
+
+    def _reschedule(self, route: _Route):
+        route.queued = False
+        self._schedule(route)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, route_key = await self._ready.get()
+            route = self._routes[route_key]
+
+            if route.bucket is not None:
+                delay = route.bucket.delay()
+                if delay > 0:
+                    # Park the route without holding a worker; it stays marked as queued
+                    loop.call_later(delay, self._reschedule, route)
+                    continue
+                route.bucket.take()
+
+            job = self._next_job(route)
+            self.in_flight += 1
+            try:
+                await self._deliver(route, job)
+            except asyncio.CancelledError:
+                # Shutting down mid-send: the caller gets an error instead of waiting forever
+                self._abandon(job)
+                raise
+            finally:
+                self.in_flight -= 1
+                route.queued = False
+                if route.pending:
+                    self._schedule(route)
+                elif route.bucket is None or route.bucket.is_full():
+                    # Idle route with a full bucket carries no state worth keeping
+                    self._routes.pop(route.key, None)
+
+    def _next_job(self, route: _Route) -> _Job:
+        job = heapq.heappop(route.pending)
+        self._depth[job.priority] -= 1
+
+        # Merge queued plain-text messages for the same channel into one post
+        while job.coalesce and route.pending:
+            head = route.pending[0]
+            if not head.coalesce or head.priority != job.priority or head.target is not job.target:
+                break
+            if len(job.content) + 1 + len(head.content) > MAX_MESSAGE_LENGTH:
+                break
+            heapq.heappop(route.pending)
+            self._depth[head.priority] -= 1
+            job.content = f"{job.content}\n{head.content}"
+            job.futures.extend(head.futures)
+            job.enqueued_at = min(job.enqueued_at, head.enqueued_at)
+            self.coalesced += 1
+        return job
+
+    async def _deliver(self, route: _Route, job: _Job):
+        try:
+            if job.kind == 'respond':
+                result = await self._respond(job)
+            elif job.kind == 'defer':
+                result = await self._defer(job)
+            else:
+                result = await job.target.send(job.content, **job.kwargs)
+        except discord.HTTPException as e:
+            if e.status == 429 and not job.retried and route.bucket is not None:
+                # Back off the whole route and retry this job once, ahead of newer work
+                job.retried = True
+                route.bucket.drain(getattr(e, 'retry_after', None) or 1.0)
+                heapq.heappush(route.pending, job)
+                self._depth[job.priority] += 1
+                return
+            self._finish(job, exception=e)
+        except Exception as e:
+            self._finish(job, exception=e)
+        else:
+            self._finish(job, result=result)
+
+    async def _respond(self, job: _Job):
+        interaction = job.target
+        if interaction.response.is_done():
+            return await interaction.followup.send(job.content, **job.kwargs)
+        await interaction.response.send_message(job.content, **job.kwargs)
+        return None
+
+    async def _defer(self, job: _Job):
+        interaction = job.target
+        if not interaction.response.is_done():
+            await interaction.response.defer(thinking=True, **job.kwargs)
+        return None
+
+    def _abandon(self, job: _Job):
+        for future in job.futures:
+            if not future.done():
+                future.set_exception(RuntimeError("Outbound dispatcher closed before the message was sent"))
+
+    def _finish(self, job: _Job, result=None, exception: Optional[BaseException] = None):
+        latency = time.monotonic() - job.enqueued_at
+        if exception is None:
+            self.sent += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+        else:
+            self.failed += 1
+        for future in job.futures:
+            if future.done():
+                continue
+            if exception is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exception)
@@ -0,0 +1,232 @@
+import calendar
+import re
+from datetime import date
+from functools import lru_cache
+from typing import FrozenSet, Optional
+
+FORMAT_HELP = ("Use daily, weekdays, weekly, weekly on mon,thu, monthly, monthly on 15 (or last), "
+               "yearly, every 3 days / 2 weeks / 6 months, or a cron rule like 'cron 0 9 * * 1-5'.")
+
+_DAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+_WEEKDAYS = {'monday': 0, 'mon': 0, 'tuesday': 1, 'tue': 1, 'wednesday': 2, 'wed': 2, 'thursday': 3, 'thu': 3,
+             'friday': 4, 'fri': 4, 'saturday': 5, 'sat': 5, 'sunday': 6, 'sun': 6}
+
+_EVERY = re.compile(r'every (\d{1,3}) (day|week|month)s?(?: on (\d{1,2}|last))?')
+_WEEKLY_ON = re.compile(r'(?:weekly on|every) ([a-z, ]+)')
+_MONTHLY_ON = re.compile(r'monthly on (\d{1,2}|last)')
+
+# A cron rule that never matches (e.g. February 31st) gives up after this many days
+CRON_SEARCH_DAYS = 4 * 366
+
+
+def _weekday(day: int) -> int:
+    # date.fromordinal(1) is a Monday
+    return (day - 1) % 7
+
+
+class Recurrence:
+    """
+    A repeat rule for a task. Only the next occurrence of a series is ever
+    stored; next_after() computes the one after it on demand, so no series
+    is expanded ahead of time.
+
+    `text` is the canonical form that is stored with the task (e.g.
+    "weekly on mon,thu"); parse_recurrence() reads it back unchanged.
+    """
+
+    # Time of day (minutes after midnight) that every occurrence is due at, if the rule fixes one
+    minute: Optional[int] = None
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def next_after(self, day: int) -> Optional[int]:
+        """Day ordinal of the first occurrence strictly after `day`, or None if there is none"""
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"Recurrence({self.text!r})"
+
+
+class EveryDays(Recurrence):
+    """Fixed interval of days (weeks are seven days)"""
+
+    def __init__(self, text: str, days: int):
+        super().__init__(text)
+        self.days = days
+
+    def next_after(self, day: int) -> Optional[int]:
+        return day + self.days
+
+
+class OnWeekdays(Recurrence):
+    def __init__(self, text: str, weekdays: FrozenSet[int]):
+        super().__init__(text)
+        self.weekdays = weekdays
+
+    def next_after(self, day: int) -> Optional[int]:
+        for ahead in range(1, 8):
+            if _weekday(day + ahead) in self.weekdays:
+                return day + ahead
+        return None
+
+
+class EveryMonths(Recurrence):
+    """A day of the month (or the last day), every `months` months; short months use their last day"""
+
+    def __init__(self, text: str, months: int, day_of_month: Optional[int]):
+        super().__init__(text)
+        self.months = months
+        self.day_of_month = day_of_month  # None means the last day
+
+    def _in_month(self, year: int, month: int) -> int:
+        last = calendar.monthrange(year, month)[1]
+        return date(year, month, min(self.day_of_month or last, last)).toordinal()
+
+    def next_after(self, day: int) -> Optional[int]:
+        current = date.fromordinal(day)
+        candidate = self._in_month(current.year, current.month)
+        if candidate > day:
+            return candidate
+        index = current.year * 12 + current.month - 1 + self.months
+        return self._in_month(index // 12, index % 12 + 1)
+
+
+class CronRule(Recurrence):
+    """
+    Day-level cron: minute hour day-of-month month day-of-week. As in cron,
+    a day matches either restricted day field when both are restricted.
+    Single minute and hour values set the occurrences' time of day.
+    """
+
+    def __init__(self, text: str, minute: Optional[int], days_of_month: Optional[FrozenSet[int]],
+                 months: Optional[FrozenSet[int]], weekdays: Optional[FrozenSet[int]]):
+        super().__init__(text)
+        self.minute = minute
+        self.days_of_month = days_of_month
+        self.months = months
+        self.weekdays = weekdays
+
+    def _matches(self, day: int) -> bool:
+        current = date.fromordinal(day)
+        if self.months is not None and current.month not in self.months:
+            return False
+        if self.days_of_month is None and self.weekdays is None:
+            return True
+        in_month = self.days_of_month is not None and current.day in self.days_of_month
+        in_week = self.weekdays is not None and _weekday(day) in self.weekdays
+        return in_month or in_week
+
+    def next_after(self, day: int) -> Optional[int]:
+        for candidate in range(day + 1, day + 1 + CRON_SEARCH_DAYS):
+            if self._matches(candidate):
+                return candidate
+        return None
+
+
+def parse_recurrence(text: str, first_day: Optional[int] = None) -> Recurrence:
+    """
+    Parse a repeat rule. Rules anchored to the first occurrence ("weekly",
+    "monthly", "yearly") need `first_day` and come back in a canonical form
+    that no longer does ("weekly on fri"). Raises ValueError for anything else.
+    """
+    return _parse(' '.join(text.lower().split()), first_day)
+
+
+@lru_cache(maxsize=1024)
+def _parse(text: str, first_day: Optional[int]) -> Recurrence:
+    if text in ('daily', 'every day'):
+        return EveryDays('daily', 1)
+    if text in ('weekdays', 'every weekday'):
+        return OnWeekdays('weekly on mon,tue,wed,thu,fri', frozenset(range(5)))
+    if text in ('weekly', 'every week', 'monthly', 'every month', 'yearly', 'every year'):
+        if first_day is None:
+            raise ValueError(f"'{text}' needs the date of the first occurrence.")
+        if text in ('weekly', 'every week'):
+            return _parse(f"weekly on {_DAY_NAMES[_weekday(first_day)]}", None)
+        day_of_month = date.fromordinal(first_day).day
+        if text in ('monthly', 'every month'):
+            return _parse(f"monthly on {day_of_month}", None)
+        return _parse(f"every 12 months on {day_of_month}", None)
+    if text.startswith('cron '):
+        return _parse_cron(text)
+
+    match = _EVERY.fullmatch(text)
+    if match:
+        count, unit, on = int(match.group(1)), match.group(2), match.group(3)
+        if count < 1:
+            raise ValueError("A repeat interval must be at least 1.")
+        if unit == 'month':
+            on = on or str(date.fromordinal(first_day).day if first_day else '')
+            day_of_month = _day_of_month(on, text)
+            prefix = 'monthly' if count == 1 else f"every {count} months"
+            return EveryMonths(f"{prefix} on {day_of_month or 'last'}", count, day_of_month)
+        if on:
+            raise ValueError(f"'{text}': only monthly rules take 'on <day>'.")
+        days = count * (7 if unit == 'week' else 1)
+        return EveryDays('daily' if days == 1 else f"every {days} days", days)
+
+    match = _MONTHLY_ON.fullmatch(text)
+    if match:
+        day_of_month = _day_of_month(match.group(1), text)
+        return EveryMonths(f"monthly on {day_of_month or 'last'}", 1, day_of_month)
+
+    match = _WEEKLY_ON.fullmatch(text)
+    if match:
+        names = [name for name in re.split(r'[ ,]+', match.group(1)) if name and name != 'and']
+        if names and all(name in _WEEKDAYS for name in names):
+            weekdays = frozenset(_WEEKDAYS[name] for name in names)
+            return OnWeekdays(f"weekly on {','.join(_DAY_NAMES[d] for d in sorted(weekdays))}", weekdays)
+
+    raise ValueError(f"Unknown repeat rule '{text}'. {FORMAT_HELP}")
+
+
+def _day_of_month(value: str, text: str) -> Optional[int]:
+    if value == 'last':
+        return None
+    if not value.isdigit() or not 1 <= int(value) <= 31:
+        raise ValueError(f"'{text}' needs a day of the month between 1 and 31 (or 'last').")
+    return int(value)
+
+
+def _parse_cron(text: str) -> Recurrence:
+    fields = text.split()[1:]
+    if len(fields) != 5:
+        raise ValueError(f"'{text}': cron rules have five fields (minute hour day month weekday).")
+    minute, hour, days_of_month, months, weekdays = (
+        _cron_field(value, low, high, text)
+        for value, (low, high) in zip(fields, ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7)))
+    )
+    if weekdays is not None:
+        # Cron counts Sunday as 0 (or 7); weekdays here count from Monday = 0
+        weekdays = frozenset((value - 1) % 7 for value in weekdays)
+    time_of_day = None
+    if minute is not None and hour is not None and len(minute) == 1 and len(hour) == 1:
+        time_of_day = next(iter(hour)) * 60 + next(iter(minute))
+    rule = CronRule('cron ' + ' '.join(fields), time_of_day, days_of_month, months, weekdays)
+    # Four years cover every calendar combination, leap days included
+    if rule.next_after(date(2000, 1, 1).toordinal()) is None:
+        raise ValueError(f"'{text}' never matches a date.")
+    return rule
+
+
+def _cron_field(value: str, low: int, high: int, text: str) -> Optional[FrozenSet[int]]:
+    """Values allowed by one cron field, or None for '*' (any)"""
+    if value == '*':
+        return None
+    allowed = set()
+    try:
+        for part in value.split(','):
+            spec, _, step = part.partition('/')
+            if spec == '*':
+                first, last = low, high
+            elif '-' in spec:
+                first, last = (int(bound) for bound in spec.split('-', 1))
+            else:
+                first = last = int(spec)
+            if not low <= first <= last <= high:
+                raise ValueError
+            allowed.update(range(first, last + 1, int(step) if step else 1))
+    except ValueError:
+        raise ValueError(f"'{text}': '{value}' is not a valid cron field ({low}-{high}).") from None
+    return frozenset(allowed)
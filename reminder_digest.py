@@ -0,0 +1,124 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import discord
+from deadline_parser import format_time
+from task_record import TaskRecord
+
+# Discord limits for one embed and one plain message
+FIELD_LIMIT = 1024
+EMBED_FIELDS = 25
+EMBED_TOTAL = 6000
+MESSAGE_LIMIT = 2000
+
+Buckets = Tuple[List[TaskRecord], List[TaskRecord], List[TaskRecord]]
+
+
+def chunk_entries(entries: Iterable[str], limit: int, separator: str = '\n') -> List[str]:
+    """
+    Join entries into as few chunks of at most `limit` characters as
+    possible. Entries are never split across chunks; an entry that is too
+    long on its own is cut to fit.
+    """
+    chunks = []
+    current = ''
+    for entry in entries:
+        if len(entry) > limit:
+            entry = entry[:limit - 1] + '…'
+        if current and len(current) + len(separator) + len(entry) > limit:
+            chunks.append(current)
+            current = ''
+        current = f"{current}{separator}{entry}" if current else entry
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_embeds(title: str, description: str, color: int, sections: Sequence[Tuple[str, List[str]]],
+                 footer: Optional[str] = None) -> List[discord.Embed]:
+    """
+    Lay out (field name, entries) sections over as many embeds as it takes.
+    A section that does not fit in one field continues in the next field,
+    and once an embed is full the rest goes into continuation embeds, so
+    nothing is dropped.
+    """
+    embeds: List[discord.Embed] = []
+    embed = None
+    size = 0
+    for name, entries in sections:
+        for index, value in enumerate(chunk_entries(entries, FIELD_LIMIT)):
+            field_name = name if index == 0 else f"{name} (continued)"
+            cost = len(field_name) + len(value)
+            if embed is None or len(embed.fields) >= EMBED_FIELDS or size + cost > EMBED_TOTAL:
+                embed = discord.Embed(
+                    title=title if not embeds else f"{title} (continued)",
+                    description=description if not embeds else None,
+                    color=color
+                )
+                embeds.append(embed)
+                size = len(embed.title) + len(embed.description or '') + len(footer or '')
+            embed.add_field(name=field_name, value=value, inline=False)
+            size += cost
+    if footer and embeds:
+        embeds[-1].set_footer(text=footer)
+    return embeds
+
+
+def digest_color(overdue: List[TaskRecord], due_today: List[TaskRecord]) -> int:
+    return 0xe74c3c if overdue else 0xf39c12 if due_today else 0x3498db
+
+
+def task_entries(buckets: Buckets, today: date, mention: bool) -> List[Tuple[str, List[str]]]:
+    """Digest sections for the three reminder buckets; `mention` adds the creator to each entry"""
+    overdue, due_today, due_tomorrow = buckets
+    sections = []
+    if overdue:
+        sections.append(("🚨 OVERDUE TASKS", [
+            _entry("🚨", task, f"Overdue by {today.toordinal() - task.deadline_day} days", mention)
+            for task in overdue
+        ]))
+    if due_today:
+        sections.append(("🔥 DUE TODAY", [
+            _entry("🔥", task, f"Due TODAY{_at_time(task)}!", mention) for task in due_today
+        ]))
+    if due_tomorrow:
+        sections.append(("⏰ DUE TOMORROW", [
+            _entry("⏰", task, f"Due tomorrow{_at_time(task)}", mention) for task in due_tomorrow
+        ]))
+    return sections
+
+
+def ping_messages(critical: List[TaskRecord], today: date) -> List[str]:
+    """The urgent-task mention list, split over as many messages as it needs"""
+    lines = []
+    for task in critical:
+        status = "OVERDUE" if task.deadline_day < today.toordinal() else "DUE TODAY"
+        lines.append(f"<@{task.creator_id}> - Task #{task.id}: {task.description} ({status})")
+    header = "🔔 **URGENT TASK REMINDERS** 🔔"
+    return chunk_entries([header] + lines, MESSAGE_LIMIT)
+
+
+def group_by_creator(buckets: Buckets) -> Dict[int, Buckets]:
+    """Split the reminder buckets into one set of buckets per task creator, keeping their order"""
+    grouped: Dict[int, Buckets] = {}
+    for position, tasks in enumerate(buckets):
+        for task in tasks:
+            user_buckets = grouped.get(task.creator_id)
+            if user_buckets is None:
+                user_buckets = grouped[task.creator_id] = ([], [], [])
+            user_buckets[position].append(task)
+    return grouped
+
+
+def _entry(icon: str, task: TaskRecord, status: str, mention: bool) -> str:
+    owner = f"👤 <@{task.creator_id}> - " if mention else ""
+    return f"{icon} **Task #{task.id}**: {task.description}{_repeats(task)}\n   {owner}{status}\n"
+
+
+def _at_time(task: TaskRecord) -> str:
+    """Suffix like ' at 17:00' for tasks due at a time of day"""
+    return f" at {format_time(task.due_minute)}" if task.due_minute is not None else ""
+
+
+def _repeats(task: TaskRecord) -> str:
+    """Marker for the current occurrence of a recurring task"""
+    return " 🔁" if task.recurrence else ""
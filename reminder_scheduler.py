@@ -1,154 +1,245 @@
 import asyncio
 import discord
-from datetime import datetime, time, date
-from task_manager import TaskManager
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 from config import Config
+from guild_store import TaskStore, TaskPartition
+from schedule_engine import ScheduleEngine, DailySchedule
+from outbound import OutboundDispatcher, PRIORITY_BULK
+from reminder_digest import Buckets, build_embeds, digest_color, group_by_creator, ping_messages, task_entries
+import metrics
 
 class ReminderScheduler:
     """Handles daily reminder scheduling and sending"""
     
-    def __init__(self, bot, task_manager: TaskManager):
+    def __init__(self, bot, task_store: TaskStore, outbound: Optional[OutboundDispatcher] = None):
         self.bot = bot
-        self.task_manager = task_manager
+        self.task_store = task_store
+        self.outbound = outbound
+        self.engine = ScheduleEngine()
         self.is_running = False
     
+    def schedule_partition(self, partition: TaskPartition):
+        """Register (or update) the daily reminder schedule for one partition"""
+        hour, minute, tz_name = partition.reminder_time
+        
+        async def fire():
+            await self.send_partition_reminders(partition)
+        
+        async def roll_over():
+            await self.roll_over_partition(partition)
+        
+        schedule = DailySchedule(partition.key, hour, minute, tz_name, fire)
+        self.engine.add(schedule)
+        # Shift the reminder buckets at local midnight so the reminder itself only reads them
+        self.engine.add(DailySchedule(('rollover', partition.key), 0, 0, tz_name, roll_over))
+        return schedule.next_fire_after(datetime.now(timezone.utc))
+    
+    async def roll_over_partition(self, partition: TaskPartition):
+        """
+        Move a partition's overdue/today/tomorrow buckets to the new local day
+        and archive tasks overdue for longer than OVERDUE_CLEANUP_DAYS
+        """
+        # Partitions nobody has used yet build their buckets on first read instead
+        if not partition.is_loaded or not self.task_store.owns(partition.guild_id):
+            return
+        today = datetime.now(ZoneInfo(partition.reminder_time[2])).date()
+        async with partition.lock:
+            await partition.run(partition.tasks.roll_over, today)
+            expired = await partition.run(partition.tasks.cleanup_overdue_tasks, Config.OVERDUE_CLEANUP_DAYS)
+        if expired:
+            print(f"🗄️ Archived {expired} expired task(s) for guild {partition.guild_id}")
+    
     async def start_daily_reminders(self):
         """Start the daily reminder loop"""
         self.is_running = True
-        print("🔔 Daily reminder scheduler started")
         
-        while self.is_running:
-            try:
-                # Calculate time until next reminder
-                now = datetime.now()
-                reminder_time = datetime.combine(now.date(), time(Config.REMINDER_HOUR, Config.REMINDER_MINUTE))
-                
-                # If reminder time has passed today, schedule for tomorrow
-                if now >= reminder_time:
-                    reminder_time = reminder_time.replace(day=reminder_time.day + 1)
-                
-                # Calculate sleep duration
-                sleep_seconds = (reminder_time - now).total_seconds()
-                
-                print(f"⏰ Next reminder scheduled for: {reminder_time.strftime('%Y-%m-%d %H:%M')}")
-                print(f"⏳ Sleeping for {sleep_seconds/3600:.1f} hours")
-                
-                # Sleep until reminder time
-                await asyncio.sleep(sleep_seconds)
-                
-                # Send daily reminders
-                await self.send_daily_reminders()
-                
-            except Exception as e:
-                print(f"❌ Error in reminder scheduler: {str(e)}")
-                # Sleep for 1 hour before retrying
-                await asyncio.sleep(3600)
+        scheduled = 0
+        for partition in self.task_store.partitions():
+            self.schedule_partition(partition)
+            scheduled += 1
+        # Guilds that show up later get their schedule as soon as their partition is created
+        self.task_store.on_partition_created = self.schedule_partition
+        
+        print(f"🔔 Daily reminder scheduler started ({scheduled} schedule(s))")
+        next_fire = self.engine.next_fire_time()
+        if next_fire:
+            print(f"⏰ Next reminder scheduled for: {next_fire.strftime('%Y-%m-%d %H:%M')} UTC")
+        
+        await self.engine.run()
     
     async def send_daily_reminders(self):
-        """Send daily reminder messages"""
+        """Send daily reminder messages for every partition"""
+        for partition in self.task_store.partitions():
+            await self.send_partition_reminders(partition)
+    
+    async def send_partition_reminders(self, partition: TaskPartition):
+        """Send daily reminder messages for one guild/channel partition"""
         try:
-            # Get tasks that need reminders
-            reminder_tasks = self.task_manager.get_tasks_for_reminder()
-            
-            if not reminder_tasks:
-                print("📝 No tasks requiring reminders today")
+            # In sharded mode another process may own this guild (or took over its shard)
+            if not self.task_store.owns(partition.guild_id):
                 return
             
-            # Get reminder channel
-            channel = self.bot.get_channel(Config.REMINDER_CHANNEL_ID)
-            if not channel:
-                print(f"❌ Reminder channel {Config.REMINDER_CHANNEL_ID} not found")
+            # DM digests only need the channel as a fallback
+            channel_id = partition.reminder_channel_id
+            if not channel_id and partition.reminder_delivery != 'dm':
                 return
             
-            # Group tasks by urgency
-            overdue_tasks = []
-            due_today = []
-            due_tomorrow = []
-            
-            today = date.today()
-            
-            for task_id, task in reminder_tasks.items():
-                days_until_deadline = (task['deadline'] - today).days
-                
-                if days_until_deadline < 0:
-                    overdue_tasks.append((task_id, task))
-                elif days_until_deadline == 0:
-                    due_today.append((task_id, task))
-                elif days_until_deadline == 1:
-                    due_tomorrow.append((task_id, task))
-            
-            # Send reminder message
-            embed = discord.Embed(
-                title="📅 Daily Task Reminders",
-                description=f"Good morning! Here are your task reminders for {today.strftime('%A, %B %d, %Y')}",
-                color=0xe74c3c if overdue_tasks else 0xf39c12 if due_today else 0x3498db
-            )
-            
-            # Add overdue tasks
-            if overdue_tasks:
-                overdue_text = ""
-                for task_id, task in overdue_tasks:
-                    days_overdue = (today - task['deadline']).days
-                    user_mention = f"<@{task['creator_id']}>"
-                    overdue_text += f"🚨 **Task #{task_id}**: {task['description']}\n"
-                    overdue_text += f"   👤 {user_mention} - Overdue by {days_overdue} days\n\n"
+            started_at = time.perf_counter()
+            # The lock only covers reading the tasks; delivery (a DM fan-out with
+            # rate-limit waits) must not block the guild's commands
+            async with partition.lock:
+                today, buckets, digests = await self._collect_reminders(partition)
+            await self._send_reminders(partition, channel_id, today, buckets, digests)
+            metrics.REMINDER_RUN_DURATION.observe(time.perf_counter() - started_at)
                 
-                embed.add_field(
-                    name="🚨 OVERDUE TASKS",
-                    value=overdue_text[:1024],  # Discord field limit
-                    inline=False
+        except Exception as e:
+            print(f"❌ Error sending daily reminders for guild {partition.guild_id}: {str(e)}")
+    
+    async def _collect_reminders(self, partition: TaskPartition) -> Tuple[date, Buckets, Optional[Dict[int, Buckets]]]:
+        """Today's reminder buckets, plus one set per task creator for DM delivery"""
+        # "Today" is the partition's local date, not the server's
+        today = datetime.now(ZoneInfo(partition.reminder_time[2])).date()
+        
+        # Tasks that need reminders, already grouped by urgency
+        buckets = await partition.run(partition.tasks.get_reminder_buckets, today)
+        digests = group_by_creator(buckets) if partition.reminder_delivery == 'dm' else None
+        return today, buckets, digests
+    
+    async def _send_reminders(self, partition: TaskPartition, channel_id: int, today: date, buckets: Buckets,
+                              digests: Optional[Dict[int, Buckets]]):
+        if not any(buckets):
+            print(f"📝 No tasks requiring reminders today for guild {partition.guild_id}")
+            return
+        
+        channel = self._reminder_channel(partition, channel_id)
+        if channel is None and partition.reminder_delivery != 'dm':
+            return
+        
+        metrics.REMINDER_TASKS.inc(amount=sum(len(tasks) for tasks in buckets))
+        
+        if digests is not None:
+            await self._send_user_digests(partition, channel, today, digests)
+            return
+        
+        await self._send_channel_digest(channel, today, buckets)
+        print(f"✅ Daily reminders sent to {channel.name}")
+    
+    def _reminder_channel(self, partition: TaskPartition, channel_id: int):
+        """The partition's reminder channel, or None if it is missing or belongs to another guild"""
+        if not channel_id:
+            return None
+        channel = self.bot.get_channel(channel_id)
+        if not channel:
+            print(f"❌ Reminder channel {channel_id} not found")
+            return None
+        
+        # Never post one guild's tasks into another guild's channel
+        channel_guild = getattr(channel, 'guild', None)
+        if channel_guild is not None and channel_guild.id != partition.guild_id:
+            print(f"❌ Reminder channel {channel_id} does not belong to guild {partition.guild_id}")
+            return None
+        return channel
+    
+    async def _send_channel_digest(self, channel, today: date, buckets: Buckets, description: Optional[str] = None):
+        """Post the shared digest, continued over extra fields and messages rather than truncated"""
+        overdue_tasks, due_today, _ = buckets
+        embeds = build_embeds(
+            "📅 Daily Task Reminders",
+            description or f"Good morning! Here are your task reminders for {today.strftime('%A, %B %d, %Y')}",
+            digest_color(overdue_tasks, due_today),
+            task_entries(buckets, today, mention=True),
+            footer="Use !listtasks to see all tasks • !complete <id> to mark as done"
+        )
+        for embed in embeds:
+            await self._send(channel, embed=embed)
+        
+        # Send individual pings for critical tasks (overdue or due today)
+        critical_tasks = overdue_tasks + due_today
+        if critical_tasks:
+            for message in ping_messages(critical_tasks, today):
+                await self._send(channel, message)
+    
+    async def _send_user_digests(self, partition: TaskPartition, channel, today: date, digests: Dict[int, Buckets]):
+        """
+        DM every task creator a digest of their own tasks. A fixed number of
+        workers share one iterator over the users, which bounds how many
+        digests are in flight however many users there are. Users who cannot
+        be reached by DM get their tasks posted in the reminder channel.
+        """
+        guild_name = getattr(getattr(channel, 'guild', None), 'name', None)
+        description = f"Here are your task reminders for {today.strftime('%A, %B %d, %Y')}"
+        if guild_name:
+            description += f" in **{guild_name}**"
+        
+        pending = iter(digests.items())
+        unreachable: List[int] = []
+        
+        async def worker():
+            for user_id, user_buckets in pending:
+                embeds = build_embeds(
+                    "📅 Your Task Reminders",
+                    description,
+                    digest_color(user_buckets[0], user_buckets[1]),
+                    task_entries(user_buckets, today, mention=False),
+                    footer="Use /mytasks to see all your tasks • /complete <id> to mark as done"
                 )
-            
-            # Add tasks due today
-            if due_today:
-                today_text = ""
-                for task_id, task in due_today:
-                    user_mention = f"<@{task['creator_id']}>"
-                    today_text += f"🔥 **Task #{task_id}**: {task['description']}\n"
-                    today_text += f"   👤 {user_mention} - Due TODAY!\n\n"
-                
-                embed.add_field(
-                    name="🔥 DUE TODAY",
-                    value=today_text[:1024],
-                    inline=False
+                if await self._send_dm(user_id, embeds):
+                    metrics.REMINDER_DIGESTS.inc('dm')
+                else:
+                    unreachable.append(user_id)
+        
+        workers = min(Config.REMINDER_DM_CONCURRENCY, len(digests))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        
+        if unreachable:
+            if channel is None:
+                metrics.REMINDER_DIGESTS.inc('failed', amount=len(unreachable))
+                print(f"❌ Could not DM {len(unreachable)} user(s) in guild {partition.guild_id} and no reminder channel is set")
+            else:
+                metrics.REMINDER_DIGESTS.inc('channel', amount=len(unreachable))
+                unreachable_buckets = tuple(
+                    [task for user_id in unreachable for task in digests[user_id][position]]
+                    for position in range(3)
                 )
-            
-            # Add tasks due tomorrow
-            if due_tomorrow:
-                tomorrow_text = ""
-                for task_id, task in due_tomorrow:
-                    user_mention = f"<@{task['creator_id']}>"
-                    tomorrow_text += f"⏰ **Task #{task_id}**: {task['description']}\n"
-                    tomorrow_text += f"   👤 {user_mention} - Due tomorrow\n\n"
-                
-                embed.add_field(
-                    name="⏰ DUE TOMORROW",
-                    value=tomorrow_text[:1024],
-                    inline=False
+                await self._send_channel_digest(
+                    channel, today, unreachable_buckets,
+                    description="These reminders could not be delivered by DM (are your DMs open for this server?)"
                 )
-            
-            # Add footer with helpful commands
-            embed.set_footer(text="Use !listtasks to see all tasks • !complete <id> to mark as done")
-            
-            await channel.send(embed=embed)
-            
-            # Send individual pings for critical tasks (overdue or due today)
-            critical_tasks = overdue_tasks + due_today
-            if critical_tasks:
-                ping_message = "🔔 **URGENT TASK REMINDERS** 🔔\n"
-                for task_id, task in critical_tasks:
-                    user_mention = f"<@{task['creator_id']}>"
-                    status = "OVERDUE" if (today - task['deadline']).days > 0 else "DUE TODAY"
-                    ping_message += f"{user_mention} - Task #{task_id}: {task['description']} ({status})\n"
-                
-                await channel.send(ping_message)
-            
-            print(f"✅ Daily reminders sent to {channel.name}")
-            
-        except Exception as e:
-            print(f"❌ Error sending daily reminders: {str(e)}")
+        
+        print(f"✅ Daily reminders sent to {len(digests) - len(unreachable)} user(s) by DM for guild {partition.guild_id}"
+              + (f", {len(unreachable)} in the channel" if unreachable and channel is not None else ""))
+    
+    async def _send_dm(self, user_id: int, embeds: List[discord.Embed]) -> bool:
+        """
+        Send one user's digest by DM; False unless every message of it was
+        delivered, so a digest cut off part way goes to the channel in full
+        """
+        try:
+            user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+        except discord.HTTPException:
+            return False
+        
+        for embed in embeds:
+            try:
+                await self._send(user, embed=embed)
+            except discord.HTTPException:
+                # Forbidden means the user has DMs from this server turned off
+                return False
+        return True
+    
+    async def _send(self, channel, content: Optional[str] = None, **kwargs):
+        """Send through the outbound dispatcher's bulk lane when one is configured"""
+        metrics.REMINDER_MESSAGES.inc()
+        if self.outbound is None:
+            return await channel.send(content, **kwargs)
+        return await self.outbound.send(channel, content, priority=PRIORITY_BULK, coalesce=False, **kwargs)
     
     def stop(self):
         """Stop the reminder scheduler"""
         self.is_running = False
+        self.engine.stop()
         print("🛑 Daily reminder scheduler stopped")
+
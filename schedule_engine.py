@@ -0,0 +1,180 @@
+import asyncio
+import heapq
+import itertools
+import time as time_module
+from datetime import datetime, date, time, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+
+class DailySchedule:
+    """A callback that fires once a day at a wall-clock time in a given timezone"""
+
+    def __init__(self, key: Hashable, hour: int, minute: int, tz_name: str,
+                 callback: Callable[[], Awaitable[None]]):
+        self.key = key
+        self.hour = hour
+        self.minute = minute
+        self.tz = ZoneInfo(tz_name)
+        self.callback = callback
+
+    def next_fire_after(self, after: datetime) -> datetime:
+        """
+        First fire time strictly after `after` (an aware datetime), in UTC.
+
+        Days are stepped as calendar dates, so month and year ends need no
+        special casing. A wall-clock time skipped by a DST jump fires at the
+        first instant after the gap; a repeated one fires on its first pass.
+        """
+        day = after.astimezone(self.tz).date()
+        while True:
+            candidate = self._at(day)
+            if candidate > after:
+                return candidate
+            day += timedelta(days=1)
+
+    def _at(self, day: date) -> datetime:
+        local = datetime.combine(day, time(self.hour, self.minute), tzinfo=self.tz)
+        # Round-tripping through UTC normalises times that fall in a DST gap
+        return local.astimezone(timezone.utc)
+
+
+class ScheduleEngine:
+    """
+    Runs many independent daily schedules from a single loop.
+
+    Upcoming fire times live in a min-heap, so the loop only ever sleeps until
+    the earliest one. Schedules can be added, replaced or removed while the loop
+    is running; stale heap entries are skipped lazily. Sleeps are capped at
+    `max_sleep` seconds and compared against the monotonic clock, so a wall-clock
+    jump (NTP step, suspend/resume) is noticed: schedules that came due during
+    the jump fire once, then the heap is rebuilt. A schedule is never queued at
+    or before its last run, so a backward jump cannot fire the same run twice.
+    """
+
+    def __init__(self, max_sleep: float = 300, jump_tolerance: float = 60):
+        self.max_sleep = max_sleep
+        self.jump_tolerance = jump_tolerance
+        self.is_running = False
+        self._heap: List[Tuple[float, int, Hashable, int]] = []
+        self._schedules: Dict[Hashable, Tuple[DailySchedule, int]] = {}
+        self._last_fired: Dict[Hashable, datetime] = {}
+        self._generation = itertools.count()
+        self._tiebreak = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._running_tasks = set()
+
+    def add(self, schedule: DailySchedule, now: Optional[datetime] = None):
+        """Add or replace a schedule; takes effect without restarting the loop"""
+        generation = next(self._generation)
+        self._schedules[schedule.key] = (schedule, generation)
+        self._push(schedule, generation, now or _utcnow())
+        self._wakeup.set()
+
+    def remove(self, key: Hashable):
+        self._schedules.pop(key, None)
+        self._last_fired.pop(key, None)
+        self._wakeup.set()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._schedules
+
+    def __len__(self) -> int:
+        return len(self._schedules)
+
+    def next_fire_time(self) -> Optional[datetime]:
+        """Earliest pending fire time, if any"""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return datetime.fromtimestamp(self._heap[0][0], tz=timezone.utc)
+
+    def _push(self, schedule: DailySchedule, generation: int, after: datetime):
+        """Queue the schedule's first fire time after `after`, and after its last run"""
+        last_fired = self._last_fired.get(schedule.key)
+        if last_fired is not None and last_fired > after:
+            after = last_fired
+        fire_at = schedule.next_fire_after(after)
+        heapq.heappush(self._heap, (fire_at.timestamp(), next(self._tiebreak), schedule.key, generation))
+
+    def _drop_stale(self):
+        while self._heap:
+            _, _, key, generation = self._heap[0]
+            current = self._schedules.get(key)
+            if current is not None and current[1] == generation:
+                return
+            heapq.heappop(self._heap)
+
+    def _resync(self) -> int:
+        """
+        Recompute every schedule's next fire time from the current wall clock.
+        Entries that came due during the jump (or a suspend) fire once first.
+        Returns: how many were fired
+        """
+        now = _utcnow()
+        fired = 0
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now.timestamp():
+            self._fire_next()
+            fired += 1
+            self._drop_stale()
+
+        self._heap = []
+        for schedule, generation in self._schedules.values():
+            self._push(schedule, generation, now)
+        return fired
+
+    async def run(self):
+        """Fire schedules as they come due until stop() is called"""
+        self.is_running = True
+        while self.is_running:
+            self._drop_stale()
+            if self._heap:
+                delay = self._heap[0][0] - time_module.time()
+                if delay <= 0:
+                    self._fire_next()
+                    continue
+                delay = min(delay, self.max_sleep)
+            else:
+                delay = self.max_sleep
+
+            wall_before = time_module.time()
+            mono_before = time_module.monotonic()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+            drift = (time_module.time() - wall_before) - (time_module.monotonic() - mono_before)
+            if abs(drift) > self.jump_tolerance:
+                fired = self._resync()
+                print(f"⏱️ Wall clock jumped by {drift:+.0f}s, resynced schedules ({fired} missed run(s) fired)")
+
+    def _fire_next(self):
+        fire_ts, _, key, generation = heapq.heappop(self._heap)
+        schedule, _ = self._schedules[key]
+
+        # Schedule the following occurrence before running, so a slow callback
+        # cannot delay other schedules
+        fired_at = datetime.fromtimestamp(fire_ts, tz=timezone.utc)
+        self._last_fired[key] = fired_at
+        self._push(schedule, generation, _utcnow())
+
+        task = asyncio.create_task(self._invoke(schedule))
+        self._running_tasks.add(task)
+        task.add_done_callback(self._running_tasks.discard)
+
+    async def _invoke(self, schedule: DailySchedule):
+        try:
+            await schedule.callback()
+        except Exception as e:
+            print(f"❌ Error in scheduled job {schedule.key}: {str(e)}")
+
+    def stop(self):
+        self.is_running = False
+        self._wakeup.set()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
@@ -0,0 +1,109 @@
+import bisect
+import heapq
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+_TOKEN = re.compile(r'\w+')
+
+# A short prefix such as "a" could expand to most of the vocabulary; only the
+# first terms in sort order are used so query cost stays bounded (see broad_terms)
+MAX_PREFIX_EXPANSION = 256
+
+
+def tokenize(text: str) -> List[str]:
+    """Case-folded word tokens, de-duplicated, in order of first appearance"""
+    return list(dict.fromkeys(_TOKEN.findall(text.casefold())))
+
+
+class SearchIndex:
+    """
+    Inverted index from description tokens to task IDs.
+
+    Maintained incrementally on every add/remove. Every query term is matched
+    as a prefix against a sorted vocabulary, so "deplo" finds "deploy" and
+    "deployment"; a task must match all terms, and whole-word matches rank
+    above prefix-only matches. Query cost depends on the postings of the
+    terms searched, not on the total number of tasks.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Set[int]] = {}
+        self.vocabulary: List[str] = []  # Sorted tokens, for prefix lookups
+        self._task_tokens: Dict[int, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._task_tokens)
+
+    def add(self, task_id: int, text: str):
+        tokens = tuple(tokenize(text))
+        self._task_tokens[task_id] = tokens
+        for token in tokens:
+            task_ids = self.postings.get(token)
+            if task_ids is None:
+                task_ids = self.postings[token] = set()
+                bisect.insort(self.vocabulary, token)
+            task_ids.add(task_id)
+
+    def remove(self, task_id: int):
+        for token in self._task_tokens.pop(task_id, ()):
+            task_ids = self.postings[token]
+            task_ids.discard(task_id)
+            if not task_ids:
+                del self.postings[token]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+
+    def _expand(self, prefix: str) -> List[Set[int]]:
+        """Posting sets of every vocabulary token starting with `prefix`"""
+        matches = []
+        position = bisect.bisect_left(self.vocabulary, prefix)
+        while position < len(self.vocabulary) and len(matches) < MAX_PREFIX_EXPANSION:
+            token = self.vocabulary[position]
+            if not token.startswith(prefix):
+                break
+            matches.append(self.postings[token])
+            position += 1
+        return matches
+
+    def broad_terms(self, query: str) -> List[str]:
+        """Terms of `query` that match more than MAX_PREFIX_EXPANSION words, so search() only used some of them"""
+        broad = []
+        for term in tokenize(query):
+            position = bisect.bisect_left(self.vocabulary, term) + MAX_PREFIX_EXPANSION
+            if position < len(self.vocabulary) and self.vocabulary[position].startswith(term):
+                broad.append(term)
+        return broad
+
+    def search(self, query: str, rank_key=None, limit: Optional[int] = 50) -> List[int]:
+        """
+        Task IDs matching every term of `query`, best first
+        rank_key: optional task_id -> sortable value used to break score ties (e.g. deadline)
+        limit: most IDs returned, or None for every match
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        expanded = [(term, self._expand(term)) for term in terms]
+        if any(not postings for _, postings in expanded):
+            return []
+
+        # Start from the most selective term and filter the survivors through the rest
+        expanded.sort(key=lambda item: sum(len(task_ids) for task_ids in item[1]))
+        _, first = expanded[0]
+        candidates: Set[int] = first[0] if len(first) == 1 else set().union(*first)
+        for _, postings in expanded[1:]:
+            if len(postings) == 1:
+                candidates = candidates & postings[0]
+            else:
+                candidates = {task_id for task_id in candidates
+                              if any(task_id in task_ids for task_ids in postings)}
+            if not candidates:
+                return []
+
+        def key(task_id: int):
+            exact = sum(1 for term in terms if task_id in self.postings.get(term, ()))
+            return (-exact, rank_key(task_id) if rank_key else 0, task_id)
+
+        if limit is None:
+            return sorted(candidates, key=key)
+        return heapq.nsmallest(limit, candidates, key=key)
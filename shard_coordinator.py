@@ -0,0 +1,317 @@
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def shard_for_guild(guild_id: Optional[int], shard_count: int) -> int:
+    """Discord's shard routing: (guild_id >> 22) % shard_count; DMs belong to shard 0"""
+    if not guild_id or shard_count <= 1:
+        return 0
+    return (guild_id >> 22) % shard_count
+
+
+def parse_shard_ids(text: str, shard_count: int) -> List[int]:
+    """Parse "0-3,6" into shard IDs; an empty string means every shard"""
+    if not text.strip():
+        return list(range(shard_count))
+    shard_ids = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        first, last = int(start), int(end or start)
+        if first > last or first < 0 or last >= shard_count:
+            raise ValueError(f"Shard range '{part}' is outside 0-{shard_count - 1}")
+        shard_ids.update(range(first, last + 1))
+    return sorted(shard_ids)
+
+
+def make_owner_id() -> str:
+    """Identity of this process in lease tables"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class ShardCoordinator:
+    """
+    Cross-process coordination: time-limited leases on shards and
+    collision-free ID reservation.
+
+    A lease is held by one owner until it expires or is released; the holder
+    must renew it well before expiry. ID reservation hands out disjoint
+    blocks from a counter per key, never going below the caller's floor.
+    """
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew a lease; False while another owner holds it"""
+        raise NotImplementedError
+
+    def release(self, name: str, owner: str):
+        raise NotImplementedError
+
+    def holder(self, name: str) -> Optional[str]:
+        """Current unexpired holder of a lease"""
+        raise NotImplementedError
+
+    def reserve_ids(self, key: str, count: int, floor: int = 1) -> int:
+        """Reserve `count` consecutive IDs for `key`; returns the first"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryCoordinator(ShardCoordinator):
+    """In-process coordinator for a single bot process, or as a stand-in shared by simulated processes in tests"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._counters: Dict[str, int] = {}
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        with self._lock:
+            now = self.clock()
+            current = self._leases.get(name)
+            if current is not None and current[0] != owner and current[1] > now:
+                return False
+            self._leases[name] = (owner, now + ttl)
+            return True
+
+    def release(self, name: str, owner: str):
+        with self._lock:
+            current = self._leases.get(name)
+            if current is not None and current[0] == owner:
+                del self._leases[name]
+
+    def holder(self, name: str) -> Optional[str]:
+        with self._lock:
+            current = self._leases.get(name)
+            if current is None or current[1] <= self.clock():
+                return None
+            return current[0]
+
+    def reserve_ids(self, key: str, count: int, floor: int = 1) -> int:
+        with self._lock:
+            first = max(self._counters.get(key, 1), floor)
+            self._counters[key] = first + count
+            return first
+
+
+class SQLiteCoordinator(ShardCoordinator):
+    """
+    Coordinator backed by an SQLite file that every bot process on the host
+    opens. Each operation is one short BEGIN IMMEDIATE transaction, so
+    SQLite's file lock serialises competing processes.
+    """
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.clock = clock
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS id_counters (key TEXT PRIMARY KEY, next_id INTEGER NOT NULL);
+        """)
+
+    def _transaction(self, work):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def acquire(self, name: str, owner: str, ttl: float) -> bool:
+        def work(conn):
+            now = self.clock()
+            row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+            if row is not None and row[0] != owner and row[1] > now:
+                return False
+            conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at",
+                (name, owner, now + ttl)
+            )
+            return True
+        return self._transaction(work)
+
+    def release(self, name: str, owner: str):
+        self._transaction(lambda conn: conn.execute(
+            "DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner)))
+
+    def holder(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT owner FROM leases WHERE name = ? AND expires_at > ?", (name, self.clock())).fetchone()
+        return row[0] if row else None
+
+    def reserve_ids(self, key: str, count: int, floor: int = 1) -> int:
+        def work(conn):
+            row = conn.execute("SELECT next_id FROM id_counters WHERE key = ?", (key,)).fetchone()
+            first = max(row[0] if row else 1, floor)
+            conn.execute(
+                "INSERT INTO id_counters (key, next_id) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET next_id = excluded.next_id",
+                (key, first + count)
+            )
+            return first
+        return self._transaction(work)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class IdBlockAllocator:
+    """
+    Hands out task IDs from blocks reserved through a coordinator, so only
+    one in `block_size` allocations touches the coordinator. IDs left in a
+    block when the process stops are skipped, never reused.
+    """
+
+    def __init__(self, coordinator: ShardCoordinator, key: str, block_size: int = 64):
+        self.coordinator = coordinator
+        self.key = key
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+
+    def __call__(self, count: int, floor: int = 1) -> int:
+        """First of `count` consecutive fresh IDs, all >= floor"""
+        if self._next < floor:
+            self._next = self._end = 0
+        if self._end - self._next >= count:
+            first = self._next
+            self._next += count
+            return first
+        reserve = max(count, self.block_size)
+        first = self.coordinator.reserve_ids(self.key, reserve, floor)
+        self._next, self._end = first + count, first + reserve
+        return first
+
+
+class ShardLeases:
+    """
+    Keeps this process's shard leases alive.
+
+    start() waits until every configured shard is leased (e.g. until the
+    previous deployment releases them or they expire), then a background
+    task renews them every ttl/3. A shard whose renewal fails is dropped
+    from `owned`, and work for it (reminders and commands, see
+    TaskStore.owns) stops until it is re-acquired. `on_reload` (see
+    TaskStore.reload_shard) runs when a shard is lost and again before a
+    re-acquired shard counts as owned, since another process may have
+    written its data in between.
+    """
+
+    def __init__(self, coordinator: ShardCoordinator, shard_ids: Iterable[int], shard_count: int,
+                 ttl: float = 30.0, owner: Optional[str] = None):
+        self.coordinator = coordinator
+        self.shard_ids = list(shard_ids)
+        self.shard_count = shard_count
+        self.ttl = ttl
+        self.owner = owner or make_owner_id()
+        self.owned: Set[int] = set()
+        self._valid_until: Dict[int, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.on_reload: Optional[Callable[[int], Awaitable[None]]] = None
+
+    @staticmethod
+    def lease_name(shard_id: int) -> str:
+        return f"shard-{shard_id}"
+
+    def owns_guild(self, guild_id: Optional[int]) -> bool:
+        """True while this process holds an unexpired lease on the guild's shard"""
+        shard_id = shard_for_guild(guild_id, self.shard_count)
+        # Judged by our own clock too, so a stalled renewal loop cannot outlive the lease
+        return shard_id in self.owned and time.time() < self._valid_until.get(shard_id, 0)
+
+    async def _acquire(self, shard_id: int) -> bool:
+        started = time.time()
+        held = await asyncio.to_thread(self.coordinator.acquire, self.lease_name(shard_id), self.owner, self.ttl)
+        if held:
+            self._valid_until[shard_id] = started + self.ttl
+        return held
+
+    async def start(self, poll_interval: float = 2.0):
+        """Block until all configured shards are leased, then keep renewing them"""
+        waiting = list(self.shard_ids)
+        announced = False
+        while waiting:
+            for shard_id in list(waiting):
+                if await self._acquire(shard_id):
+                    self.owned.add(shard_id)
+                    waiting.remove(shard_id)
+            if waiting:
+                if not announced:
+                    holders = {shard_id: await asyncio.to_thread(self.coordinator.holder, self.lease_name(shard_id))
+                               for shard_id in waiting}
+                    print(f"⏳ Waiting for shard leases held elsewhere: {holders}")
+                    announced = True
+                await asyncio.sleep(poll_interval)
+
+        print(f"🔒 Holding shard leases {sorted(self.owned)} of {self.shard_count} as {self.owner}")
+        self._task = asyncio.create_task(self._renew_loop())
+
+    async def _reload(self, shard_id: int) -> bool:
+        if self.on_reload is None:
+            return True
+        try:
+            await self.on_reload(shard_id)
+            return True
+        except Exception as e:
+            print(f"❌ Could not reload shard {shard_id}: {e}")
+            return False
+
+    async def _lose(self, shard_id: int):
+        print(f"⚠️ Lost lease for shard {shard_id}; pausing its reminders and commands")
+        self.owned.discard(shard_id)
+        await self._reload(shard_id)
+
+    async def _renew_loop(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            for shard_id in self.shard_ids:
+                # Expired by our own clock (e.g. the loop stalled): another process may have held it meanwhile
+                if shard_id in self.owned and time.time() >= self._valid_until.get(shard_id, 0):
+                    await self._lose(shard_id)
+                try:
+                    held = await self._acquire(shard_id)
+                except Exception as e:
+                    print(f"❌ Could not renew lease for shard {shard_id}: {e}")
+                    held = False
+                if held and shard_id not in self.owned:
+                    # Only owned once its partitions will be read back from disk; retried next round otherwise
+                    if await self._reload(shard_id):
+                        print(f"🔒 Re-acquired shard {shard_id}")
+                        self.owned.add(shard_id)
+                elif not held and shard_id in self.owned:
+                    await self._lose(shard_id)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for shard_id in list(self.owned):
+            await asyncio.to_thread(self.coordinator.release, self.lease_name(shard_id), self.owner)
+        self.owned.clear()
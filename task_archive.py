@@ -0,0 +1,274 @@
+import json
+import os
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from task_journal import encode_task, decode_task, fsync_dir
+from task_record import TaskRecord
+
+ARCHIVE_FILE = 'archive.jsonl'
+STATS_FILE = 'stats.json'
+
+OUTCOME_COMPLETED = 'completed'
+OUTCOME_EXPIRED = 'expired'  # Dropped by overdue cleanup without being completed
+
+# Tasks without a time of day are on time until the end of their deadline day
+END_OF_DAY = 24 * 60 - 1
+
+
+@lru_cache(maxsize=64)
+def week_key(day: int) -> str:
+    """ISO week of a day ordinal, e.g. '2025-W31'"""
+    year, week, _ = date.fromordinal(day).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def minutes_late(task: TaskRecord, closed_day: int, closed_minute: int) -> int:
+    """How many minutes after its deadline a task was closed (0 or less means on time)"""
+    due_minute = END_OF_DAY if task.due_minute is None else task.due_minute
+    return (closed_day - task.deadline_day) * 24 * 60 + closed_minute - due_minute
+
+
+class StatCounter:
+    """Running totals for one scope (a partition, a user or a week)"""
+
+    __slots__ = ('completed', 'on_time', 'late_minutes', 'expired')
+
+    def __init__(self, completed: int = 0, on_time: int = 0, late_minutes: int = 0, expired: int = 0):
+        self.completed = completed
+        self.on_time = on_time
+        self.late_minutes = late_minutes  # Summed over late completions only
+        self.expired = expired
+
+    def record(self, outcome: str, late: int):
+        if outcome == OUTCOME_EXPIRED:
+            self.expired += 1
+            return
+        self.completed += 1
+        if late <= 0:
+            self.on_time += 1
+        else:
+            self.late_minutes += late
+
+    @property
+    def closed(self) -> int:
+        return self.completed + self.expired
+
+    @property
+    def on_time_rate(self) -> Optional[float]:
+        """Share of closed tasks completed by their deadline; expired tasks count as missed"""
+        return self.on_time / self.closed if self.closed else None
+
+    @property
+    def average_lateness(self) -> Optional[float]:
+        """Average minutes late per late completion"""
+        late = self.completed - self.on_time
+        return self.late_minutes / late if late else None
+
+    def copy(self) -> 'StatCounter':
+        return StatCounter(self.completed, self.on_time, self.late_minutes, self.expired)
+
+    def to_list(self) -> list:
+        return [self.completed, self.on_time, self.late_minutes, self.expired]
+
+
+class TaskStats:
+    """Aggregates over every archived task: the whole partition, each creator and each week closed"""
+
+    def __init__(self):
+        self.total = StatCounter()
+        self.users: Dict[int, StatCounter] = {}
+        self.user_names: Dict[int, str] = {}
+        self.weeks: Dict[str, StatCounter] = {}
+
+    def record(self, outcome: str, tasks: Iterable[TaskRecord], closed_day: int, closed_minute: int):
+        """Count tasks closed at the same time"""
+        week = week_key(closed_day)
+        week_counter = self.weeks.get(week)
+        if week_counter is None:
+            week_counter = self.weeks[week] = StatCounter()
+
+        for task in tasks:
+            late = minutes_late(task, closed_day, closed_minute)
+            self.total.record(outcome, late)
+            week_counter.record(outcome, late)
+
+            user = self.users.get(task.creator_id)
+            if user is None:
+                user = self.users[task.creator_id] = StatCounter()
+            user.record(outcome, late)
+            self.user_names[task.creator_id] = task.creator_name
+
+    def to_dict(self) -> dict:
+        return {
+            'total': self.total.to_list(),
+            'users': {str(user_id): counter.to_list() for user_id, counter in self.users.items()},
+            'user_names': {str(user_id): name for user_id, name in self.user_names.items()},
+            'weeks': {week: counter.to_list() for week, counter in self.weeks.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TaskStats':
+        stats = cls()
+        stats.total = StatCounter(*data['total'])
+        stats.users = {int(user_id): StatCounter(*values) for user_id, values in data['users'].items()}
+        stats.user_names = {int(user_id): name for user_id, name in data['user_names'].items()}
+        stats.weeks = {week: StatCounter(*values) for week, values in data['weeks'].items()}
+        return stats
+
+
+class StatsReport:
+    """Point-in-time copy of the counters /stats shows"""
+
+    def __init__(self, total: StatCounter, weeks: List[Tuple[str, StatCounter]],
+                 user: Optional[StatCounter], top_users: List[Tuple[int, str, StatCounter]]):
+        self.total = total
+        self.weeks = weeks
+        self.user = user
+        self.top_users = top_users
+
+
+class TaskArchive:
+    """
+    Append-only archive of completed and expired tasks, with running stats.
+
+    Each closed task is appended as one compact row (outcome, close time and
+    the task in journal encoding) and counted in TaskStats at the same time,
+    so reading the stats never scans history. Stats are checkpointed to
+    stats.json together with the archive offset they cover; on startup only
+    rows written after the checkpoint are replayed. Without a data directory
+    only the stats are kept, in memory.
+    """
+
+    def __init__(self, data_dir: str = '', checkpoint_every: int = 500):
+        self.data_dir = data_dir
+        self.checkpoint_every = checkpoint_every
+        self.stats = TaskStats()
+        self.archived = 0
+        self._since_checkpoint = 0
+        self._file = None
+        self._lock = threading.Lock()
+        if data_dir:
+            self._load()
+
+    def _load(self):
+        path = os.path.join(self.data_dir, ARCHIVE_FILE)
+        stats_path = os.path.join(self.data_dir, STATS_FILE)
+        offset = 0
+        if os.path.exists(stats_path):
+            with open(stats_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            self.stats = TaskStats.from_dict(checkpoint['stats'])
+            self.archived = checkpoint['archived']
+            offset = checkpoint['offset']
+
+        if os.path.exists(path):
+            good_offset = offset
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    try:
+                        outcome, closed_day, closed_minute, row = _decode_row(line)
+                    except ValueError:
+                        # Torn write from a crash mid-append: drop the tail
+                        print(f"⚠️ Truncating corrupt archive tail in {self.data_dir}")
+                        break
+                    good_offset += len(line)
+                    self.stats.record(outcome, [decode_task(row)], closed_day, closed_minute)
+                    self.archived += 1
+                    self._since_checkpoint += 1
+            if good_offset != os.path.getsize(path):
+                with open(path, 'r+b') as f:
+                    f.truncate(good_offset)
+
+    def record(self, outcome: str, tasks: Iterable[TaskRecord], closed_at: Optional[datetime] = None):
+        """Archive closed tasks and count them in the stats, as one write"""
+        closed_at = closed_at or datetime.now()
+        closed_day = closed_at.toordinal()
+        closed_minute = closed_at.hour * 60 + closed_at.minute
+        tasks = list(tasks)
+        if not tasks:
+            return
+        with self._lock:
+            self.stats.record(outcome, tasks, closed_day, closed_minute)
+            self.archived += len(tasks)
+            if not self.data_dir:
+                return
+            lines = [json.dumps([outcome, closed_day, closed_minute, encode_task(task)], separators=(',', ':')) + '\n'
+                     for task in tasks]
+            if self._file is None:
+                os.makedirs(self.data_dir, exist_ok=True)
+                self._file = open(os.path.join(self.data_dir, ARCHIVE_FILE), 'a', encoding='utf-8')
+            self._file.write(''.join(lines))
+            self._file.flush()
+            self._since_checkpoint += len(lines)
+            if self._since_checkpoint >= self.checkpoint_every:
+                self._checkpoint()
+
+    def _checkpoint(self):
+        """Write the stats and the archive offset they cover; the caller holds the lock"""
+        offset = 0
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            offset = self._file.tell()
+        elif os.path.exists(os.path.join(self.data_dir, ARCHIVE_FILE)):
+            offset = os.path.getsize(os.path.join(self.data_dir, ARCHIVE_FILE))
+        path = os.path.join(self.data_dir, STATS_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'offset': offset, 'archived': self.archived, 'stats': self.stats.to_dict()}, f,
+                      separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        fsync_dir(self.data_dir)
+        self._since_checkpoint = 0
+
+    def report(self, user_id: Optional[int] = None, weeks: int = 4, top: int = 5) -> StatsReport:
+        """Copy the counters for /stats: totals, the latest weeks, one user and the most active users"""
+        with self._lock:
+            stats = self.stats
+            recent = sorted(stats.weeks.items(), reverse=True)[:weeks]
+            user = stats.users.get(user_id) if user_id is not None else None
+            top_users = sorted(stats.users.items(), key=lambda item: (-item[1].completed, item[0]))[:top]
+            return StatsReport(
+                stats.total.copy(),
+                [(week, counter.copy()) for week, counter in recent],
+                user.copy() if user is not None else None,
+                [(uid, stats.user_names.get(uid, str(uid)), counter.copy()) for uid, counter in top_users]
+            )
+
+    def entries(self) -> Iterator[Tuple[str, datetime, TaskRecord]]:
+        """Every archived task as (outcome, closed at, task), oldest first"""
+        if not self.data_dir:
+            return
+        path = os.path.join(self.data_dir, ARCHIVE_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    outcome, closed_day, closed_minute, row = _decode_row(line)
+                except ValueError:
+                    return
+                closed_at = datetime.fromordinal(closed_day).replace(hour=closed_minute // 60,
+                                                                     minute=closed_minute % 60)
+                yield outcome, closed_at, decode_task(row)
+
+    def close(self, checkpoint: bool = True):
+        with self._lock:
+            if checkpoint and self.data_dir and self._since_checkpoint:
+                self._checkpoint()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _decode_row(line: bytes):
+    try:
+        outcome, closed_day, closed_minute, row = json.loads(line)
+    except (TypeError, ValueError):
+        raise ValueError("Corrupt archive row") from None
+    return outcome, closed_day, closed_minute, row
@@ -0,0 +1,99 @@
+"""
+Command line import/export for the task store in TASKPILOT_DATA_DIR.
+
+Stop the bot before importing: the bot and this tool must not append to the
+same journal at the same time. Export opens the store read-only (the journal
+is replayed but never written, and archive stats are not checkpointed), so it
+is safe while the bot runs.
+
+Usage:
+    python task_cli.py import tasks.csv --guild 123 --user-id 456 --user-name alice --channel-id 789
+    python task_cli.py export --guild 123 --format jsonl -o tasks.jsonl
+"""
+import argparse
+import itertools
+import sys
+from config import Config
+from guild_store import TaskStore
+from task_io import FORMATS, TaskImporter, detect_format, iter_export
+
+READ_BATCH_LINES = 1000
+
+
+def run_import(store: TaskStore, args) -> int:
+    fmt = args.format or detect_format(args.file)
+    if fmt is None:
+        print("❌ Cannot tell the file format from its name; pass --format csv or --format jsonl")
+        return 1
+
+    partition = store.get(args.guild, args.channel_id)
+    importer = TaskImporter(
+        partition.tasks, fmt, args.user_id, args.user_name, args.channel_id,
+        chunk_size=args.chunk_size, trust_owner_columns=True, allow_past=args.allow_past,
+        tz_name=args.timezone
+    )
+    with open(args.file, 'r', encoding='utf-8', newline='') as f:
+        while True:
+            lines = list(itertools.islice(f, READ_BATCH_LINES))
+            if not lines:
+                break
+            importer.feed(lines)
+
+    report = importer.finish()
+    print(f"{'✅' if report.imported else '❌'} {report.summary(max_errors=50)}")
+    return 0 if not report.error_count else 2
+
+
+def run_export(store: TaskStore, args) -> int:
+    partition = store.get(args.guild, args.channel_id)
+    tasks = partition.tasks.get_all_tasks().values()
+
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        for chunk in iter_export(tasks, args.format):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk import/export tasks for one guild")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    importer = sub.add_parser('import', help="Import tasks from a CSV or JSONL file")
+    importer.add_argument('file')
+    importer.add_argument('--format', choices=FORMATS)
+    importer.add_argument('--user-id', type=int, default=0, help="Creator for rows without creator_id")
+    importer.add_argument('--user-name', default='import', help="Creator name for rows without creator_name")
+    importer.add_argument('--chunk-size', type=int, default=1000)
+    importer.add_argument('--allow-past', action='store_true', help="Accept deadlines in the past")
+    importer.add_argument('--timezone', help="Timezone for relative deadlines like 'tomorrow 5pm' (default: local time)")
+
+    exporter = sub.add_parser('export', help="Export active tasks as CSV or JSONL")
+    exporter.add_argument('--format', choices=FORMATS, default='csv')
+    exporter.add_argument('-o', '--output', help="Output file (defaults to stdout)")
+
+    for command in (importer, exporter):
+        command.add_argument('--guild', type=int, required=True, help="Guild ID whose tasks to use")
+        command.add_argument('--channel-id', type=int, default=0,
+                             help="Channel ID (selects the partition with PARTITION_BY_CHANNEL)")
+
+    args = parser.parse_args(argv)
+
+    if not Config.DATA_DIR:
+        print("❌ TASKPILOT_DATA_DIR is not set; there is no task store to read or write.")
+        return 1
+
+    store = TaskStore.from_config(read_only=args.command == 'export')
+    try:
+        if args.command == 'import':
+            return run_import(store, args)
+        return run_export(store, args)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
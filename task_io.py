@@ -0,0 +1,291 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from deadline_parser import parse_deadline, is_past
+from recurrence import parse_recurrence
+from task_manager import TaskManager
+from task_record import TaskRecord
+
+FORMATS = ('csv', 'jsonl')
+EXPORT_COLUMNS = ['id', 'description', 'deadline', 'creator_id', 'creator_name', 'channel_id', 'created_at',
+                  'recurrence']
+
+# Longest import line read; longer ones are fed to TaskImporter as None and reported as row errors
+MAX_LINE_BYTES = 64 * 1024
+
+
+def detect_format(filename: str) -> Optional[str]:
+    """Guess the import format from a file name"""
+    name = filename.lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    return None
+
+
+class ImportReport:
+    """Outcome of a bulk import"""
+
+    def __init__(self):
+        self.imported = 0
+        self.first_id: Optional[int] = None
+        self.last_id: Optional[int] = None
+        self.error_count = 0
+        self.errors: List[Tuple[int, str]] = []
+
+    def summary(self, max_errors: int = 10) -> str:
+        if self.imported:
+            text = f"Imported {self.imported} task(s) (#{self.first_id}–#{self.last_id})."
+        else:
+            text = "No tasks were imported."
+        if self.error_count:
+            text += f" {self.error_count} row(s) skipped:"
+            for row_number, message in self.errors[:max_errors]:
+                text += f"\n• Row {row_number}: {message}"
+            if self.error_count > max_errors:
+                text += f"\n• ...and {self.error_count - max_errors} more"
+        return text
+
+
+class _LineSource:
+    """Line iterator for csv.reader that records how far the reader got"""
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.consumed = 0
+        self.exhausted = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self.consumed >= len(self.lines):
+            self.exhausted = True
+            raise StopIteration
+        line = self.lines[self.consumed]
+        self.consumed += 1
+        return line
+
+
+class TaskImporter:
+    """
+    Streaming CSV/JSONL importer.
+
+    Lines are fed in arbitrary batches; complete records are parsed as they
+    arrive and validated/inserted in chunks through TaskManager.add_tasks_bulk,
+    so memory stays bounded by the chunk size rather than the file size. Bad
+    rows are reported individually and never abort the rest of the file.
+    """
+
+    def __init__(self, task_manager: TaskManager, fmt: str, user_id: int, user_name: str, channel_id: int,
+                 chunk_size: int = 500, trust_owner_columns: bool = False, allow_past: bool = False,
+                 max_errors_kept: int = 100, tz_name: Optional[str] = None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+        self.task_manager = task_manager
+        self.fmt = fmt
+        self.user_id = user_id
+        self.user_name = user_name
+        self.channel_id = channel_id
+        self.chunk_size = chunk_size
+        self.trust_owner_columns = trust_owner_columns
+        self.allow_past = allow_past
+        self.max_errors_kept = max_errors_kept
+        self.report = ImportReport()
+
+        self._header: Optional[List[str]] = None
+        self._header_invalid = False
+        self._partial: List[str] = []  # CSV lines of a record still waiting for its closing quote
+        self._line_number = 0
+        self._rows: List[Tuple[int, dict]] = []
+        # Relative deadlines ("tomorrow 5pm") are read in the importing user's timezone
+        now = datetime.now(ZoneInfo(tz_name)) if tz_name else datetime.now()
+        self._today = now.date()
+        self._now_minute = now.hour * 60 + now.minute
+
+    def feed(self, lines: Iterable[Optional[str]]):
+        """Consume a batch of text lines; None stands for a line dropped for being over MAX_LINE_BYTES"""
+        if self.fmt == 'csv':
+            self._feed_csv(lines)
+            return
+        for line in lines:
+            self._line_number += 1
+            if line is None:
+                self._line_too_long(self._line_number)
+                continue
+            self._feed_jsonl_line(line)
+            if len(self._rows) >= self.chunk_size:
+                self._flush()
+
+    def finish(self) -> ImportReport:
+        """Flush buffered rows and return the report"""
+        if self._partial:
+            self._error(self._line_number - len(self._partial) + 1, "Unterminated quoted field")
+            self._partial = []
+        self._flush()
+        if self.fmt == 'csv' and self._header is None:
+            self._error(1, "Missing header row (expected at least: description,deadline)")
+        return self.report
+
+    # ---------------------------------------------------------------- parsing
+
+    def _line_too_long(self, line_number: int):
+        self._error(line_number, f"Line is longer than {MAX_LINE_BYTES // 1024} KB")
+
+    def _feed_jsonl_line(self, line: str):
+        if not line.strip():
+            return
+        try:
+            row = json.loads(line)
+        except ValueError:
+            self._error(self._line_number, "Invalid JSON")
+            return
+        if not isinstance(row, dict):
+            self._error(self._line_number, "Expected a JSON object")
+            return
+        self._rows.append((self._line_number, row))
+
+    def _feed_csv(self, lines: Iterable[Optional[str]]):
+        # Lines held back from the last batch come first, so record boundaries are csv's own
+        pending = self._partial
+        first_line = self._line_number - len(pending) + 1
+        for line in lines:
+            self._line_number += 1
+            if line is None:
+                self._line_too_long(self._line_number)
+                # An empty line keeps the numbering of the rows after it
+                line = '\n'
+            pending.append(line if line.endswith('\n') else line + '\n')
+        self._partial = []
+
+        source = _LineSource(pending)
+        reader = csv.reader(source)
+        while True:
+            start = source.consumed
+            try:
+                values = next(reader)
+            except StopIteration:
+                break
+            except csv.Error:
+                self._error(first_line + start, "Malformed CSV row")
+                continue
+            if source.exhausted:
+                # The batch ended inside a quoted field: parse the record again with the next batch
+                self._partial = pending[start:]
+                break
+            self._csv_record(first_line + start, values)
+            if len(self._rows) >= self.chunk_size:
+                self._flush()
+
+    def _csv_record(self, row_number: int, values: List[str]):
+        if not values or (len(values) == 1 and not values[0].strip()):
+            return
+
+        if self._header is None:
+            self._header = [value.strip().lstrip('\ufeff').lower() for value in values]
+            if 'description' not in self._header or 'deadline' not in self._header:
+                self._error(row_number, "Header must include description and deadline columns")
+                self._header_invalid = True
+            return
+        if self._header_invalid:
+            return
+        self._rows.append((row_number, dict(zip(self._header, values))))
+
+    # ------------------------------------------------------------- validation
+
+    def _flush(self):
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+
+        entries = []
+        for row_number, row in rows:
+            description = str(row.get('description') or '').strip()
+            if not description:
+                self._error(row_number, "Description is empty")
+                continue
+
+            try:
+                # Repeated deadline strings are answered from parse_deadline's cache
+                deadline = parse_deadline(str(row.get('deadline', '')), self._today)
+            except ValueError as e:
+                self._error(row_number, str(e))
+                continue
+            if not self.allow_past and is_past(deadline, self._today, self._now_minute):
+                self._error(row_number, "Deadline cannot be in the past.")
+                continue
+
+            creator_id, creator_name, channel_id = self.user_id, self.user_name, self.channel_id
+            if self.trust_owner_columns:
+                try:
+                    creator_id = int(row.get('creator_id') or creator_id)
+                    channel_id = int(row.get('channel_id') or channel_id)
+                except (TypeError, ValueError):
+                    self._error(row_number, "creator_id and channel_id must be integers")
+                    continue
+                creator_name = str(row.get('creator_name') or creator_name)
+
+            minute = deadline.minute
+            recurrence = None
+            repeat = str(row.get('recurrence') or '').strip()
+            if repeat:
+                try:
+                    rule = parse_recurrence(repeat, deadline.day)
+                except ValueError as e:
+                    self._error(row_number, str(e))
+                    continue
+                recurrence = rule.text
+                if minute is None:
+                    minute = rule.minute
+
+            entries.append((description, deadline.day, creator_id, creator_name, channel_id, minute, recurrence))
+
+        task_ids = self.task_manager.add_tasks_bulk(entries)
+        if task_ids:
+            if self.report.first_id is None:
+                self.report.first_id = task_ids[0]
+            self.report.last_id = task_ids[-1]
+            self.report.imported += len(task_ids)
+
+    def _error(self, row_number: int, message: str):
+        self.report.error_count += 1
+        if len(self.report.errors) < self.max_errors_kept:
+            self.report.errors.append((row_number, message))
+
+
+def iter_export(tasks: Iterable[TaskRecord], fmt: str) -> Iterator[str]:
+    """Yield an export file piece by piece (one header and one line per task)"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for task in tasks:
+            writer.writerow(_export_values(task))
+            if buffer.tell() > 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for task in tasks:
+            yield json.dumps(dict(zip(EXPORT_COLUMNS, _export_values(task))), ensure_ascii=False) + '\n'
+
+
+def _export_values(task: TaskRecord) -> list:
+    return [
+        task.id,
+        task.description,
+        task.deadline_text,
+        task.creator_id,
+        task.creator_name,
+        task.channel_id,
+        task.created_at.isoformat(),
+        task.recurrence or '',
+    ]
@@ -0,0 +1,297 @@
+import asyncio
+import glob
+import json
+import os
+import threading
+from datetime import datetime, date
+from typing import Iterator, List, Optional, Tuple
+from task_record import TaskRecord
+
+SNAPSHOT_FILE = 'snapshot.json'
+SEGMENT_PATTERN = 'journal-*.jsonl'
+
+
+def encode_task(task: TaskRecord) -> list:
+    """Encode a task record as a compact JSON-friendly list"""
+    return [
+        task.id,
+        task.description,
+        task.deadline.isoformat(),
+        task.creator_id,
+        task.creator_name,
+        task.channel_id,
+        task.created_at.isoformat(),
+    ] + _optional_fields(task)
+
+
+def _optional_fields(task: TaskRecord) -> list:
+    """Trailing fields added after the original seven; omitted when unset to keep rows short"""
+    if task.recurrence:
+        return [task.due_minute, task.recurrence]
+    if task.due_minute is not None:
+        return [task.due_minute]
+    return []
+
+
+def decode_task(row: list) -> TaskRecord:
+    """Rebuild a task record from its encoded list form"""
+    # Rows may end after any of the optional fields (due_minute, recurrence)
+    task_id, description, deadline, creator_id, creator_name, channel_id, created_at, *optional = row
+    optional += [None] * (2 - len(optional))
+    return TaskRecord(
+        task_id,
+        description,
+        date.fromisoformat(deadline).toordinal(),
+        creator_id,
+        creator_name,
+        channel_id,
+        int(datetime.fromisoformat(created_at).timestamp()),
+        optional[0],
+        optional[1]
+    )
+
+
+class TaskJournal:
+    """
+    Append-only journal of task operations with periodic compacted snapshots.
+
+    Records are buffered in memory and written by a background flusher thread,
+    so a burst of appends is committed with a single write and fsync (group
+    commit). The journal is split into segments; taking a snapshot rotates to a
+    fresh segment so older segments can be dropped once the snapshot is durable.
+
+    A `read_only` journal only replays: it never truncates a torn tail (it may
+    be a write still in progress by the bot), opens no segment and refuses appends.
+    """
+
+    def __init__(self, data_dir: str, commit_delay: float = 0.02, snapshot_every: int = 5000,
+                 read_only: bool = False):
+        self.data_dir = data_dir
+        self.commit_delay = commit_delay
+        self.snapshot_every = snapshot_every
+        self.read_only = read_only
+        if not read_only:
+            os.makedirs(data_dir, exist_ok=True)
+
+        self.seq = 0
+        self.durable_seq = 0
+        self.records_since_snapshot = 0
+        self.fsync_count = 0
+
+        self._pending: List[str] = []
+        self._waiters: List[Tuple[int, asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._segment = None
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+        self._snapshot_thread: Optional[threading.Thread] = None
+
+    # ----------------------------------------------------------------- replay
+
+    def load(self) -> Tuple[Optional[dict], Iterator[dict]]:
+        """
+        Load the latest snapshot and the journal records written after it.
+        Returns: (snapshot state or None, iterator of journal records)
+        """
+        snapshot = None
+        snapshot_path = os.path.join(self.data_dir, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self.seq = snapshot['seq']
+
+        return snapshot, self._replay_segments(snapshot['seq'] if snapshot else 0)
+
+    def _replay_segments(self, after_seq: int) -> Iterator[dict]:
+        for path in self._segment_paths():
+            good_offset = 0
+            with open(path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash mid-append: drop the tail
+                        if not self.read_only:
+                            print(f"⚠️ Truncating corrupt journal tail in {os.path.basename(path)}")
+                        break
+                    good_offset += len(line)
+                    if record['seq'] <= after_seq:
+                        continue
+                    self.seq = record['seq']
+                    self.records_since_snapshot += 1
+                    yield record
+            if not self.read_only and good_offset != os.path.getsize(path):
+                with open(path, 'r+b') as f:
+                    f.truncate(good_offset)
+        self.durable_seq = self.seq
+
+    def _segment_paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.data_dir, SEGMENT_PATTERN)))
+
+    # ---------------------------------------------------------------- writing
+
+    def start(self):
+        """Open a fresh segment and start the background flusher thread"""
+        if self.read_only:
+            raise RuntimeError("A read-only journal cannot be started")
+        with self._io_lock:
+            self._open_segment()
+        self._flusher = threading.Thread(target=self._flush_loop, name='task-journal', daemon=True)
+        self._flusher.start()
+
+    def append(self, op: str, **fields) -> int:
+        """Buffer a journal record for the next group commit. Returns its sequence number."""
+        if self.read_only:
+            raise RuntimeError("Cannot change tasks through a read-only journal")
+        with self._cond:
+            self.seq += 1
+            fields['seq'] = self.seq
+            fields['op'] = op
+            self._pending.append(json.dumps(fields, separators=(',', ':')) + '\n')
+            self.records_since_snapshot += 1
+            self._cond.notify()
+            return self.seq
+
+    def flush(self):
+        """Write and fsync everything buffered so far"""
+        with self._io_lock:
+            self._write_pending()
+        self._wake_waiters()
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+            # Give concurrent appends a moment to join this commit
+            if self.commit_delay:
+                threading.Event().wait(self.commit_delay)
+            self.flush()
+
+    def _write_pending(self) -> int:
+        """Write buffered records in one batch; caller holds the io lock so batches stay ordered"""
+        with self._cond:
+            lines, self._pending = self._pending, []
+            seq = self.seq
+        if lines:
+            if self._segment is None:
+                self._open_segment()
+            self._segment.write(''.join(lines))
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+            self.fsync_count += 1
+        if seq > self.durable_seq:
+            self.durable_seq = seq
+        return seq
+
+    def _wake_waiters(self):
+        with self._cond:
+            ready = [w for w in self._waiters if w[0] <= self.durable_seq]
+            self._waiters = [w for w in self._waiters if w[0] > self.durable_seq]
+        for _, loop, future in ready:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    async def wait_durable(self):
+        """Wait until every record appended so far has been fsynced"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._cond:
+            if self.durable_seq >= self.seq:
+                return
+            self._waiters.append((self.seq, loop, future))
+        await future
+
+    def _open_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+        path = os.path.join(self.data_dir, f'journal-{self.seq + 1:012d}.jsonl')
+        self._segment = open(path, 'a', encoding='utf-8')
+        fsync_dir(self.data_dir)
+
+    # -------------------------------------------------------------- snapshots
+
+    def should_snapshot(self) -> bool:
+        if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+            return False
+        return self.records_since_snapshot >= self.snapshot_every
+
+    def write_snapshot(self, next_task_id: int, tasks: List[TaskRecord]):
+        """
+        Start a compacted snapshot of the given state in the background.
+        The task list must be a point-in-time copy; the caller keeps mutating its own dict.
+        """
+        with self._io_lock:
+            seq = self._write_pending()
+            self.records_since_snapshot = 0
+            old_segments = self._segment_paths()
+            self._open_segment()
+        self._wake_waiters()
+
+        self._snapshot_thread = threading.Thread(
+            target=self._write_snapshot_file,
+            args=(seq, next_task_id, tasks, old_segments),
+            name='task-snapshot',
+            daemon=True
+        )
+        self._snapshot_thread.start()
+        return self._snapshot_thread
+
+    def _write_snapshot_file(self, seq: int, next_task_id: int, tasks: List[TaskRecord], old_segments: List[str]):
+        try:
+            state = {
+                'seq': seq,
+                'next_task_id': next_task_id,
+                'tasks': [encode_task(task) for task in tasks]
+            }
+            path = os.path.join(self.data_dir, SNAPSHOT_FILE)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            fsync_dir(self.data_dir)
+
+            # Segments fully covered by the snapshot are no longer needed
+            for segment in old_segments:
+                os.remove(segment)
+            print(f"💾 Snapshot written at seq {seq} ({len(tasks)} tasks)")
+        except Exception as e:
+            print(f"❌ Error writing snapshot: {str(e)}")
+
+    def close(self):
+        """Flush pending records and stop the flusher thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        self.flush()
+        with self._io_lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+def fsync_dir(path: str):
+    """Persist directory entries (new segment / renamed snapshot) where supported"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
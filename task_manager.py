@@ -1,117 +1,417 @@
-from datetime import datetime, date
-from typing import Dict, Tuple, Optional
+import threading
+from datetime import datetime, date, timedelta
+from typing import Callable, Dict, Iterable, List, Mapping, Tuple, Optional
+from zoneinfo import ZoneInfo
+from deadline_parser import parse_deadline, is_past
+from recurrence import parse_recurrence
+from task_archive import TaskArchive, StatsReport, OUTCOME_COMPLETED, OUTCOME_EXPIRED
+from task_journal import TaskJournal, encode_task, decode_task
+from task_record import TaskRecord
+from task_storage import TaskStorage, MemoryTaskStorage
+from urgency_buckets import UrgencyBuckets
 
 class TaskManager:
     """Manages task storage and operations"""
     
-    def __init__(self):
-        self.tasks: Dict[int, dict] = {}
-        self.next_task_id = 1
+    def __init__(self, journal: Optional[TaskJournal] = None, storage: Optional[TaskStorage] = None,
+                 archive: Optional[TaskArchive] = None, local_timezone: Optional[Callable[[], str]] = None):
+        self.storage = storage or MemoryTaskStorage()
+        self.journal = journal
+        # Completed and expired tasks end up here instead of being forgotten
+        self.archive = archive or TaskArchive()
+        # The partition's timezone, read on every close so a settings change applies at once;
+        # on-time and lateness stats compare close times with deadlines in that timezone
+        self.local_timezone = local_timezone
+        # Overdue/today/tomorrow for the daily reminder, kept up to date on every write.
+        # Storage calls may run on worker threads, so bucket updates take a lock.
+        self.urgency = UrgencyBuckets()
+        self._urgency_lock = threading.Lock()
+        self._recurring_checked_day: Optional[int] = None
+        
+        if journal is not None:
+            if not isinstance(self.storage, MemoryTaskStorage):
+                raise ValueError("The journal only backs the in-memory storage backend")
+            self._replay_journal()
+            if not journal.read_only:
+                journal.start()
+    
+    @property
+    def version(self) -> int:
+        """Changes on every write so cached views know when to re-render"""
+        return self.storage.version
+    
+    @property
+    def next_task_id(self) -> int:
+        return self.storage.next_task_id
+    
+    def _replay_journal(self):
+        """Rebuild in-memory state from the latest snapshot plus the journal tail"""
+        snapshot, records = self.journal.load()
+        storage = self.storage
+        
+        if snapshot:
+            storage.set_next_task_id(snapshot['next_task_id'])
+            for row in snapshot['tasks']:
+                storage.restore(decode_task(row))
+        
+        for record in records:
+            op = record['op']
+            if op == 'add':
+                storage.restore(decode_task(record['task']))
+            elif op == 'add_many':
+                for row in record['tasks']:
+                    storage.restore(decode_task(row))
+            elif op == 'complete':
+                storage.delete([record['id']])
+            elif op in ('complete_many', 'cleanup'):
+                # A batch completion also carries the recurring tasks it moved to their next occurrence
+                storage.reschedule_many([(task.id, task.deadline_day, task.due_minute, task.recurrence)
+                                         for task in map(decode_task, record.get('tasks', ()))],
+                                        record['ids'])
+            elif op == 'reschedule':
+                task = decode_task(record['task'])
+                storage.reschedule(task.id, task.deadline_day, task.due_minute, task.recurrence)
+        
+        print(f"📂 Restored {storage.count()} tasks from {self.journal.data_dir}")
+    
+    def _local_now(self) -> datetime:
+        """Current time in the partition's timezone (server local time without one)"""
+        if self.local_timezone is None:
+            return datetime.now()
+        return datetime.now(ZoneInfo(self.local_timezone()))
+    
+    def _log(self, op: str, **fields):
+        """Append an operation to the journal (if enabled) and snapshot when due"""
+        if self.journal is None:
+            return
+        
+        self.journal.append(op, **fields)
+        if self.journal.should_snapshot():
+            # Task records are never mutated in place, so a shallow copy is a consistent view
+            self.journal.write_snapshot(self.storage.next_task_id, self.storage.all())
+    
+    async def wait_durable(self):
+        """Wait until all changes so far are safely on disk (no-op without a journal)"""
+        if self.journal is not None:
+            await self.journal.wait_durable()
+    
+    def close(self, checkpoint: bool = True):
+        """Flush and close the journal, archive and storage (without a stats checkpoint if `checkpoint` is False)"""
+        if self.journal is not None:
+            self.journal.close()
+        self.archive.close(checkpoint)
+        self.storage.close()
+    
+    def _track_added(self, tasks: List[TaskRecord]):
+        with self._urgency_lock:
+            for task in tasks:
+                self.urgency.add(task)
+    
+    def _track_removed(self, task_ids: List[int]):
+        with self._urgency_lock:
+            for task_id in task_ids:
+                self.urgency.remove(task_id)
+    
+    def _reschedule(self, task: TaskRecord, deadline_day: int, due_minute: Optional[int],
+                    recurrence: Optional[str]) -> Optional[TaskRecord]:
+        """Move a task to a new deadline/rule; the caller holds the urgency lock"""
+        updated = self.storage.reschedule(task.id, deadline_day, due_minute, recurrence)
+        if updated is not None:
+            self.urgency.remove(task.id)
+            self.urgency.add(updated)
+            self._log('reschedule', task=encode_task(updated))
+        return updated
+    
+    def _next_occurrence(self, task: TaskRecord, not_before: int) -> Optional[Tuple[int, Optional[int]]]:
+        """(day, minute) of the first occurrence of a recurring task after its deadline and on/after not_before"""
+        rule = parse_recurrence(task.recurrence)
+        day = rule.next_after(task.deadline_day)
+        while day is not None and day < not_before:
+            day = rule.next_after(day)
+        if day is None:
+            return None
+        return day, rule.minute if rule.minute is not None else task.due_minute
+    
+    def _advance_missed_occurrences(self, today: int):
+        """
+        Move overdue recurring tasks to their latest occurrence once a newer one
+        is due, so a missed occurrence does not hold back the series. Only the
+        overdue bucket is looked at; the caller holds the urgency lock.
+        """
+        for task in [task for task in self.urgency.overdue.values() if task.recurrence]:
+            rule = parse_recurrence(task.recurrence)
+            day = rule.next_after(task.deadline_day)
+            if day is None or day > today:
+                continue
+            following = rule.next_after(day)
+            while following is not None and following <= today:
+                day, following = following, rule.next_after(following)
+            self._reschedule(task, day, rule.minute if rule.minute is not None else task.due_minute,
+                             task.recurrence)
     
-    def add_task(self, description: str, deadline_str: str, user_id: int, user_name: str, channel_id: int) -> Tuple[bool, str]:
+    def add_task(self, description: str, deadline_str: str, user_id: int, user_name: str, channel_id: int,
+                 tz_name: Optional[str] = None, repeat: Optional[str] = None) -> Tuple[bool, str]:
         """
         Add a new task with deadline
+        deadline_str: a date, date and time, or relative expression (see deadline_parser),
+        read in the user's timezone (tz_name; the partition's timezone when None)
+        repeat: optional repeat rule (see recurrence.py); the deadline is the first occurrence
         Returns: (success, message)
         """
         try:
             # Parse deadline
-            deadline = datetime.strptime(deadline_str, '%Y-%m-%d').date()
+            now = datetime.now(ZoneInfo(tz_name)) if tz_name else self._local_now()
+            try:
+                deadline = parse_deadline(deadline_str, now.date())
+            except ValueError as e:
+                return False, str(e)
             
             # Check if deadline is in the past
-            if deadline < date.today():
+            if is_past(deadline, now.date(), now.hour * 60 + now.minute):
                 return False, "Deadline cannot be in the past."
             
-            # Create task
-            task = {
-                'id': self.next_task_id,
-                'description': description,
-                'deadline': deadline,
-                'creator_id': user_id,
-                'creator_name': user_name,
-                'channel_id': channel_id,
-                'created_at': datetime.now(),
-                'completed': False
-            }
-            
-            self.tasks[self.next_task_id] = task
-            task_id = self.next_task_id
-            self.next_task_id += 1
+            minute = deadline.minute
+            recurrence = None
+            if repeat and repeat.strip():
+                try:
+                    rule = parse_recurrence(repeat, deadline.day)
+                except ValueError as e:
+                    return False, str(e)
+                recurrence = rule.text
+                if minute is None:
+                    minute = rule.minute
             
-            return True, f"Task #{task_id} added successfully! Deadline: {deadline_str}"
+            # Create task
+            task, = self.storage.insert([(description, deadline.day, user_id, user_name, channel_id, minute, recurrence)])
+            self._track_added([task])
+            self._log('add', task=encode_task(task))
             
-        except ValueError:
-            return False, "Invalid date format. Please use YYYY-MM-DD format."
+            message = f"Task #{task.id} added successfully! Deadline: {task.deadline_text}"
+            if recurrence:
+                message += f" (repeats {recurrence})"
+            return True, message
+        
         except Exception as e:
             return False, f"Error adding task: {str(e)}"
     
+    def add_tasks_bulk(self, entries: List[Tuple[str, int, int, str, int]]) -> List[int]:
+        """
+        Insert already-validated tasks, allocating their IDs in one step
+        entries: (description, deadline_day, creator_id, creator_name, channel_id[, due_minute[, recurrence]])
+        Returns: the new task IDs, in input order
+        """
+        if not entries:
+            return []
+        
+        tasks = self.storage.insert(entries)
+        self._track_added(tasks)
+        self._log('add_many', tasks=[encode_task(task) for task in tasks])
+        
+        return [task.id for task in tasks]
+    
     def complete_task(self, task_id: int, user_id: int) -> Tuple[bool, str]:
         """
         Mark a task as completed
         Returns: (success, message)
         """
-        if task_id not in self.tasks:
+        task = self.storage.get(task_id)
+        if task is None:
             return False, f"Task #{task_id} not found."
         
-        task = self.tasks[task_id]
-        
-        if task['creator_id'] != user_id:
+        if task.creator_id != user_id:
             return False, f"Only the task creator can mark Task #{task_id} as completed."
         
-        if task['completed']:
+        if task.completed:
             return False, f"Task #{task_id} is already completed."
         
+        if task.recurrence:
+            # Only the next occurrence of a series exists; completing one moves it on to the next
+            with self._urgency_lock:
+                following = self._next_occurrence(task, self._local_now().toordinal())
+                if following is not None:
+                    updated = self._reschedule(task, *following, task.recurrence)
+                    if updated is None:
+                        return False, f"Task #{task_id} not found."
+                    self.archive.record(OUTCOME_COMPLETED, [task], self._local_now())
+                    return True, (f"Task #{task_id} '{task.description}' marked as completed! "
+                                  f"Next occurrence: {updated.deadline_text}")
+        
         # Remove completed task
-        description = task['description']
-        del self.tasks[task_id]
+        if not self.storage.delete([task_id]):
+            return False, f"Task #{task_id} not found."
+        self._track_removed([task_id])
+        self._log('complete', id=task_id)
+        self.archive.record(OUTCOME_COMPLETED, [task], self._local_now())
         
-        return True, f"Task #{task_id} '{description}' marked as completed and removed!"
+        return True, f"Task #{task_id} '{task.description}' marked as completed and removed!"
     
-    def get_all_tasks(self) -> Dict[int, dict]:
-        """Get all active tasks"""
-        return {task_id: task for task_id, task in self.tasks.items() if not task['completed']}
+    def stop_recurring(self, task_id: int, user_id: int) -> Tuple[bool, str]:
+        """
+        End a recurring series; its current occurrence stays as a one-off task
+        Returns: (success, message)
+        """
+        task = self.storage.get(task_id)
+        if task is None:
+            return False, f"Task #{task_id} not found."
+        
+        if task.creator_id != user_id:
+            return False, f"Only the task creator can change Task #{task_id}."
+        
+        if not task.recurrence:
+            return False, f"Task #{task_id} does not repeat."
+        
+        with self._urgency_lock:
+            if self._reschedule(task, task.deadline_day, task.due_minute, None) is None:
+                return False, f"Task #{task_id} not found."
+        
+        return True, f"Task #{task_id} will no longer repeat. It stays due {task.deadline_text} until you complete it."
     
-    def get_tasks_for_reminder(self) -> Dict[int, dict]:
-        """Get tasks that need reminders (due today or overdue)"""
-        today = date.today()
-        reminder_tasks = {}
+    def complete_tasks(self, task_ids: Iterable[int], user_id: int) -> Tuple[List[int], List[Tuple[int, str]]]:
+        """
+        Complete several tasks in one pass: one storage write and one journal record,
+        covering both removed tasks and recurring tasks moved to their next occurrence
+        Returns: (completed task IDs, [(task_id, reason)] for the ones skipped)
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        found = self.storage.get_many(task_ids)
+        to_delete = []
+        recurring = []
+        skipped = []
         
-        for task_id, task in self.tasks.items():
-            if task['completed']:
-                continue
-                
-            days_until_deadline = (task['deadline'] - today).days
-            
-            # Include tasks that are due today, due tomorrow, or overdue
-            if days_until_deadline <= 1:
-                reminder_tasks[task_id] = task
+        for task_id in task_ids:
+            task = found.get(task_id)
+            if task is None:
+                skipped.append((task_id, "not found"))
+            elif task.creator_id != user_id:
+                skipped.append((task_id, "not yours"))
+            elif task.recurrence:
+                recurring.append(task)
+            else:
+                to_delete.append(task_id)
+        
+        # Recurring tasks move on to their next occurrence instead of being removed
+        changes = []
+        today = self._local_now().toordinal()
+        for task in recurring:
+            following = self._next_occurrence(task, today)
+            if following is None:
+                to_delete.append(task.id)
+            else:
+                changes.append((task.id, *following, task.recurrence))
         
-        return reminder_tasks
+        if not changes and not to_delete:
+            return [], skipped
+        with self._urgency_lock:
+            updated, deleted = self.storage.reschedule_many(changes, to_delete)
+            for task in updated:
+                self.urgency.remove(task.id)
+                self.urgency.add(task)
+            for task_id in deleted:
+                self.urgency.remove(task_id)
+        if updated or deleted:
+            self._log('complete_many', ids=deleted, tasks=[encode_task(task) for task in updated])
+        
+        done = set(deleted)
+        done.update(task.id for task in updated)
+        completed = [task_id for task_id in task_ids if task_id in done]
+        self.archive.record(OUTCOME_COMPLETED, [found[task_id] for task_id in completed], self._local_now())
+        return completed, skipped
+    
+    def find_tasks(self, creator_id: Optional[int] = None, due_before: Optional[date] = None) -> List[int]:
+        """IDs of active tasks matching all given filters"""
+        cutoff = due_before.toordinal() if due_before is not None else None
+        if creator_id is not None:
+            return self.storage.ids_for_creator(creator_id, cutoff)
+        if cutoff is not None:
+            return self.storage.ids_due_before(cutoff)
+        return [task.id for task in self.storage.all()]
+    
+    def existing_ids(self, start: int, end: int) -> List[int]:
+        """IDs of active tasks between start and end (inclusive)"""
+        return self.storage.ids_in_range(start, end)
+    
+    def get_task(self, task_id: int) -> Optional[TaskRecord]:
+        """Get one active task"""
+        return self.storage.get(task_id)
+    
+    def get_all_tasks(self) -> Mapping[int, TaskRecord]:
+        """
+        Get all active tasks as a read-only snapshot, ordered by ID.
+        Later writes do not change it, so it can be rendered off the event loop.
+        """
+        return self.storage.snapshot()
+    
+    def get_tasks_for_creator(self, user_id: int) -> Dict[int, TaskRecord]:
+        """Get a user's active tasks, ordered by ID"""
+        return {task.id: task for task in self.storage.for_creator(user_id)}
+    
+    def get_tasks_for_channel(self, channel_id: int) -> Dict[int, TaskRecord]:
+        """Get the active tasks created in a channel, ordered by ID"""
+        return {task.id: task for task in self.storage.for_channel(channel_id)}
+    
+    def search_tasks(self, query: str, limit: Optional[int] = None) -> List[TaskRecord]:
+        """Active tasks whose description matches every word (or word prefix) of the query, best first"""
+        return self.storage.search(query, limit)
+    
+    def broad_search_terms(self, query: str) -> List[str]:
+        """Words of a search that prefix too many others to all be searched (see search_index.MAX_PREFIX_EXPANSION)"""
+        return self.storage.broad_search_terms(query)
+    
+    def get_tasks_for_reminder(self, today: Optional[date] = None) -> Dict[int, TaskRecord]:
+        """Get tasks that need reminders (due today, due tomorrow, or overdue)"""
+        overdue, due_today, due_tomorrow = self.get_reminder_buckets(today)
+        return {task.id: task for task in overdue + due_today + due_tomorrow}
+    
+    def roll_over(self, today: Optional[date] = None):
+        """
+        Move the reminder buckets to a new day; a one-day step only loads the
+        tasks due on the new tomorrow
+        """
+        with self._urgency_lock:
+            self._roll_over(today or self.get_current_date())
+    
+    def _roll_over(self, today: date):
+        self.urgency.roll_over(today.toordinal(), self.storage.due_on, self.storage.due_on_or_before)
+        if self._recurring_checked_day != self.urgency.today:
+            self._advance_missed_occurrences(self.urgency.today)
+            self._recurring_checked_day = self.urgency.today
+    
+    def get_reminder_buckets(self, today: Optional[date] = None) -> Tuple[List[TaskRecord], List[TaskRecord], List[TaskRecord]]:
+        """
+        Tasks for the daily reminder, already grouped
+        Returns: (overdue, due today, due tomorrow)
+        """
+        with self._urgency_lock:
+            self._roll_over(today or self.get_current_date())
+            urgency = self.urgency
+            return list(urgency.overdue.values()), list(urgency.due_today.values()), list(urgency.due_tomorrow.values())
+    
+    def get_stats(self, user_id: Optional[int] = None, weeks: int = 4) -> StatsReport:
+        """Completion stats from the archive's running counters (no history scan)"""
+        return self.archive.report(user_id, weeks)
     
     def get_current_date(self) -> date:
-        """Get current date (useful for testing)"""
-        return date.today()
+        """Today's date in the partition's timezone"""
+        return self._local_now().date()
     
     def get_task_count(self) -> int:
         """Get count of active tasks"""
-        return len([task for task in self.tasks.values() if not task['completed']])
+        return self.storage.count()
     
     def cleanup_overdue_tasks(self, days_threshold: int = 30) -> int:
         """
         Remove tasks that are overdue by more than specified days
         Returns: number of tasks removed
         """
-        today = date.today()
-        tasks_to_remove = []
-        
-        for task_id, task in self.tasks.items():
-            if task['completed']:
-                continue
-                
-            days_overdue = (today - task['deadline']).days
-            if days_overdue > days_threshold:
-                tasks_to_remove.append(task_id)
+        # Overdue by more than the threshold means the deadline is before this cutoff
+        cutoff = self.get_current_date() - timedelta(days=days_threshold)
+        candidates = self.storage.get_many(self.storage.ids_due_before(cutoff.toordinal()))
+        # A recurring series is never dropped; its next occurrence replaces the missed one
+        tasks_to_remove = self.storage.delete([task.id for task in candidates.values() if not task.recurrence])
         
-        for task_id in tasks_to_remove:
-            del self.tasks[task_id]
+        if tasks_to_remove:
+            self._track_removed(tasks_to_remove)
+            self._log('cleanup', ids=tasks_to_remove)
+            self.archive.record(OUTCOME_EXPIRED, [candidates[task_id] for task_id in tasks_to_remove], self._local_now())
         
         return len(tasks_to_remove)
@@ -0,0 +1,76 @@
+import sys
+from datetime import datetime, date
+from typing import Any, Optional
+from deadline_parser import format_deadline
+
+_FIELDS = (
+    'id', 'description', 'deadline', 'creator_id', 'creator_name',
+    'channel_id', 'created_at', 'completed', 'due_minute', 'recurrence'
+)
+_KEYS = frozenset(_FIELDS)
+
+
+class TaskRecord:
+    """
+    Compact in-memory task.
+
+    Deadlines are stored as day ordinals (plus an optional time of day in
+    minutes after midnight) and creation times as whole epoch seconds. A
+    recurring task is the next occurrence of its series and carries the
+    canonical repeat rule (see recurrence.py); creator names are interned.
+    Records still support task['deadline']-style reads so code written against
+    the old dict layout keeps working.
+    """
+
+    __slots__ = ('id', 'description', 'deadline_day', 'creator_id', 'creator_name', 'channel_id', 'created_ts',
+                 'due_minute', 'recurrence')
+
+    # Completed tasks are removed from the store, so a live record is never completed
+    completed = False
+
+    def __init__(self, task_id: int, description: str, deadline_day: int, creator_id: int,
+                 creator_name: str, channel_id: int, created_ts: int, due_minute: Optional[int] = None,
+                 recurrence: Optional[str] = None):
+        self.id = task_id
+        self.description = description
+        self.deadline_day = deadline_day
+        self.creator_id = creator_id
+        self.creator_name = sys.intern(creator_name)
+        self.channel_id = channel_id
+        self.created_ts = created_ts
+        self.due_minute = due_minute
+        # Rules repeat across many tasks; share one string per rule
+        self.recurrence = sys.intern(recurrence) if recurrence else None
+
+    @property
+    def deadline(self) -> date:
+        return date.fromordinal(self.deadline_day)
+
+    @property
+    def deadline_text(self) -> str:
+        """Deadline as shown to users, e.g. 2025-07-30 or 2025-07-30 17:00"""
+        return format_deadline(self.deadline_day, self.due_minute)
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromtimestamp(self.created_ts)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in _KEYS else default
+
+    def rescheduled(self, deadline_day: int, due_minute: Optional[int], recurrence: Optional[str]) -> 'TaskRecord':
+        """Copy with a new deadline and repeat rule (records are never mutated in place)"""
+        return TaskRecord(self.id, self.description, deadline_day, self.creator_id, self.creator_name,
+                          self.channel_id, self.created_ts, due_minute, recurrence)
+
+    def to_dict(self) -> dict:
+        """Expand into the legacy dict layout"""
+        return {key: getattr(self, key) for key in _FIELDS}
+
+    def __repr__(self) -> str:
+        return f"TaskRecord(id={self.id}, description={self.description!r}, deadline={self.deadline_text!r})"
@@ -0,0 +1,128 @@
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+from task_manager import TaskManager
+
+_RANGE = re.compile(r'^#?(\d+)(?:-#?(\d+))?$')
+
+
+class TaskSelector:
+    """
+    Parsed batch selection such as "3, 5-9", "mine" or "mine before 2025-08-01".
+
+    Explicit IDs and ranges select those tasks. The filter keywords select the
+    caller's own tasks (only creators may complete a task), optionally limited
+    to those due before a date. When both are given, the filter narrows the
+    IDs: "3-9 before 2025-08-01" selects only tasks #3-#9 that match it.
+    """
+
+    def __init__(self, ranges: List[Tuple[int, int]], mine: bool = False, due_before: Optional[date] = None):
+        self.ranges = ranges
+        self.mine = mine
+        self.due_before = due_before
+
+    @property
+    def has_filter(self) -> bool:
+        return self.mine or self.due_before is not None
+
+    @property
+    def single_id(self) -> Optional[int]:
+        """The task ID when the selection is exactly one ID, else None"""
+        if not self.has_filter and len(self.ranges) == 1 and self.ranges[0][0] == self.ranges[0][1]:
+            return self.ranges[0][0]
+        return None
+
+    @classmethod
+    def parse(cls, text: str) -> 'TaskSelector':
+        """Parse selector text; raises ValueError with a user-facing message"""
+        tokens = [token for token in re.split(r'[\s,]+', text.strip().lower()) if token]
+        if not tokens:
+            raise ValueError("Give at least one task ID, a range like 3-7, or 'mine before YYYY-MM-DD'.")
+
+        ranges = []
+        mine = False
+        due_before = None
+        position = 0
+        while position < len(tokens):
+            token = tokens[position]
+            position += 1
+            if token in ('mine', 'my'):
+                mine = True
+            elif token == 'before':
+                if position >= len(tokens):
+                    raise ValueError("'before' needs a date in YYYY-MM-DD format.")
+                try:
+                    due_before = date.fromisoformat(tokens[position])
+                except ValueError:
+                    raise ValueError(f"Invalid date '{tokens[position]}'. Please use YYYY-MM-DD format.")
+                position += 1
+            else:
+                match = _RANGE.match(token)
+                if not match:
+                    raise ValueError(f"Don't understand '{token}'. Use IDs (3), ranges (3-7), 'mine' or 'before YYYY-MM-DD'.")
+                start = int(match.group(1))
+                end = int(match.group(2) or start)
+                if end < start:
+                    start, end = end, start
+                ranges.append((start, end))
+
+        return cls(ranges, mine, due_before)
+
+    def resolve(self, task_manager: TaskManager, user_id: int) -> List[int]:
+        """Task IDs selected for this user, in ascending order"""
+        if self.has_filter:
+            matching = task_manager.find_tasks(creator_id=user_id, due_before=self.due_before)
+            if not self.ranges:
+                return sorted(matching)
+            return sorted(task_id for task_id in matching
+                          if any(start <= task_id <= end for start, end in self.ranges))
+
+        selected = set()
+        for start, end in self.ranges:
+            if start == end:
+                # Explicit IDs are kept even when missing so they are reported as not found
+                selected.add(start)
+            else:
+                selected.update(task_manager.existing_ids(start, end))
+        return sorted(selected)
+
+
+def _id_list(task_ids: List[int], limit: int = 20) -> str:
+    text = ', '.join(f"#{task_id}" for task_id in task_ids[:limit])
+    if len(task_ids) > limit:
+        text += f" …and {len(task_ids) - limit} more"
+    return text
+
+
+def complete_selection(task_manager: TaskManager, selection: str, user_id: int) -> Tuple[bool, str]:
+    """
+    Complete a single task or a batch described by selector text
+    Returns: (success, message)
+    """
+    try:
+        selector = TaskSelector.parse(selection)
+    except ValueError as e:
+        return False, str(e)
+
+    # A plain single ID keeps the detailed single-task messages
+    if selector.single_id is not None:
+        return task_manager.complete_task(selector.single_id, user_id)
+
+    task_ids = selector.resolve(task_manager, user_id)
+    if not task_ids:
+        return False, "No matching tasks found."
+
+    completed, skipped = task_manager.complete_tasks(task_ids, user_id)
+
+    lines = []
+    if completed:
+        lines.append(f"Completed {len(completed)} task(s): {_id_list(completed)}")
+    else:
+        lines.append("No tasks were completed.")
+    if skipped:
+        lines.append(f"Skipped {len(skipped)}: " + _id_list([task_id for task_id, _ in skipped], limit=10))
+        reasons = {}
+        for _, reason in skipped:
+            reasons[reason] = reasons.get(reason, 0) + 1
+        lines.append("(" + ", ".join(f"{count} {reason}" for reason, count in reasons.items()) + ")")
+    return bool(completed), "\n".join(lines)
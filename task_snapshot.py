@@ -0,0 +1,123 @@
+from collections.abc import Mapping, ValuesView
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+from task_record import TaskRecord
+
+# Tasks are grouped into chunks of 2**CHUNK_BITS consecutive IDs; a write copies at most one chunk
+CHUNK_BITS = 8
+
+Chunks = Dict[int, Dict[int, TaskRecord]]
+
+
+class TaskSnapshot(Mapping):
+    """
+    Read-only task ID -> TaskRecord mapping at one storage version.
+
+    A snapshot only holds references to ID chunks, and the storage never
+    changes a chunk a snapshot can see (see SnapshotChunks), so it can be
+    read from any thread while writes go on. Iteration is in ID order.
+    """
+
+    __slots__ = ('version', '_chunks', '_count', '_ordered')
+
+    def __init__(self, version: int, chunks: Chunks, count: int):
+        self.version = version
+        self._chunks = chunks
+        self._count = count
+        self._ordered: Optional[List[Dict[int, TaskRecord]]] = None
+
+    @classmethod
+    def from_records(cls, version: int, tasks: Iterable[TaskRecord]) -> 'TaskSnapshot':
+        """Snapshot of records read in ID order (backends without a shared in-memory copy)"""
+        chunks: Chunks = {}
+        count = 0
+        for task in tasks:
+            number = task.id >> CHUNK_BITS
+            chunk = chunks.get(number)
+            if chunk is None:
+                chunk = chunks[number] = {}
+            chunk[task.id] = task
+            count += 1
+        return cls(version, chunks, count)
+
+    def _chunks_in_order(self) -> List[Dict[int, TaskRecord]]:
+        if self._ordered is None:
+            self._ordered = [self._chunks[number] for number in sorted(self._chunks)]
+        return self._ordered
+
+    def __getitem__(self, task_id: int) -> TaskRecord:
+        chunk = self._chunks.get(task_id >> CHUNK_BITS)
+        if chunk is None:
+            raise KeyError(task_id)
+        return chunk[task_id]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        return chain.from_iterable(self._chunks_in_order())
+
+    def values(self) -> '_SnapshotValues':
+        return _SnapshotValues(self)
+
+
+class _SnapshotValues(ValuesView):
+    """Records of a snapshot in ID order, without a key lookup per record"""
+
+    __slots__ = ()
+
+    def __iter__(self) -> Iterator[TaskRecord]:
+        return chain.from_iterable(chunk.values() for chunk in self._mapping._chunks_in_order())
+
+
+class SnapshotChunks:
+    """
+    Copy-on-write copy of a backend's tasks, split into ID chunks.
+
+    The backend mirrors every write here. take() publishes the current chunks
+    as a TaskSnapshot; after that, the first write to a chunk copies it (at
+    most 2**CHUNK_BITS entries) instead of changing it in place. A snapshot
+    therefore costs a copy of the chunk table, not of the tasks, and is reused
+    until the next write.
+    """
+
+    def __init__(self, tasks: Iterable[TaskRecord]):
+        self.chunks: Chunks = TaskSnapshot.from_records(0, tasks)._chunks
+        self.count = sum(len(chunk) for chunk in self.chunks.values())
+        # Chunks copied since the last snapshot, safe to change in place
+        self._owned: Set[int] = set(self.chunks)
+        self._snapshot: Optional[TaskSnapshot] = None
+
+    def _writable(self, number: int) -> Dict[int, TaskRecord]:
+        chunk = self.chunks.get(number)
+        if number not in self._owned:
+            chunk = self.chunks[number] = dict(chunk) if chunk else {}
+            self._owned.add(number)
+        elif chunk is None:
+            chunk = self.chunks[number] = {}
+        return chunk
+
+    def put(self, task: TaskRecord):
+        chunk = self._writable(task.id >> CHUNK_BITS)
+        if task.id not in chunk:
+            self.count += 1
+        chunk[task.id] = task
+
+    def remove(self, task_id: int):
+        number = task_id >> CHUNK_BITS
+        if task_id not in self.chunks.get(number, ()):
+            return
+        chunk = self._writable(number)
+        del chunk[task_id]
+        self.count -= 1
+        if not chunk:
+            del self.chunks[number]
+            self._owned.discard(number)
+
+    def take(self, version: int) -> TaskSnapshot:
+        """The snapshot for `version`, reused when nothing was written since the last one"""
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            snapshot = self._snapshot = TaskSnapshot(version, dict(self.chunks), self.count)
+            self._owned = set()
+        return snapshot
@@ -0,0 +1,576 @@
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from deadline_index import DeadlineIndex
+from search_index import SearchIndex, tokenize
+from task_record import TaskRecord
+from task_snapshot import SnapshotChunks, TaskSnapshot
+
+# (description, deadline_day, creator_id, creator_name, channel_id[, due_minute[, recurrence]]) for a task
+# that has no ID yet
+NewTask = Union[
+    Tuple[str, int, int, str, int],
+    Tuple[str, int, int, str, int, Optional[int]],
+    Tuple[str, int, int, str, int, Optional[int], Optional[str]],
+]
+
+# (task_id, deadline_day, due_minute, recurrence) for a task moving to a new deadline
+Reschedule = Tuple[int, int, Optional[int], Optional[str]]
+
+
+class TaskStorage:
+    """
+    Storage backend interface used by TaskManager.
+
+    Backends own task IDs and a version counter that changes on every write,
+    so cached views can tell when to re-render. `blocking` backends do disk
+    I/O on every call; callers on the event loop should run them through
+    TaskPartition.run so the work happens on a thread pool.
+    """
+
+    blocking = False
+
+    @property
+    def version(self) -> int:
+        raise NotImplementedError
+
+    @property
+    def next_task_id(self) -> int:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def get(self, task_id: int) -> Optional[TaskRecord]:
+        raise NotImplementedError
+
+    def get_many(self, task_ids: Iterable[int]) -> Dict[int, TaskRecord]:
+        raise NotImplementedError
+
+    def insert(self, entries: List[NewTask]) -> List[TaskRecord]:
+        """Allocate IDs for and store new tasks, in input order"""
+        raise NotImplementedError
+
+    def reschedule(self, task_id: int, deadline_day: int, due_minute: Optional[int],
+                   recurrence: Optional[str]) -> Optional[TaskRecord]:
+        """Change a task's deadline and repeat rule; returns the updated record, or None if it does not exist"""
+        raise NotImplementedError
+
+    def delete(self, task_ids: List[int]) -> List[int]:
+        """Remove tasks, returning the IDs that existed"""
+        raise NotImplementedError
+
+    def reschedule_many(self, changes: List[Reschedule], delete_ids: List[int]) -> Tuple[List[TaskRecord], List[int]]:
+        """
+        Reschedule some tasks and remove others as one write (one transaction on SQLite)
+        Returns: (updated records, IDs that were removed)
+        """
+        raise NotImplementedError
+
+    def all(self) -> List[TaskRecord]:
+        """Every task, ordered by ID"""
+        raise NotImplementedError
+
+    def snapshot(self) -> TaskSnapshot:
+        """Every task as a read-only mapping that later writes do not change"""
+        raise NotImplementedError
+
+    def for_creator(self, creator_id: int) -> List[TaskRecord]:
+        raise NotImplementedError
+
+    def for_channel(self, channel_id: int) -> List[TaskRecord]:
+        raise NotImplementedError
+
+    def ids_for_creator(self, creator_id: int, due_before_day: Optional[int] = None) -> List[int]:
+        raise NotImplementedError
+
+    def ids_in_range(self, start: int, end: int) -> List[int]:
+        """IDs of existing tasks between start and end (inclusive)"""
+        raise NotImplementedError
+
+    def due_on_or_before(self, day: int) -> List[TaskRecord]:
+        """Tasks with deadline day <= day, earliest first"""
+        raise NotImplementedError
+
+    def due_on(self, day: int) -> List[TaskRecord]:
+        """Tasks due exactly on a day, ordered by ID"""
+        raise NotImplementedError
+
+    def ids_due_before(self, day: int) -> List[int]:
+        raise NotImplementedError
+
+    def search(self, query: str, limit: Optional[int]) -> List[TaskRecord]:
+        """Tasks whose description matches every word (or word prefix) of the query (all of them when limit is None)"""
+        raise NotImplementedError
+
+    def broad_search_terms(self, query: str) -> List[str]:
+        """Query terms too broad for search() to follow every word they prefix"""
+        return []
+
+    def close(self):
+        pass
+
+
+class MemoryTaskStorage(TaskStorage):
+    """
+    Tasks in a dict with deadline, creator and channel indexes.
+
+    Durability comes from TaskManager's journal, which replays into this
+    backend with restore() on startup. With an `id_source` (see
+    shard_coordinator.IdBlockAllocator), new IDs come from a coordinator
+    shared between processes instead of the local counter.
+    """
+
+    def __init__(self, id_source: Optional[Callable[[int, int], int]] = None):
+        self.id_source = id_source
+        self.tasks: Dict[int, TaskRecord] = {}
+        self.deadline_index = DeadlineIndex()
+        # Secondary indexes: creator / channel ID -> insertion-ordered set of task IDs
+        self.by_creator: Dict[int, Dict[int, None]] = {}
+        self.by_channel: Dict[int, Dict[int, None]] = {}
+        self._search_index: Optional[SearchIndex] = None  # Built on first search
+        self._snapshots: Optional[SnapshotChunks] = None  # Built on first snapshot()
+        self._next_task_id = 1
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def next_task_id(self) -> int:
+        return self._next_task_id
+
+    def restore(self, task: TaskRecord):
+        """Put back a task read from the journal or a snapshot"""
+        self._store(task)
+        self._next_task_id = max(self._next_task_id, task.id + 1)
+
+    def set_next_task_id(self, next_task_id: int):
+        self._next_task_id = max(self._next_task_id, next_task_id)
+
+    def _store(self, task: TaskRecord):
+        self.tasks[task.id] = task
+        self.deadline_index.add(task.id, task.deadline_day)
+        self.by_creator.setdefault(task.creator_id, {})[task.id] = None
+        self.by_channel.setdefault(task.channel_id, {})[task.id] = None
+        if self._search_index is not None:
+            self._search_index.add(task.id, task.description)
+        if self._snapshots is not None:
+            self._snapshots.put(task)
+        self._version += 1
+
+    def count(self) -> int:
+        return len(self.tasks)
+
+    def get(self, task_id: int) -> Optional[TaskRecord]:
+        return self.tasks.get(task_id)
+
+    def get_many(self, task_ids: Iterable[int]) -> Dict[int, TaskRecord]:
+        tasks = self.tasks
+        return {task_id: tasks[task_id] for task_id in task_ids if task_id in tasks}
+
+    def insert(self, entries: List[NewTask]) -> List[TaskRecord]:
+        if self.id_source is not None:
+            first_id = self.id_source(len(entries), self._next_task_id)
+        else:
+            first_id = self._next_task_id
+        self._next_task_id = first_id + len(entries)
+        created_ts = int(datetime.now().timestamp())
+        tasks = [_new_record(first_id + offset, entry, created_ts) for offset, entry in enumerate(entries)]
+        for task in tasks:
+            self._store(task)
+        return tasks
+
+    def reschedule(self, task_id: int, deadline_day: int, due_minute: Optional[int],
+                   recurrence: Optional[str]) -> Optional[TaskRecord]:
+        task = self._move(task_id, deadline_day, due_minute, recurrence)
+        if task is not None:
+            self._version += 1
+        return task
+
+    def _move(self, task_id: int, deadline_day: int, due_minute: Optional[int],
+              recurrence: Optional[str]) -> Optional[TaskRecord]:
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        # Creator, channel and description are unchanged, so only the deadline index moves
+        self.deadline_index.remove(task_id, task.deadline_day)
+        task = self.tasks[task_id] = task.rescheduled(deadline_day, due_minute, recurrence)
+        self.deadline_index.add(task_id, deadline_day)
+        if self._snapshots is not None:
+            self._snapshots.put(task)
+        return task
+
+    def reschedule_many(self, changes: List[Reschedule], delete_ids: List[int]) -> Tuple[List[TaskRecord], List[int]]:
+        updated = [task for task in (self._move(*change) for change in changes) if task is not None]
+        if updated:
+            self._version += 1
+        return updated, self.delete(delete_ids)
+
+    def delete(self, task_ids: List[int]) -> List[int]:
+        removed = []
+        for task_id in task_ids:
+            task = self.tasks.pop(task_id, None)
+            if task is None:
+                continue
+            self.deadline_index.remove(task_id, task.deadline_day)
+            _unindex(self.by_creator, task.creator_id, task_id)
+            _unindex(self.by_channel, task.channel_id, task_id)
+            if self._search_index is not None:
+                self._search_index.remove(task_id)
+            if self._snapshots is not None:
+                self._snapshots.remove(task_id)
+            removed.append(task_id)
+        if removed:
+            self._version += 1
+        return removed
+
+    def all(self) -> List[TaskRecord]:
+        # IDs are allocated in increasing order, so insertion order is ID order
+        return list(self.tasks.values())
+
+    def snapshot(self) -> TaskSnapshot:
+        # Kept in step with every write once the first snapshot is taken, so later ones copy no tasks
+        if self._snapshots is None:
+            self._snapshots = SnapshotChunks(self.tasks.values())
+        return self._snapshots.take(self._version)
+
+    def for_creator(self, creator_id: int) -> List[TaskRecord]:
+        return self._lookup(self.by_creator.get(creator_id))
+
+    def for_channel(self, channel_id: int) -> List[TaskRecord]:
+        return self._lookup(self.by_channel.get(channel_id))
+
+    def _lookup(self, task_ids: Optional[Dict[int, None]]) -> List[TaskRecord]:
+        if not task_ids:
+            return []
+        return [self.tasks[task_id] for task_id in sorted(task_ids)]
+
+    def ids_for_creator(self, creator_id: int, due_before_day: Optional[int] = None) -> List[int]:
+        candidates = self.by_creator.get(creator_id, {})
+        if due_before_day is None:
+            return list(candidates)
+        return [task_id for task_id in candidates if self.tasks[task_id].deadline_day < due_before_day]
+
+    def ids_in_range(self, start: int, end: int) -> List[int]:
+        tasks = self.tasks
+        if end - start + 1 <= len(tasks):
+            return [task_id for task_id in range(start, end + 1) if task_id in tasks]
+        # Huge ranges: walk the (smaller) store instead of the range
+        return [task_id for task_id in tasks if start <= task_id <= end]
+
+    def due_on_or_before(self, day: int) -> List[TaskRecord]:
+        return [self.tasks[task_id] for task_id in self.deadline_index.due_on_or_before(_date(day))]
+
+    def due_on(self, day: int) -> List[TaskRecord]:
+        return [self.tasks[task_id] for task_id in self.deadline_index.due_on(_date(day))]
+
+    def ids_due_before(self, day: int) -> List[int]:
+        return list(self.deadline_index.due_before(_date(day)))
+
+    @property
+    def search_index(self) -> SearchIndex:
+        """Description index, built on first use so startup replay does not pay for it"""
+        if self._search_index is None:
+            index = SearchIndex()
+            for task in self.tasks.values():
+                index.add(task.id, task.description)
+            self._search_index = index
+        return self._search_index
+
+    def search(self, query: str, limit: Optional[int]) -> List[TaskRecord]:
+        task_ids = self.search_index.search(query, rank_key=lambda task_id: self.tasks[task_id].deadline_day, limit=limit)
+        return [self.tasks[task_id] for task_id in task_ids]
+
+    def broad_search_terms(self, query: str) -> List[str]:
+        return self.search_index.broad_terms(query)
+
+
+def _date(day: int) -> date:
+    return date.fromordinal(day)
+
+
+def _new_record(task_id: int, entry: NewTask, created_ts: int) -> TaskRecord:
+    description, deadline_day, creator_id, creator_name, channel_id, *optional = entry
+    optional += [None] * (2 - len(optional))
+    return TaskRecord(task_id, description, deadline_day, creator_id, creator_name, channel_id, created_ts,
+                      optional[0], optional[1])
+
+
+def _unindex(index: Dict[int, Dict[int, None]], key: int, task_id: int):
+    """Remove a task ID from a secondary index, dropping empty entries"""
+    task_ids = index.get(key)
+    if task_ids is not None:
+        task_ids.pop(task_id, None)
+        if not task_ids:
+            del index[key]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    deadline_day INTEGER NOT NULL,
+    creator_id INTEGER NOT NULL,
+    creator_name TEXT NOT NULL,
+    channel_id INTEGER NOT NULL,
+    created_ts INTEGER NOT NULL,
+    due_minute INTEGER,
+    recurrence TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_deadline ON tasks (deadline_day);
+CREATE INDEX IF NOT EXISTS tasks_creator ON tasks (creator_id, deadline_day);
+CREATE INDEX IF NOT EXISTS tasks_channel ON tasks (channel_id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+# External-content full-text index kept in sync by triggers
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(description, content='tasks', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts (rowid, description) VALUES (new.id, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, description) VALUES ('delete', old.id, old.description);
+END;
+"""
+
+# Statements are kept as constants so sqlite3's statement cache reuses the prepared forms
+_COLUMNS = "id, description, deadline_day, creator_id, creator_name, channel_id, created_ts, due_minute, recurrence"
+_SQL_GET = f"SELECT {_COLUMNS} FROM tasks WHERE id = ?"
+_SQL_INSERT = f"INSERT INTO tasks ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+_SQL_RESCHEDULE = "UPDATE tasks SET deadline_day = ?, due_minute = ?, recurrence = ? WHERE id = ?"
+_SQL_DELETE = "DELETE FROM tasks WHERE id = ?"
+_SQL_ALL = f"SELECT {_COLUMNS} FROM tasks ORDER BY id"
+_SQL_FOR_CREATOR = f"SELECT {_COLUMNS} FROM tasks WHERE creator_id = ? ORDER BY id"
+_SQL_FOR_CHANNEL = f"SELECT {_COLUMNS} FROM tasks WHERE channel_id = ? ORDER BY id"
+_SQL_IDS_FOR_CREATOR = "SELECT id FROM tasks WHERE creator_id = ? AND deadline_day < ? ORDER BY id"
+_SQL_IDS_IN_RANGE = "SELECT id FROM tasks WHERE id BETWEEN ? AND ? ORDER BY id"
+_SQL_DUE_ON_OR_BEFORE = f"SELECT {_COLUMNS} FROM tasks WHERE deadline_day <= ? ORDER BY deadline_day, id"
+_SQL_DUE_ON = f"SELECT {_COLUMNS} FROM tasks WHERE deadline_day = ? ORDER BY id"
+_SQL_IDS_DUE_BEFORE = "SELECT id FROM tasks WHERE deadline_day < ? ORDER BY deadline_day, id"
+_SQL_COUNT = "SELECT COUNT(*) FROM tasks"
+_SQL_DATA_VERSION = "PRAGMA data_version"
+_SQL_GET_META = "SELECT value FROM meta WHERE key = ?"
+_SQL_SET_META = "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value"
+_SQL_SEARCH_FTS = (f"SELECT {', '.join('t.' + c for c in _COLUMNS.split(', '))} FROM tasks_fts f "
+                   "JOIN tasks t ON t.id = f.rowid WHERE tasks_fts MATCH ? ORDER BY t.deadline_day, t.id LIMIT ?")
+
+# SQLite limits bound parameters per statement; batch IN (...) lookups below that
+_IN_BATCH = 500
+
+
+class SQLiteTaskStorage(TaskStorage):
+    """
+    Tasks in an SQLite database (WAL mode) with indexes on deadline, creator
+    and channel.
+
+    Nothing is loaded into memory at startup beyond the row count; every
+    query goes to the database. One connection is shared behind a lock, so
+    calls are safe from the event loop and from TaskPartition's thread pool.
+    Commits use synchronous=NORMAL: a crash of the bot never loses a
+    committed change, a power cut may lose the last few.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=64)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        self._conn.executescript(_SCHEMA)
+        # Databases created before these columns existed
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        for column, column_type in (('due_minute', 'INTEGER'), ('recurrence', 'TEXT')):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} {column_type}")
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: fall back to LIKE scans for search
+            self.full_text = False
+
+        self._count = self._conn.execute(_SQL_COUNT).fetchone()[0]
+        self._count_data_version = self._conn.execute(_SQL_DATA_VERSION).fetchone()[0]
+        row = self._conn.execute(_SQL_GET_META, ('next_task_id',)).fetchone()
+        max_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+        self._next_task_id = max(row[0] if row else 1, max_id + 1)
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def next_task_id(self) -> int:
+        return self._next_task_id
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _records(self, sql: str, params=()) -> List[TaskRecord]:
+        return [TaskRecord(*row) for row in self._query(sql, params)]
+
+    def count(self) -> int:
+        with self._lock:
+            # data_version only moves when another connection (another bot process) commits;
+            # this connection's own writes adjust the count directly
+            data_version = self._conn.execute(_SQL_DATA_VERSION).fetchone()[0]
+            if data_version != self._count_data_version:
+                self._count = self._conn.execute(_SQL_COUNT).fetchone()[0]
+                self._count_data_version = data_version
+            return self._count
+
+    def get(self, task_id: int) -> Optional[TaskRecord]:
+        rows = self._query(_SQL_GET, (task_id,))
+        return TaskRecord(*rows[0]) if rows else None
+
+    def get_many(self, task_ids: Iterable[int]) -> Dict[int, TaskRecord]:
+        task_ids = list(task_ids)
+        found = {}
+        for start in range(0, len(task_ids), _IN_BATCH):
+            batch = task_ids[start:start + _IN_BATCH]
+            sql = f"SELECT {_COLUMNS} FROM tasks WHERE id IN ({', '.join('?' * len(batch))})"
+            for task in self._records(sql, batch):
+                found[task.id] = task
+        return found
+
+    def insert(self, entries: List[NewTask]) -> List[TaskRecord]:
+        if not entries:
+            return []
+        created_ts = int(datetime.now().timestamp())
+        with self._lock:
+            with self._transaction():
+                # Read the counter inside the write transaction: other processes may share the file
+                row = self._conn.execute(_SQL_GET_META, ('next_task_id',)).fetchone()
+                first_id = max(row[0] if row else 1, self._next_task_id)
+                tasks = [_new_record(first_id + offset, entry, created_ts) for offset, entry in enumerate(entries)]
+                self._conn.executemany(_SQL_INSERT, [
+                    (task.id, task.description, task.deadline_day, task.creator_id,
+                     task.creator_name, task.channel_id, task.created_ts, task.due_minute, task.recurrence)
+                    for task in tasks
+                ])
+                self._conn.execute(_SQL_SET_META, ('next_task_id', first_id + len(tasks)))
+            self._next_task_id = first_id + len(tasks)
+            self._count += len(tasks)
+            self._version += 1
+        return tasks
+
+    def reschedule(self, task_id: int, deadline_day: int, due_minute: Optional[int],
+                   recurrence: Optional[str]) -> Optional[TaskRecord]:
+        with self._lock:
+            with self._transaction():
+                if not self._conn.execute(_SQL_RESCHEDULE, (deadline_day, due_minute, recurrence, task_id)).rowcount:
+                    return None
+                row = self._conn.execute(_SQL_GET, (task_id,)).fetchone()
+            self._version += 1
+        return TaskRecord(*row)
+
+    def delete(self, task_ids: List[int]) -> List[int]:
+        removed = []
+        with self._lock:
+            with self._transaction():
+                for task_id in task_ids:
+                    if self._conn.execute(_SQL_DELETE, (task_id,)).rowcount:
+                        removed.append(task_id)
+            if removed:
+                self._count -= len(removed)
+                self._version += 1
+        return removed
+
+    def reschedule_many(self, changes: List[Reschedule], delete_ids: List[int]) -> Tuple[List[TaskRecord], List[int]]:
+        updated = []
+        removed = []
+        with self._lock:
+            with self._transaction():
+                for task_id, deadline_day, due_minute, recurrence in changes:
+                    if self._conn.execute(_SQL_RESCHEDULE, (deadline_day, due_minute, recurrence, task_id)).rowcount:
+                        updated.append(TaskRecord(*self._conn.execute(_SQL_GET, (task_id,)).fetchone()))
+                for task_id in delete_ids:
+                    if self._conn.execute(_SQL_DELETE, (task_id,)).rowcount:
+                        removed.append(task_id)
+            self._count -= len(removed)
+            if updated or removed:
+                self._version += 1
+        return updated, removed
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+    def all(self) -> List[TaskRecord]:
+        return self._records(_SQL_ALL)
+
+    def snapshot(self) -> TaskSnapshot:
+        # Tasks live on disk, so a snapshot is a copy; rows and version are read under one lock
+        with self._lock:
+            rows = self._conn.execute(_SQL_ALL).fetchall()
+            version = self._version
+        return TaskSnapshot.from_records(version, (TaskRecord(*row) for row in rows))
+
+    def for_creator(self, creator_id: int) -> List[TaskRecord]:
+        return self._records(_SQL_FOR_CREATOR, (creator_id,))
+
+    def for_channel(self, channel_id: int) -> List[TaskRecord]:
+        return self._records(_SQL_FOR_CHANNEL, (channel_id,))
+
+    def ids_for_creator(self, creator_id: int, due_before_day: Optional[int] = None) -> List[int]:
+        # No cutoff means every deadline, which is any day before the largest ordinal
+        cutoff = due_before_day if due_before_day is not None else 2 ** 62
+        return [row[0] for row in self._query(_SQL_IDS_FOR_CREATOR, (creator_id, cutoff))]
+
+    def ids_in_range(self, start: int, end: int) -> List[int]:
+        return [row[0] for row in self._query(_SQL_IDS_IN_RANGE, (start, end))]
+
+    def due_on_or_before(self, day: int) -> List[TaskRecord]:
+        return self._records(_SQL_DUE_ON_OR_BEFORE, (day,))
+
+    def due_on(self, day: int) -> List[TaskRecord]:
+        return self._records(_SQL_DUE_ON, (day,))
+
+    def ids_due_before(self, day: int) -> List[int]:
+        return [row[0] for row in self._query(_SQL_IDS_DUE_BEFORE, (day,))]
+
+    def search(self, query: str, limit: Optional[int]) -> List[TaskRecord]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+        if limit is None:
+            limit = -1  # SQLite's "no limit"
+        if self.full_text:
+            # Every term as a quoted prefix query, ANDed together
+            match = ' '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+            return self._records(_SQL_SEARCH_FTS, (match, limit))
+
+        where = ' AND '.join('description LIKE ?' for _ in terms)
+        sql = f"SELECT {_COLUMNS} FROM tasks WHERE {where} ORDER BY deadline_day, id LIMIT ?"
+        return self._records(sql, [f"%{term}%" for term in terms] + [limit])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _Transaction:
+    """BEGIN ... COMMIT (or ROLLBACK on error) on an autocommit connection"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
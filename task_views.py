@@ -0,0 +1,274 @@
+import asyncio
+import bisect
+from collections import OrderedDict
+from datetime import date
+from typing import Awaitable, Callable, Collection, Dict, Hashable, List, Optional, Tuple
+import discord
+from task_record import TaskRecord
+import tracing
+
+# Discord allows 25 fields and 6000 characters per embed; stay well inside both
+MAX_FIELDS_PER_PAGE = 10
+MAX_PAGE_CHARS = 5000
+MAX_FIELD_NAME = 256
+MAX_FIELD_VALUE = 1024
+
+# Boards larger than this are formatted on a worker thread to keep the event loop free
+RENDER_OFFLOAD_THRESHOLD = 500
+
+
+def describe_status(days_left: int) -> str:
+    """Human readable deadline status"""
+    if days_left < 0:
+        return f"⚠️ Overdue by {abs(days_left)} days"
+    elif days_left == 0:
+        return "🔥 Due today!"
+    elif days_left <= 3:
+        return f"⏰ {days_left} days left"
+    else:
+        return f"📅 {days_left} days left"
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+
+class TaskPage:
+    """One page of pre-formatted embed fields"""
+
+    __slots__ = ('first_id', 'fields')
+
+    def __init__(self, first_id: int, fields: List[Tuple[str, str]]):
+        self.first_id = first_id
+        self.fields = fields
+
+
+def paginate_tasks(tasks: Collection[TaskRecord], today: date) -> List[TaskPage]:
+    """Format tasks into pages that respect Discord's per-embed field and size limits"""
+    pages = []
+    fields: List[Tuple[str, str]] = []
+    chars = 0
+    first_id = 0
+    today_ordinal = today.toordinal()
+
+    for task in tasks:
+        name = _clip(f"Task #{task.id}: {task.description}", MAX_FIELD_NAME)
+        repeats = f"Repeats: 🔁 {task.recurrence}\n" if task.recurrence else ""
+        value = _clip(
+            f"Created by: {task.creator_name}\n"
+            f"Deadline: {task.deadline_text}\n"
+            f"{repeats}"
+            f"Status: {describe_status(task.deadline_day - today_ordinal)}",
+            MAX_FIELD_VALUE
+        )
+        size = len(name) + len(value)
+
+        if fields and (len(fields) >= MAX_FIELDS_PER_PAGE or chars + size > MAX_PAGE_CHARS):
+            pages.append(TaskPage(first_id, fields))
+            fields = []
+            chars = 0
+        if not fields:
+            first_id = task.id
+        fields.append((name, value))
+        chars += size
+
+    if fields:
+        pages.append(TaskPage(first_id, fields))
+    return pages
+
+
+class RenderedList:
+    """Pages rendered for one store version"""
+
+    __slots__ = ('version', 'today', 'pages', 'total', '_first_ids', '_page_of')
+
+    def __init__(self, version: int, today: date, pages: List[TaskPage], total: int):
+        self.version = version
+        self.today = today
+        self.pages = pages
+        self.total = total
+        self._first_ids = [page.first_id for page in pages]
+        # Search results are ranked rather than in ID order; their pages are found by first ID alone
+        self._page_of: Optional[Dict[int, int]] = None
+        if any(a >= b for a, b in zip(self._first_ids, self._first_ids[1:])):
+            self._page_of = {first_id: index for index, first_id in enumerate(self._first_ids)}
+
+    def page_index(self, cursor: Optional[int]) -> int:
+        """Index of the page containing task ID `cursor` (first page when unset)"""
+        if cursor is None or not self.pages:
+            return 0
+        if self._page_of is not None:
+            return self._page_of.get(cursor, 0)
+        return max(0, bisect.bisect_right(self._first_ids, cursor) - 1)
+
+    def embed(self, index: int, title: str) -> discord.Embed:
+        embed = discord.Embed(title=title, color=0x3498db)
+        for name, value in self.pages[index].fields:
+            embed.add_field(name=name, value=value, inline=False)
+        embed.set_footer(text=f"Page {index + 1}/{len(self.pages)} • {self.total} task(s)")
+        return embed
+
+
+class TaskListCache:
+    """
+    Rendered list pages keyed by (partition, scope).
+
+    An entry is reused until the partition's store version (or the date) changes,
+    so repeated /listtasks calls between edits are served without re-formatting.
+    Concurrent requests for the same version share a single in-flight render.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self._entries: 'OrderedDict[Hashable, RenderedList]' = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def clear(self):
+        """Forget every rendered list (store versions restart when a partition is reloaded)"""
+        self._entries.clear()
+
+    async def get(self, key: Hashable, version: int, today: date,
+                  load: Callable[[], Awaitable[Collection[TaskRecord]]]) -> RenderedList:
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version and entry.today == today:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        flight_key = (key, version, today)
+        future = self._inflight.get(flight_key)
+        if future is not None:
+            self.shared += 1
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        future = self._inflight[flight_key] = loop.create_future()
+        try:
+            # Records are immutable and snapshots never change, so this is a consistent view even off the loop
+            tasks = await load()
+            with tracing.span('render'):
+                if len(tasks) > RENDER_OFFLOAD_THRESHOLD:
+                    pages = await loop.run_in_executor(None, paginate_tasks, tasks, today)
+                else:
+                    pages = paginate_tasks(tasks, today)
+            entry = RenderedList(version, today, pages, len(tasks))
+
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._inflight[flight_key]
+
+
+class TaskListView(discord.ui.View):
+    """Previous/next buttons for a paginated task list"""
+
+    def __init__(self, fetch: Callable[[], Awaitable[RenderedList]], title: str,
+                 listing: RenderedList, timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.fetch = fetch
+        self.title = title
+        # Cursor is the first task ID on the shown page, so the position survives edits
+        self.cursor: Optional[int] = listing.pages[0].first_id if listing.pages else None
+        self._sync_buttons(listing, 0)
+
+    def _sync_buttons(self, listing: RenderedList, index: int):
+        self.previous_page.disabled = index <= 0
+        self.next_page.disabled = index >= len(listing.pages) - 1
+
+    async def _show(self, interaction: discord.Interaction, step: int):
+        listing = await self.fetch()
+        if not listing.pages:
+            await interaction.response.edit_message(content="📝 No active tasks found.", embed=None, view=None)
+            return
+
+        index = min(max(listing.page_index(self.cursor) + step, 0), len(listing.pages) - 1)
+        self.cursor = listing.pages[index].first_id
+        self._sync_buttons(listing, index)
+        await interaction.response.edit_message(embed=listing.embed(index, self.title), view=self)
+
+    @discord.ui.button(label='◀ Previous', style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, -1)
+
+    @discord.ui.button(label='Next ▶', style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, 1)
+
+
+async def open_task_list(fetch: Callable[[], Awaitable[RenderedList]], title: str) -> Optional[dict]:
+    """
+    Render the first page of a task list.
+    Returns: send() keyword arguments (embed, plus a view when there are several pages), or None if empty
+    """
+    listing = await fetch()
+    if not listing.pages:
+        return None
+
+    message = {'embed': listing.embed(0, title)}
+    if len(listing.pages) > 1:
+        message['view'] = TaskListView(fetch, title, listing)
+    return message
+
+
+def _describe_counter(counter) -> str:
+    """One-line summary of a StatCounter"""
+    if not counter.closed:
+        return "Nothing completed yet"
+    text = f"✅ {counter.completed} done"
+    if counter.expired:
+        text += f", ⌛ {counter.expired} expired"
+    text += f" • {counter.on_time_rate:.0%} on time"
+    if counter.average_lateness is not None:
+        text += f" • late by {_describe_minutes(counter.average_lateness)} on average"
+    return text
+
+
+def _describe_minutes(minutes: float) -> str:
+    minutes = round(minutes)
+    days, rest = divmod(minutes, 24 * 60)
+    if days:
+        return f"{days}d {rest // 60}h"
+    if rest >= 60:
+        return f"{rest // 60}h {rest % 60}m"
+    return f"{rest}m"
+
+
+def stats_embed(report, title: str, user_label: Optional[str] = None) -> discord.Embed:
+    """Embed for /stats from a StatsReport (precomputed counters only)"""
+    embed = discord.Embed(title=title, color=0x9b59b6)
+    embed.add_field(name="Overall", value=_describe_counter(report.total), inline=False)
+    if user_label is not None:
+        embed.add_field(
+            name=_clip(user_label, MAX_FIELD_NAME),
+            value=_describe_counter(report.user) if report.user is not None else "Nothing completed yet",
+            inline=False
+        )
+    if report.weeks:
+        embed.add_field(
+            name="Recent weeks",
+            value='\n'.join(f"**{week}**: {_describe_counter(counter)}" for week, counter in report.weeks),
+            inline=False
+        )
+    if report.top_users:
+        embed.add_field(
+            name="Most tasks completed",
+            value=_clip('\n'.join(f"{rank}. {name}: {_describe_counter(counter)}"
+                                  for rank, (_, name, counter) in enumerate(report.top_users, 1)),
+                        MAX_FIELD_VALUE),
+            inline=False
+        )
+    embed.set_footer(text="On-time rate counts expired tasks as missed • lateness averages late completions only")
+    return embed
@@ -0,0 +1,206 @@
+import contextvars
+import cProfile
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Callable, List, Optional, Tuple
+from config import Config
+import metrics
+
+# A sampled invocation whose trace was never finished (e.g. its task was cancelled) frees the profiler after this long
+STALE_PROFILE_SECONDS = 300
+
+# The trace of the command running in the current task, if any
+_current: contextvars.ContextVar[Optional['Trace']] = contextvars.ContextVar('command_trace', default=None)
+
+
+class Trace:
+    """Timing of one command invocation, split into named spans"""
+
+    __slots__ = ('command', 'kind', 'started_at', 'spans', 'finished', 'profile', 'tracing_memory')
+
+    def __init__(self, command: str, kind: str):
+        self.command = command
+        self.kind = kind
+        self.started_at = time.perf_counter()
+        self.spans: List[Tuple[str, float]] = []  # (name, seconds) in the order they ended
+        self.finished = False
+        self.profile: Optional[cProfile.Profile] = None
+        self.tracing_memory = False
+
+    def add_span(self, name: str, seconds: float):
+        if not self.finished:
+            self.spans.append((name, seconds))
+
+    def summary(self) -> str:
+        """Spans with the same name added up, e.g. 'parse 1 ms, store:add_task 840 ms, send 35 ms'"""
+        totals = {}
+        for name, seconds in self.spans:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return ', '.join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in totals.items())
+
+
+class _Span:
+    __slots__ = ('name', 'trace', 'started_at')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace = _current.get()
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.trace is not None:
+            self.trace.add_span(self.name, time.perf_counter() - self.started_at)
+        return False
+
+
+def span(name: str) -> _Span:
+    """
+    Time a block as part of the current command's trace:
+
+        with tracing.span('render'):
+            ...
+
+    Works in sync and async code; outside a command it only costs a lookup.
+    """
+    return _Span(name)
+
+
+def current() -> Optional[Trace]:
+    return _current.get()
+
+
+class CommandTracer:
+    """
+    Per-invocation tracing for slash and prefix commands.
+
+    start() opens a trace in the command's context so span() calls anywhere
+    below it (storage calls, rendering, outbound sends) land in it; finish()
+    records span metrics and logs invocations slower than the threshold.
+    A sampled share of invocations also runs under cProfile and/or
+    tracemalloc, and their profiles are written to disk only when the
+    invocation turns out slow. Both profilers are process-wide, so at most
+    one invocation is profiled at a time and the profile also covers
+    whatever else ran on the event loop meanwhile.
+    """
+
+    def __init__(self, slow_threshold: float = 1.0, profile_rate: float = 0.0, tracemalloc_rate: float = 0.0,
+                 profile_dir: str = '', keep: int = 50, rng: Callable[[], float] = random.random):
+        self.slow_threshold = slow_threshold
+        self.profile_rate = profile_rate
+        self.tracemalloc_rate = tracemalloc_rate
+        self.profile_dir = profile_dir
+        self.keep = keep
+        self.rng = rng
+        self.slow = 0
+        self._profiling: Optional[Trace] = None
+        self._tracing_memory: Optional[Trace] = None
+        self._dump_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> 'CommandTracer':
+        return cls(
+            slow_threshold=Config.TRACE_SLOW_MS / 1000,
+            profile_rate=Config.TRACE_PROFILE_RATE,
+            tracemalloc_rate=Config.TRACE_TRACEMALLOC_RATE,
+            profile_dir=Config.TRACE_PROFILE_DIR or os.path.join(
+                Config.DATA_DIR or tempfile.gettempdir(), 'taskpilot-profiles'),
+            keep=Config.TRACE_PROFILE_KEEP
+        )
+
+    def start(self, command: str, kind: str) -> Trace:
+        """Open a trace for a command invocation in the current context"""
+        trace = Trace(command, kind)
+        _current.set(trace)
+        self._release_stale(trace.started_at)
+        if self.profile_dir:
+            if self._profiling is None and self.profile_rate and self.rng() < self.profile_rate:
+                self._profiling = trace
+                trace.profile = cProfile.Profile()
+                trace.profile.enable()
+            if (self._tracing_memory is None and self.tracemalloc_rate and self.rng() < self.tracemalloc_rate
+                    and not tracemalloc.is_tracing()):
+                self._tracing_memory = trace
+                trace.tracing_memory = True
+                tracemalloc.start()
+        return trace
+
+    def _release_stale(self, now: float):
+        for sampled in (self._profiling, self._tracing_memory):
+            if sampled is not None and now - sampled.started_at > STALE_PROFILE_SECONDS:
+                self._stop_sampling(sampled, keep_snapshot=False)
+
+    def _stop_sampling(self, trace: Trace, keep_snapshot: bool):
+        """Stop the profilers a trace holds; returns (profile, tracemalloc snapshot)"""
+        profile = snapshot = None
+        if trace.profile is not None:
+            trace.profile.disable()
+            profile = trace.profile
+            trace.profile = None
+            self._profiling = None
+        if trace.tracing_memory:
+            snapshot = tracemalloc.take_snapshot() if keep_snapshot else None
+            tracemalloc.stop()
+            trace.tracing_memory = False
+            self._tracing_memory = None
+        return profile, snapshot
+
+    def finish(self, trace: Trace, status: str):
+        """Close a trace: span metrics, the slow command log and any sampled profiles"""
+        if trace.finished:
+            return
+        trace.finished = True
+        elapsed = time.perf_counter() - trace.started_at
+
+        profile, snapshot = self._stop_sampling(trace, keep_snapshot=elapsed >= self.slow_threshold)
+
+        for name, seconds in trace.spans:
+            metrics.COMMAND_SPANS.observe(seconds, trace.command, name)
+
+        if elapsed < self.slow_threshold:
+            return
+        self.slow += 1
+        metrics.SLOW_COMMANDS.inc(trace.command, trace.kind)
+        prefix = '/' if trace.kind == 'slash' else Config.COMMAND_PREFIX
+        print(f"🐢 Slow command {prefix}{trace.command} ({status}) took {elapsed * 1000:.0f} ms"
+              + (f": {trace.summary()}" if trace.spans else ""))
+
+        if profile is not None or snapshot is not None:
+            base = f"{time.strftime('%Y%m%d-%H%M%S')}-{_safe_name(trace.command)}-{elapsed * 1000:.0f}ms"
+            # Writing a profile blocks, so keep it off the event loop
+            threading.Thread(target=self._dump, args=(base, profile, snapshot), name='trace-dump', daemon=True).start()
+
+    def _dump(self, base: str, profile: Optional[cProfile.Profile], snapshot: Optional[tracemalloc.Snapshot]):
+        try:
+            with self._dump_lock:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                if profile is not None:
+                    # Inspect with: python -m pstats <file>
+                    profile.dump_stats(os.path.join(self.profile_dir, base + '.prof'))
+                if snapshot is not None:
+                    # Load with tracemalloc.Snapshot.load(<file>)
+                    snapshot.dump(os.path.join(self.profile_dir, base + '.tracemalloc'))
+                self._prune()
+        except Exception as e:
+            print(f"❌ Error writing command profile: {str(e)}")
+
+    def _prune(self):
+        """Keep only the newest `keep` profile files"""
+        paths = sorted(
+            (os.path.join(self.profile_dir, name) for name in os.listdir(self.profile_dir)
+             if name.endswith(('.prof', '.tracemalloc'))),
+            key=os.path.getmtime
+        )
+        for path in paths[:max(0, len(paths) - self.keep)]:
+            os.remove(path)
+
+
+def _safe_name(command: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', command)
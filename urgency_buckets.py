@@ -0,0 +1,73 @@
+from typing import Callable, Dict, List, Optional
+from task_record import TaskRecord
+
+
+class UrgencyBuckets:
+    """
+    Tasks due soon, already split the way the daily reminder shows them:
+    overdue, due today and due tomorrow.
+
+    Adds and completions update the buckets directly, so reading them never
+    scans the store. When the date moves on by one day, roll_over() shifts
+    today into overdue and tomorrow into today and only fetches the tasks
+    due on the new tomorrow. Any other date change (first use, a clock or
+    timezone jump) rebuilds from the store.
+    """
+
+    def __init__(self):
+        self.today: Optional[int] = None
+        self.overdue: Dict[int, TaskRecord] = {}
+        self.due_today: Dict[int, TaskRecord] = {}
+        self.due_tomorrow: Dict[int, TaskRecord] = {}
+
+    def __len__(self) -> int:
+        return len(self.overdue) + len(self.due_today) + len(self.due_tomorrow)
+
+    def _bucket(self, day: int) -> Optional[Dict[int, TaskRecord]]:
+        if day < self.today:
+            return self.overdue
+        if day == self.today:
+            return self.due_today
+        if day == self.today + 1:
+            return self.due_tomorrow
+        return None
+
+    def add(self, task: TaskRecord):
+        """Track a new task if it falls in one of the buckets"""
+        if self.today is None:
+            return
+        bucket = self._bucket(task.deadline_day)
+        if bucket is not None:
+            bucket[task.id] = task
+
+    def remove(self, task_id: int):
+        """Forget a completed or deleted task"""
+        if self.overdue.pop(task_id, None) is None and self.due_today.pop(task_id, None) is None:
+            self.due_tomorrow.pop(task_id, None)
+
+    def rebuild(self, today: int, due_soon: List[TaskRecord]):
+        """Reset the buckets for `today` from all tasks due on or before tomorrow"""
+        self.today = today
+        self.overdue, self.due_today, self.due_tomorrow = {}, {}, {}
+        for task in due_soon:
+            self.add(task)
+
+    def roll_over(self, today: int, fetch_due_on: Callable[[int], List[TaskRecord]],
+                  fetch_due_soon: Callable[[int], List[TaskRecord]]):
+        """
+        Bring the buckets up to date for `today`.
+
+        fetch_due_on(day) returns the tasks due on one day and is all a
+        one-day step needs; fetch_due_soon(day) returns every task due on or
+        before a day and is only used for a full rebuild.
+        """
+        if today == self.today:
+            return
+        if self.today is not None and today == self.today + 1:
+            # Yesterday's "today" is overdue now; it is later than every overdue deadline, so order holds
+            self.overdue.update(self.due_today)
+            self.due_today = self.due_tomorrow
+            self.due_tomorrow = {task.id: task for task in fetch_due_on(today + 1)}
+            self.today = today
+        else:
+            self.rebuild(today, fetch_due_soon(today + 1))
@@ -0,0 +1,105 @@
+import discord
+import math
+import time
+from typing import Optional, Set
+from aiohttp import web
+import metrics
+
+
+class HealthServer:
+    """
+    Health and metrics HTTP server running on the bot's own event loop.
+
+    /health reports the real gateway state and event loop responsiveness and
+    answers 503 when either is off, so the host can restart a stuck bot. When
+    the loop is blocked outright, requests hang and the health check times
+    out, which is the right answer too.
+
+    is_ready() stays true while the gateway reconnects, so disconnects are
+    followed through the bot's (shard_)disconnect/connect/resumed events.
+    """
+
+    def __init__(self, bot, host: str = '0.0.0.0', port: int = 8080, max_loop_lag: float = 5.0):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.max_loop_lag = max_loop_lag
+        self._runner: Optional[web.AppRunner] = None
+        # Shards (0 when not sharded) whose gateway connection dropped and has not come back yet
+        self._disconnected: Set[int] = set()
+        self._track_gateway()
+
+        self.app = web.Application()
+        self.app.router.add_get('/', self.home)
+        self.app.router.add_get('/ping', self.ping)
+        self.app.router.add_get('/status', self.status)
+        self.app.router.add_get('/health', self.health)
+        self.app.router.add_get('/metrics', self.metrics_endpoint)
+
+    def _track_gateway(self):
+        if isinstance(self.bot, discord.AutoShardedClient):
+            self.bot.add_listener(self.gateway_disconnected, 'on_shard_disconnect')
+            self.bot.add_listener(self.gateway_connected, 'on_shard_connect')
+            self.bot.add_listener(self.gateway_connected, 'on_shard_resumed')
+        else:
+            self.bot.add_listener(self.gateway_disconnected, 'on_disconnect')
+            self.bot.add_listener(self.gateway_connected, 'on_connect')
+            self.bot.add_listener(self.gateway_connected, 'on_resumed')
+
+    async def gateway_disconnected(self, shard_id: int = 0):
+        self._disconnected.add(shard_id)
+
+    async def gateway_connected(self, shard_id: int = 0):
+        self._disconnected.discard(shard_id)
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"🌐 Health server listening on port {self.port}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def check(self) -> dict:
+        """Current health: gateway connection, heartbeat latency and event loop lag"""
+        latency = self.bot.latency
+        loop_lag = metrics.LOOP_LAG.values.get((), 0.0)
+        connected = self.bot.is_ready() and not self.bot.is_closed() and not self._disconnected
+
+        problems = []
+        if self._disconnected:
+            problems.append(f'gateway reconnecting (shards {sorted(self._disconnected)})')
+        elif not connected:
+            problems.append('gateway not connected')
+        if loop_lag > self.max_loop_lag:
+            problems.append(f'event loop lagging by {loop_lag:.1f}s')
+
+        return {
+            'status': 'healthy' if not problems else 'unhealthy',
+            'problems': problems,
+            'gateway_connected': connected,
+            'gateway_latency_ms': round(latency * 1000, 1) if math.isfinite(latency) else None,
+            'event_loop_lag_ms': round(loop_lag * 1000, 1),
+            'guilds': len(self.bot.guilds) if connected else 0,
+            'uptime': round(metrics.uptime(), 1),
+        }
+
+    async def home(self, request: web.Request) -> web.Response:
+        return web.Response(text=f"🤖 Taskpilot Discord Bot is alive! Uptime: {metrics.uptime():.0f}s")
+
+    async def ping(self, request: web.Request) -> web.Response:
+        return web.Response(text="pong")
+
+    async def status(self, request: web.Request) -> web.Response:
+        return web.json_response({'bot': str(self.bot.user or 'Discord Task Bot'), 'time': int(time.time()), **self.check()})
+
+    async def health(self, request: web.Request) -> web.Response:
+        result = self.check()
+        return web.json_response(result, status=200 if result['status'] == 'healthy' else 503)
+
+    async def metrics_endpoint(self, request: web.Request) -> web.Response:
+        return web.Response(body=metrics.REGISTRY.render().encode('utf-8'),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})